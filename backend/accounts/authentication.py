@@ -0,0 +1,71 @@
+#  backend/accounts/authentication.py
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# What views and permissions read from request.user; any other field is
+# loaded from the database the first time it is accessed
+USER_FIELDS = ('id', 'email', 'username', 'user_type', 'is_active', 'is_staff', 'is_superuser')
+
+
+def get_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_user(user_id):
+    get_cache().delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that reads the user from the cache rather than the
+    database. The token identifies the user; whether they are still
+    active, their role and (with CHECK_REVOKE_TOKEN) their password are
+    taken from the cached row, which is dropped whenever the user is saved
+    or deleted and otherwise kept for AUTH_USER_CACHE_TTL seconds.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        state = get_cache().get(key)
+        if state is None:
+            state = self.load_state(user_id)
+            get_cache().set(key, state, timeout=settings.AUTH_USER_CACHE_TTL)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not state['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != state['password_hash']:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # An instance as the ORM would have loaded it with only() the
+        # cached fields, so it can be assigned to foreign keys and saved.
+        # from_db takes the values in the model's field order.
+        fields = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in USER_FIELDS]
+        db = router.db_for_read(self.user_model)
+        return self.user_model.from_db(db, fields, [state[field] for field in fields])
+
+    def load_state(self, user_id):
+        fields = USER_FIELDS + (('password',) if api_settings.CHECK_REVOKE_TOKEN else ())
+        state = self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values(*fields).first()
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            state['password_hash'] = get_md5_hash_password(state.pop('password'))
+        return state
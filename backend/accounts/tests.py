@@ -1,3 +1,52 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from patients.models import Patient
+from .authentication import get_cache
+from .models import CustomUser
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = CustomUser.objects.create_user(
+            username='abebe', email='abebe@example.org', password='password', user_type=2, first_name='Abebe',
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_user_is_read_once_then_from_the_cache(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/user/')
+        self.assertEqual(response.data, {'email': 'abebe@example.org', 'user_type': 2})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+
+    def test_saving_the_user_takes_effect_at_once(self):
+        self.client.get('/api/auth/user/')
+        self.user.user_type = 1
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/user/').data['user_type'], 1)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 401)
+
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 401)
+
+    def test_cached_user_behaves_like_a_loaded_row(self):
+        self.client.get('/api/auth/user/')
+        response = self.client.post('/api/patients/', {
+            'first_name': 'Almaz', 'last_name': 'Tesfaye', 'gender': 'F', 'birth_date': '1990-01-01',
+            'address': 'Gondar', 'phone': '0911223344',
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Patient.objects.get().created_by, self.user)
+
+        user = self.client.get('/api/auth/user/').wsgi_request.user
+        self.assertFalse(user._state.adding)
+        # Fields outside the cached set are fetched when first read
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, 'Abebe')
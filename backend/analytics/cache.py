@@ -0,0 +1,84 @@
+#  backend/analytics/cache.py
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+# Time of the last change to the data analytics are computed from. It is part
+# of every cache key and ETag, so moving it forward invalidates them all at
+# once without having to find and delete individual entries.
+CHANGED_AT_KEY = 'analytics-data-changed-at'
+
+
+def get_cache():
+    return caches[settings.ANALYTICS_CACHE_ALIAS]
+
+
+def data_changed_at():
+    changed_at = get_cache().get(CHANGED_AT_KEY)
+    if changed_at is None:
+        # Cold or evicted cache: start a new generation
+        changed_at = time.time()
+        if not get_cache().add(CHANGED_AT_KEY, changed_at, timeout=None):
+            changed_at = get_cache().get(CHANGED_AT_KEY, changed_at)
+    return changed_at
+
+
+def mark_data_changed():
+    get_cache().set(CHANGED_AT_KEY, time.time(), timeout=None)
+
+
+def cache_scope(user, scope):
+    if scope == 'user':
+        return f'user:{user.pk}'
+    return f'role:{user.user_type}:{int(user.is_staff)}'
+
+
+def cached_response(scope='role'):
+    """
+    Cache a GET handler's response data until the underlying data changes.
+
+    Entries are shared by every user with the same role (`scope='role'`) or
+    kept per user (`scope='user'`), and are keyed on the full path and query
+    string. Responses carry an ETag and Last-Modified so a client that
+    already holds the current version gets a 304 without the view running.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            changed_at = data_changed_at()
+            # The date is included because "today" figures roll over at midnight
+            fingerprint = hashlib.sha1(
+                f'{cache_scope(request.user, scope)}|{request.get_full_path()}|'
+                f'{timezone.localdate()}|{changed_at!r}'.encode()
+            ).hexdigest()
+            etag = f'W/"{fingerprint}"'
+            last_modified = int(changed_at)
+
+            response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+            if response is None:
+                key = f'analytics-response:{fingerprint}'
+                data = get_cache().get(key)
+                if data is None:
+                    response = handler(self, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    get_cache().set(key, response.data, timeout=settings.ANALYTICS_CACHE_TTL)
+                else:
+                    response = Response(data)
+
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            # Clients may keep a copy but must revalidate it on every poll
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,24 @@
+#  backend/analytics/management/commands/backfill_screening_stats.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyScreeningStats rollup from the screenings table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Only rebuild days on or after this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError("--since must be a date like 2025-01-31")
+        rows = rebuild(since=since)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} daily rollup row(s)."))
@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    Screening = apps.get_model("screenings", "Screening")
+    DailyScreeningStats = apps.get_model("analytics", "DailyScreeningStats")
+    grouped = (
+        Screening.objects.exclude(result="")
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "patient__created_by")
+        .annotate(
+            total=Count("id"),
+            positive=Count("id", filter=Q(result="P")),
+            negative=Count("id", filter=Q(result="N")),
+            inconclusive=Count("id", filter=Q(result="I")),
+        )
+        .order_by()
+    )
+    DailyScreeningStats.objects.bulk_create(
+        [
+            DailyScreeningStats(
+                date=row["day"],
+                clinician_id=row["patient__created_by"],
+                total=row["total"],
+                positive=row["positive"],
+                negative=row["negative"],
+                inconclusive=row["inconclusive"],
+            )
+            for row in grouped.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+        ("screenings", "0003_screening_model_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+#  backend/analytics/models.py
+
+from django.conf import settings
+from django.db import models
+
+
+class DailyScreeningStats(models.Model):
+    """
+    Completed screenings per day and clinician (the user who registered the
+    patient), kept up to date by analytics.signals so the dashboard reads a
+    handful of rows instead of scanning the screenings table.
+    """
+    date = models.DateField()
+    clinician = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_screening_stats'
+    )
+    total = models.PositiveIntegerField(default=0)
+    positive = models.PositiveIntegerField(default=0)
+    negative = models.PositiveIntegerField(default=0)
+    inconclusive = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'clinician'], name='unique_daily_stats_per_clinician'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} / {self.clinician_id}: {self.total} screenings"
@@ -0,0 +1,93 @@
+#  backend/analytics/rollups.py
+
+from collections import Counter
+from datetime import datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from screenings.models import Screening
+from .models import DailyScreeningStats
+
+RESULT_FIELDS = {'P': 'positive', 'N': 'negative', 'I': 'inconclusive'}
+
+
+def bump(day, clinician_id, result, delta=1):
+    """
+    Add `delta` screenings with `result` to one day/clinician row.
+    """
+    field = RESULT_FIELDS.get(result)
+    if field is None:
+        return
+    changes = {'total': F('total') + delta, field: F(field) + delta}
+    rows = DailyScreeningStats.objects.filter(date=day, clinician_id=clinician_id)
+    if rows.update(**changes) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            DailyScreeningStats.objects.create(
+                date=day, clinician_id=clinician_id, total=delta, **{field: delta}
+            )
+    except IntegrityError:
+        # Another request created the row first
+        rows.update(**changes)
+
+
+def screening_day(screening):
+    return timezone.localdate(screening.created_at)
+
+
+def record_screenings(screenings):
+    """
+    Count many new screenings with one update per day/clinician/result.
+    """
+    counts = Counter(
+        (screening_day(s), s.patient.created_by_id, s.result)
+        for s in screenings if s.result
+    )
+    for (day, clinician_id, result), count in counts.items():
+        bump(day, clinician_id, result, count)
+
+
+def rebuild(since=None):
+    """
+    Recompute the rollup from the screenings table (optionally only from
+    `since` onwards) and return the number of rows written.
+    """
+    screenings = Screening.objects.exclude(result='')
+    stats = DailyScreeningStats.objects.all()
+    if since is not None:
+        # A range rather than created_at__date so the created_at index is used
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        screenings = screenings.filter(created_at__gte=start)
+        stats = stats.filter(date__gte=since)
+
+    grouped = (
+        screenings
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'patient__created_by')
+        .annotate(
+            total=Count('id'),
+            positive=Count('id', filter=Q(result='P')),
+            negative=Count('id', filter=Q(result='N')),
+            inconclusive=Count('id', filter=Q(result='I')),
+        )
+        .order_by()
+    )
+    rows = [
+        DailyScreeningStats(
+            date=row['day'],
+            clinician_id=row['patient__created_by'],
+            total=row['total'],
+            positive=row['positive'],
+            negative=row['negative'],
+            inconclusive=row['inconclusive'],
+        )
+        for row in grouped.iterator()
+    ]
+    with transaction.atomic():
+        stats.delete()
+        DailyScreeningStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
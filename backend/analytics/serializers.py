@@ -0,0 +1,35 @@
+#  backend/analytics/serializers.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from .timeseries import BREAKDOWNS, GRANULARITIES, count_buckets
+
+
+class TimeSeriesQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the time-series endpoint. Without a range the last
+    30 days are returned.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='day')
+    breakdown = serializers.ChoiceField(choices=BREAKDOWNS, default='none')
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError({'start': "start must not be after end."})
+        buckets = count_buckets(start, end, attrs['granularity'])
+        if buckets > settings.ANALYTICS_MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f"The range spans {buckets} {attrs['granularity']} buckets; "
+                f"the maximum is {settings.ANALYTICS_MAX_BUCKETS}. "
+                "Use a shorter range or a coarser granularity."
+            )
+        attrs['start'], attrs['end'] = start, end
+        return attrs
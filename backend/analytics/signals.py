@@ -0,0 +1,55 @@
+#  backend/analytics/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from patients.models import Patient
+from screenings.models import Screening
+from screenings.signals import screenings_bulk_created
+from .cache import mark_data_changed
+from .rollups import bump, record_screenings, screening_day
+
+
+@receiver(post_init, sender=Screening)
+def remember_result(sender, instance, **kwargs):
+    # Lets post_save see what the rollup currently counts for this row.
+    # Read __dict__ so a deferred `result` is not fetched; None = unknown.
+    instance._rollup_result = instance.__dict__.get('result') if instance.pk else ''
+
+
+@receiver(post_save, sender=Screening)
+def update_rollup_on_save(sender, instance, created, **kwargs):
+    old, new = ('' if created else instance._rollup_result), instance.result
+    if old is None or old == new:
+        return
+    day, clinician_id = screening_day(instance), instance.patient.created_by_id
+    if old:
+        bump(day, clinician_id, old, -1)
+    if new:
+        bump(day, clinician_id, new, 1)
+    instance._rollup_result = new
+
+
+@receiver(post_delete, sender=Screening)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    if instance._rollup_result:
+        bump(screening_day(instance), instance.patient.created_by_id, instance._rollup_result, -1)
+
+
+@receiver(screenings_bulk_created)
+def update_rollup_on_bulk_create(sender, screenings, **kwargs):
+    record_screenings(screenings)
+    for screening in screenings:
+        screening._rollup_result = screening.result
+
+
+@receiver(post_save, sender=Screening)
+@receiver(post_delete, sender=Screening)
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+@receiver(screenings_bulk_created)
+def invalidate_cached_analytics(sender, **kwargs):
+    # After commit, so a concurrent request cannot cache pre-change numbers
+    # under the new generation
+    transaction.on_commit(mark_data_changed)
@@ -1,3 +1,170 @@
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from patients.models import Patient
+from screenings.models import Screening
+from screenings.signals import screenings_bulk_created
+from tests.utils import QueryPlanTestCase, postgres_only, seed_clinic
+from .models import DailyScreeningStats
+
+
+class AnalyticsQueryTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_clinic()[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_dashboard_cost_is_constant(self):
+        response, queries = self.capture('/api/analytics/dashboard/', self.user)
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(sum(response.data['weekly_trend']['counts']),
+                         sum(DailyScreeningStats.objects.filter(
+                             date__gt=timezone.localdate() - timezone.timedelta(days=7)
+                         ).values_list('total', flat=True)))
+
+        # Served from the cache until the data changes
+        _, queries = self.capture('/api/analytics/dashboard/', self.user)
+        self.assertEqual(len(queries), 0)
+
+    def test_timeseries_costs_one_query(self):
+        for query in ('?breakdown=result', '?granularity=week&breakdown=clinician',
+                      '?granularity=hour&breakdown=gender', '?breakdown=age_band'):
+            with self.subTest(query=query):
+                _, queries = self.capture(f'/api/analytics/timeseries/{query}', self.user)
+                self.assertEqual(len(queries), 1)
+
+    @postgres_only
+    def test_hourly_timeseries_uses_created_at_index(self):
+        today = timezone.localdate().isoformat()
+        _, queries = self.capture(
+            f'/api/analytics/timeseries/?granularity=hour&breakdown=gender&start={today}', self.user
+        )
+        self.assertIndexScans(queries, 'screenings_screening', 'screening_created_idx')
+
+
+class DailyScreeningStatsTests(TestCase):
+    def setUp(self):
+        self.patients = []
+        for name in ('abebe', 'almaz'):
+            user = CustomUser.objects.create_user(username=name, email=f'{name}@example.org', password='password')
+            self.patients.append(Patient.objects.create(
+                created_by=user, first_name=name.title(), last_name='Kebede', gender='M',
+                birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+            ))
+
+    def screen(self, patient, result):
+        return Screening.objects.create(patient=patient, image='screenings/seed.jpg', result=result)
+
+    def stats(self):
+        """
+        {clinician: (total, positive, negative, inconclusive)} for today,
+        leaving out rows whose screenings were all deleted.
+        """
+        return {
+            row.clinician.username: (row.total, row.positive, row.negative, row.inconclusive)
+            for row in DailyScreeningStats.objects.filter(date=timezone.localdate(), total__gt=0)
+        }
+
+    def assertBackfillAgrees(self):
+        expected = self.stats()
+        DailyScreeningStats.objects.update(total=99)
+        call_command('backfill_screening_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), expected)
+
+    def test_saving_and_deleting(self):
+        abebe, almaz = self.patients
+        first, second = self.screen(abebe, 'P'), self.screen(abebe, 'P')
+        self.screen(almaz, 'N')
+        # Pending uploads have no result yet and are not counted
+        pending = self.screen(almaz, '')
+        self.assertEqual(self.stats(), {'abebe': (2, 2, 0, 0), 'almaz': (1, 0, 1, 0)})
+
+        # Re-graded, and saved again unchanged
+        first.result = 'I'
+        first.save()
+        first.save()
+        pending.result = 'P'
+        pending.save()
+        self.assertEqual(self.stats(), {'abebe': (2, 1, 0, 1), 'almaz': (2, 1, 1, 0)})
+
+        # Loaded fresh rather than the instance that was saved
+        Screening.objects.get(pk=second.pk).delete()
+        self.assertEqual(self.stats(), {'abebe': (1, 0, 0, 1), 'almaz': (2, 1, 1, 0)})
+        self.assertBackfillAgrees()
+
+    def test_bulk_changes(self):
+        abebe, almaz = self.patients
+        created = Screening.objects.bulk_create(
+            Screening(patient=patient, image='screenings/seed.jpg', result=result)
+            for patient, result in [(abebe, 'P'), (abebe, 'N'), (almaz, 'N'), (almaz, '')]
+        )
+        screenings_bulk_created.send(sender=Screening, screenings=created)
+        self.assertEqual(self.stats(), {'abebe': (2, 1, 1, 0), 'almaz': (1, 0, 1, 0)})
+
+        self.assertBackfillAgrees()
+
+        # update() skips the signals; the backfill recounts what it changed
+        Screening.objects.filter(pk__in=[s.pk for s in created if s.result != 'P']).update(result='I')
+        call_command('backfill_screening_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), {'abebe': (2, 1, 0, 1), 'almaz': (2, 0, 0, 2)})
+
+    def test_backfill_matches_the_signals(self):
+        self.screen(self.patients[0], 'P')
+        self.screen(self.patients[1], 'I')
+        expected = self.stats()
+        DailyScreeningStats.objects.all().delete()
+        call_command('backfill_screening_stats', since=timezone.localdate().isoformat(), stdout=StringIO())
+        self.assertEqual(self.stats(), expected)
+
+
+class AnalyticsResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='abebe', email='abebe@example.org', password='password')
+        self.patient = Patient.objects.create(
+            created_by=self.user, first_name='Abebe', last_name='Kebede', gender='M',
+            birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_current_etag_gets_not_modified(self):
+        response = self.client.get('/api/analytics/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/analytics/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Another URL has its own ETag
+        response = self.client.get('/api/analytics/timeseries/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_saving_a_screening_invalidates_the_cached_response(self):
+        response = self.client.get('/api/analytics/dashboard/')
+        etag = response['ETag']
+        self.assertEqual(response.data['today_cases'], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/analytics/dashboard/').data['today_cases'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Screening.objects.create(patient=self.patient, image='screenings/seed.jpg', result='P')
 
-# Create your tests here.
+        response = self.client.get('/api/analytics/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['today_cases'], 1)
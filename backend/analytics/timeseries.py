@@ -0,0 +1,223 @@
+#  backend/analytics/timeseries.py
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Case, CharField, Count, DateField, Sum, Value, When
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from patients.models import Patient
+from screenings.models import Screening
+from .models import DailyScreeningStats
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+BREAKDOWNS = ('none', 'result', 'gender', 'age_band', 'clinician', 'user_type')
+
+# (label, lower age inclusive, upper age exclusive)
+AGE_BANDS = [
+    ('0-4', 0, 5),
+    ('5-14', 5, 15),
+    ('15-24', 15, 25),
+    ('25-44', 25, 45),
+    ('45-64', 45, 65),
+    ('65+', 65, None),
+]
+
+RESULT_COLUMNS = {'P': 'positive', 'N': 'negative', 'I': 'inconclusive'}
+
+
+def bucket_starts(start, end, granularity):
+    """
+    Every bucket between `start` and `end` (dates, inclusive) in order:
+    aware datetimes for 'hour', dates otherwise. Weeks start on Monday.
+    """
+    if granularity == 'hour':
+        tz = timezone.get_current_timezone()
+        current = timezone.make_aware(datetime.combine(start, time.min), tz)
+        stop = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+        buckets = []
+        while current < stop:
+            buckets.append(timezone.localtime(current, tz))
+            current += timedelta(hours=1)
+        return buckets
+
+    if granularity == 'week':
+        current, step = start - timedelta(days=start.weekday()), timedelta(weeks=1)
+    elif granularity == 'month':
+        current, step = start.replace(day=1), None
+    else:
+        current, step = start, timedelta(days=1)
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        if step is None:
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        else:
+            current += step
+    return buckets
+
+
+def count_buckets(start, end, granularity):
+    days = (end - start).days + 1
+    if granularity == 'hour':
+        return days * 24
+    if granularity == 'week':
+        return days // 7 + 2
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return days
+
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+def age_band_expression(prefix, today):
+    """
+    A CASE expression mapping `<prefix>birth_date` to its AGE_BANDS label
+    (age as of `today`).
+    """
+    whens = []
+    for label, _, upper in AGE_BANDS:
+        if upper is None:
+            whens.append(When(**{f'{prefix}birth_date__isnull': False}, then=Value(label)))
+        else:
+            # Younger than `upper` means born after the date `upper` years ago
+            whens.append(When(**{f'{prefix}birth_date__gt': _years_before(today, upper)}, then=Value(label)))
+    return Case(*whens, default=Value(''), output_field=CharField())
+
+
+def _series_keys(breakdown):
+    """
+    The fixed (key, label) series for a breakdown, so charts get a stable
+    legend even when a category has no screenings in the range.
+    """
+    if breakdown == 'result':
+        return list(Screening.RESULT_CHOICES)
+    if breakdown == 'gender':
+        return list(Patient.GENDER_CHOICES)
+    if breakdown == 'age_band':
+        return [(label, label) for label, _, _ in AGE_BANDS]
+    if breakdown == 'user_type':
+        return list(CustomUser.USER_TYPE_CHOICES)
+    return []
+
+
+def _from_rollups(start, end, granularity, breakdown):
+    """
+    Day/week/month counts, optionally by result, clinician or user type, from
+    the daily rollup: one grouped query over a few rows per day.
+    """
+    rows = DailyScreeningStats.objects.filter(date__gte=start, date__lte=end)
+    if granularity != 'day':
+        rows = rows.annotate(bucket=Trunc('date', granularity, output_field=DateField()))
+        bucket = 'bucket'
+    else:
+        bucket = 'date'
+
+    if breakdown == 'result':
+        grouped = rows.values(bucket).annotate(
+            **{key: Sum(column) for key, column in RESULT_COLUMNS.items()}
+        ).order_by()
+        for row in grouped:
+            for key in RESULT_COLUMNS:
+                yield row[bucket], key, row[key]
+        return
+
+    group_by = {
+        'none': [],
+        'clinician': ['clinician', 'clinician__email'],
+        'user_type': ['clinician__user_type'],
+    }[breakdown]
+    grouped = rows.values(bucket, *group_by).annotate(count=Sum('total')).order_by()
+    for row in grouped:
+        if breakdown == 'clinician':
+            yield row[bucket], (row['clinician'], row['clinician__email']), row['count']
+        elif breakdown == 'user_type':
+            yield row[bucket], row['clinician__user_type'], row['count']
+        else:
+            yield row[bucket], 'total', row['count']
+
+
+def _from_screenings(start, end, granularity, breakdown):
+    """
+    Counts the rollup cannot answer (hourly buckets, or breakdowns by the
+    patient's gender or age band), grouped in one query over completed
+    screenings in the range.
+    """
+    tz = timezone.get_current_timezone()
+    screenings = Screening.objects.exclude(result='').filter(
+        created_at__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+        created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+    if granularity == 'hour':
+        screenings = screenings.annotate(bucket=Trunc('created_at', 'hour', tzinfo=tz))
+    else:
+        screenings = screenings.annotate(
+            bucket=Trunc('created_at', granularity, output_field=DateField(), tzinfo=tz)
+        )
+
+    if breakdown == 'age_band':
+        screenings = screenings.annotate(category=age_band_expression('patient__', timezone.localdate()))
+        group_by = ['category']
+    else:
+        group_by = {
+            'none': [],
+            'result': ['result'],
+            'gender': ['patient__gender'],
+            'clinician': ['patient__created_by', 'patient__created_by__email'],
+            'user_type': ['patient__created_by__user_type'],
+        }[breakdown]
+
+    grouped = screenings.values('bucket', *group_by).annotate(count=Count('id')).order_by()
+    for row in grouped:
+        if breakdown == 'none':
+            key = 'total'
+        elif breakdown == 'clinician':
+            key = (row['patient__created_by'], row['patient__created_by__email'])
+        else:
+            key = row[group_by[0]]
+        yield row['bucket'], key, row['count']
+
+
+def screening_timeseries(start, end, granularity='day', breakdown='none'):
+    """
+    Completed screening counts between two dates (inclusive) per bucket,
+    split into one series per breakdown category, with empty buckets
+    filled with zeros.
+    """
+    rollup_ok = granularity != 'hour' and breakdown not in ('gender', 'age_band')
+    source = _from_rollups if rollup_ok else _from_screenings
+
+    counts = {}
+    clinicians = {}
+    for bucket, key, count in source(start, end, granularity, breakdown):
+        if breakdown == 'clinician':
+            key, email = key
+            clinicians[key] = email
+        counts[key, bucket] = counts.get((key, bucket), 0) + (count or 0)
+
+    buckets = bucket_starts(start, end, granularity)
+    if breakdown == 'none':
+        keys = [('total', 'Total')]
+    elif breakdown == 'clinician':
+        keys = sorted(clinicians.items(), key=lambda item: item[1])
+    else:
+        keys = _series_keys(breakdown)
+
+    return {
+        'start': start,
+        'end': end,
+        'granularity': granularity,
+        'breakdown': breakdown,
+        'buckets': [b.isoformat() for b in buckets],
+        'series': [
+            {'key': key, 'label': label, 'counts': [counts.get((key, b), 0) for b in buckets]}
+            for key, label in keys
+        ],
+        'source': 'rollup' if rollup_ok else 'screenings',
+    }
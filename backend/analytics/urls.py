@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import DashboardView
+from .views import DashboardView, ScreeningTimeSeriesView
 
 urlpatterns = [
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('timeseries/', ScreeningTimeSeriesView.as_view(), name='screening-timeseries'),
 ]
\ No newline at end of file
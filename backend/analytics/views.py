@@ -2,27 +2,56 @@
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from screenings.models import Screening
+from django.db.models import Sum
+from django.utils import timezone
 from patients.models import Patient  
-from datetime import date, timedelta
+from datetime import timedelta
+from .cache import cached_response
+from .models import DailyScreeningStats
+from .serializers import TimeSeriesQuerySerializer
+from .timeseries import screening_timeseries
 
 class DashboardView(APIView):
+    @cached_response(scope='role')
     def get(self, request):
-        total_screenings = Screening.objects.count()
+        totals = DailyScreeningStats.objects.aggregate(total=Sum('total'), positive=Sum('positive'))
+        total_screenings = totals['total'] or 0
+        weekly_trend = self.get_weekly_trend()
         stats = {
-            'today_cases': Screening.objects.filter(created_at__date=date.today()).count(),
-            'positive_rate': Screening.objects.filter(result='P').count() / total_screenings if total_screenings > 0 else 0,
+            'today_cases': weekly_trend['counts'][-1],
+            'positive_rate': (totals['positive'] or 0) / total_screenings if total_screenings > 0 else 0,
             'total_patients': Patient.objects.count(),  
-            'weekly_trend': self.get_weekly_trend()
+            'weekly_trend': weekly_trend
         }
         return Response(stats)
     
     def get_weekly_trend(self):
-        dates = []
-        counts = []
-        for i in range(7):
-            day = date.today() - timedelta(days=i)
-            count = Screening.objects.filter(created_at__date=day).count()
-            dates.append(day.strftime('%a'))
-            counts.append(count)
-        return {'dates': dates[::-1], 'counts': counts[::-1]}
\ No newline at end of file
+        today = timezone.localdate()
+        days = [today - timedelta(days=i) for i in range(6, -1, -1)]
+        per_day = dict(
+            DailyScreeningStats.objects.filter(date__gte=days[0], date__lte=today)
+            .values('date')
+            .annotate(count=Sum('total'))
+            .values_list('date', 'count')
+        )
+        return {
+            'dates': [day.strftime('%a') for day in days],
+            'counts': [per_day.get(day, 0) for day in days],
+        }
+
+
+
+class ScreeningTimeSeriesView(APIView):
+    """
+    Completed screenings over an arbitrary date range.
+
+    Query parameters: `start` and `end` (YYYY-MM-DD, inclusive), `granularity`
+    (hour, day, week or month) and `breakdown` (none, result, gender,
+    age_band, clinician or user_type). Each response comes from a single
+    grouped query; empty buckets are returned as zeros.
+    """
+    @cached_response(scope='role')
+    def get(self, request):
+        params = TimeSeriesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(screening_timeseries(**params.validated_data))
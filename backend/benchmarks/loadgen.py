@@ -0,0 +1,112 @@
+#  backend/benchmarks/loadgen.py
+
+import asyncio
+import io
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from .seed import QUESTIONS
+
+REQUEST_TIMEOUT = 60   # seconds; a slower response counts as an error
+
+
+@dataclass
+class VirtualUser:
+    """
+    A seeded clinician the load generator acts as.
+    """
+    token: str
+    patient_ids: list
+
+
+def smear_photo(width=4032, height=3024, seed=0):
+    """
+    A JPEG the size of a phone photo. Smooth colour fields rather than
+    noise, so it compresses (and decodes) like a real photo.
+    """
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (max(1, height // 64), max(1, width // 64), 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(small).resize((width, height), Image.BICUBIC).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def upload(photo):
+    def request(user, n):
+        # Bytes after the JPEG's end marker give every upload its own digest,
+        # so the result cache never answers, and do not change the decode
+        image = photo + os.urandom(16)
+        return 'POST', '/api/screenings/upload/', {
+            'data': {'patient': str(user.patient_ids[n % len(user.patient_ids)])},
+            'files': {'image': ('smear.jpg', image, 'image/jpeg')},
+        }
+    return request
+
+
+def screening_list(user, n):
+    return 'GET', '/api/screenings/screenings/', {'params': {'page_size': 50}}
+
+
+def dashboard(user, n):
+    return 'GET', '/api/analytics/dashboard/', {}
+
+
+def chatbot(user, n):
+    # Numbered so every question misses the answer cache and reaches the provider
+    return 'POST', '/api/chatbot/stream/', {'json': {'query': f"{QUESTIONS[n % len(QUESTIONS)]} ({n})"}}
+
+
+def scenarios(photo):
+    """
+    name -> request factory(user, n) returning (method, path, httpx kwargs).
+    """
+    return {
+        'upload': upload(photo),
+        'screening_list': screening_list,
+        'dashboard': dashboard,
+        'chatbot': chatbot,
+    }
+
+
+async def drive(base_url, make_request, users, concurrency=8, duration=10.0, warmup=2.0, transport=None):
+    """
+    Run `concurrency` clients in a closed loop, each sending its next
+    request as soon as the last one's body has been read, for `warmup`
+    then `duration` seconds. Returns (latencies in seconds, status counts,
+    seconds measured) for the requests started after the warm-up; a
+    request that failed to complete has status 0.
+    """
+    latencies, statuses = [], Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=REQUEST_TIMEOUT, limits=limits,
+                                 transport=transport) as client:
+        measure_from = time.perf_counter() + warmup
+        deadline = measure_from + duration
+
+        async def loop(i):
+            user = users[i % len(users)]
+            headers = {'Authorization': f'Bearer {user.token}'}
+            n = i
+            while (started := time.perf_counter()) < deadline:
+                method, path, kwargs = make_request(user, n)
+                n += concurrency
+                try:
+                    async with client.stream(method, path, headers=headers, **kwargs) as response:
+                        async for _ in response.aiter_raw():
+                            pass
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                if started >= measure_from:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+
+        await asyncio.gather(*(loop(i) for i in range(concurrency)))
+        measured = time.perf_counter() - measure_from
+    return latencies, statuses, measured
@@ -0,0 +1,148 @@
+#  backend/benchmarks/management/commands/run_benchmark.py
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.loadgen import VirtualUser, drive, scenarios, smear_photo
+from benchmarks.report import build_report, compare, load_report, render_html, summarize
+from benchmarks.seed import seeded_clinicians
+from chatbot.models import ChatMessage
+from patients.models import Patient
+from screenings.models import Screening
+
+# Server-side overrides for --serve: the chatbot answers without calling out
+SERVE_ENV = {'CHATBOT_PROVIDER': 'chatbot.providers.FakeChatProvider'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the API as the clinicians from seed_benchmark_data and write a JSON and HTML "
+        "report of requests/second and latency percentiles, optionally compared with a baseline. "
+        "Without --serve, run the server yourself with CHATBOT_PROVIDER=chatbot.providers.FakeChatProvider."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server to load.")
+        parser.add_argument('--serve', action='store_true',
+                            help="Start uvicorn on --url's port for the run, with the fake chat provider.")
+        parser.add_argument('--workers', type=int, default=1, help="uvicorn worker processes with --serve.")
+        parser.add_argument('--scenarios', default='upload,screening_list,dashboard,chatbot',
+                            help="Comma-separated: upload, screening_list, dashboard, chatbot.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Clients sending requests at once.")
+        parser.add_argument('--duration', type=float, default=20, help="Seconds measured per scenario.")
+        parser.add_argument('--warmup', type=float, default=3, help="Seconds run first and not measured.")
+        parser.add_argument('--image-size', default='4032x3024', help="WIDTHxHEIGHT of uploaded JPEGs.")
+        parser.add_argument('--output', help="Report path (.json; an .html is written next to it).")
+        parser.add_argument('--baseline', help="Earlier report to compare with.")
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help="Fraction a metric may worsen before it counts as a regression.")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        try:
+            width, height = (int(v) for v in options['image_size'].lower().split('x'))
+        except ValueError:
+            raise CommandError("--image-size must look like 4032x3024")
+        available = scenarios(smear_photo(width, height) if 'upload' in names else b'')
+        unknown = set(names) - set(available)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        baseline = load_report(options['baseline']) if options['baseline'] else None
+
+        users = self.virtual_users(options['concurrency'])
+        server = self.serve(options['url'], options['workers']) if options['serve'] else None
+        results = {}
+        try:
+            self.stdout.write(
+                f"{'scenario':<16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+            )
+            for name in names:
+                latencies, statuses, seconds = asyncio.run(drive(
+                    options['url'], available[name], users, options['concurrency'],
+                    options['duration'], options['warmup'],
+                ))
+                summary = results[name] = summarize(latencies, statuses, seconds)
+                self.stdout.write(
+                    f"{name:<16} {summary['rps']:>8.1f} {summary['p50_ms'] or 0:>8.1f} {summary['p95_ms'] or 0:>8.1f} "
+                    f"{summary['p99_ms'] or 0:>8.1f} {summary['max_ms'] or 0:>8.1f} {summary['errors']:>7}"
+                )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+        run_options = {key: options[key] for key in (
+            'url', 'serve', 'workers', 'concurrency', 'duration', 'warmup', 'image_size',
+        )}
+        data = {
+            'patients': Patient.objects.count(),
+            'screenings': Screening.objects.count(),
+            'chat_messages': ChatMessage.objects.count(),
+        }
+        report = build_report(results, run_options, data)
+        comparison = compare(report, baseline, options['tolerance']) if baseline is not None else None
+
+        path = Path(options['output'] or f"benchmark-{timezone.now():%Y%m%d-%H%M%S}.json")
+        path.write_text(json.dumps({**report, 'comparison': comparison}, indent=2))
+        path.with_suffix('.html').write_text(render_html(report, comparison))
+        self.stdout.write(f"Wrote {path} and {path.with_suffix('.html')}.")
+
+        if comparison is not None:
+            regressions = [row for row in comparison if row['verdict'] == 'regressed']
+            for row in comparison:
+                style = {'regressed': self.style.ERROR, 'improved': self.style.SUCCESS}.get(row['verdict'], str)
+                self.stdout.write(style(
+                    f"{row['scenario']:<16} {row['metric']:<7} {row['baseline']:>10} -> {row['current']:>10} "
+                    f"{row['change']:+8.1%}  {row['verdict']}"
+                ))
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} metric(s) regressed by more than {options['tolerance']:.0%}.")
+
+    def virtual_users(self, count):
+        """
+        Up to `count` seeded clinicians with a fresh access token and some
+        of their patients each.
+        """
+        users = []
+        for clinician in seeded_clinicians()[:count]:
+            patient_ids = list(Patient.objects.filter(created_by=clinician).values_list('id', flat=True)[:100])
+            if patient_ids:
+                users.append(VirtualUser(str(AccessToken.for_user(clinician)), patient_ids))
+        if not users:
+            raise CommandError("No seeded clinicians with patients; run seed_benchmark_data first.")
+        return users
+
+    def serve(self, url, workers):
+        """
+        Start uvicorn with this process's settings on the port in `url` and
+        wait until it answers.
+        """
+        port = httpx.URL(url).port or 8000
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'malaria_api.asgi:application', '--host', '127.0.0.1',
+             '--port', str(port), '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+            cwd=settings.BASE_DIR, env={**os.environ, **SERVE_ENV},
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"uvicorn exited with status {process.returncode}")
+            try:
+                httpx.get(url, timeout=1)
+                return process
+            except httpx.TransportError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f"The server at {url} did not start within 60s")
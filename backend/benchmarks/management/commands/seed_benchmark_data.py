@@ -0,0 +1,51 @@
+#  backend/benchmarks/management/commands/seed_benchmark_data.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.seed import PASSWORD, USERNAME_PREFIX, seed_data, seeded_clinicians
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load clinicians, patients, screenings and chat history for run_benchmark. "
+        "Use an empty database; the same options always load the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clinicians', type=int, default=100)
+        parser.add_argument('--patients', type=int, default=100_000)
+        parser.add_argument('--screenings', type=int, default=1_000_000)
+        parser.add_argument('--messages', type=int, default=100_000, help="Chat messages across all clinicians.")
+        parser.add_argument('--days', type=int, default=180, help="Spread the rows over this many past days.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Patients loaded per transaction.")
+        parser.add_argument('--jobs', type=int, default=1,
+                            help="Processes loading at once; worth raising on PostgreSQL, not SQLite.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['clinicians'] < 1:
+            raise CommandError("--clinicians must be at least 1")
+        if seeded_clinicians().exists():
+            raise CommandError(
+                f"Benchmark users ({USERNAME_PREFIX}*) already exist; seed into an empty database "
+                "(e.g. manage.py flush)."
+            )
+        started = time.perf_counter()
+        counts = seed_data(
+            clinicians=options['clinicians'],
+            patients=options['patients'],
+            screenings=options['screenings'],
+            messages=options['messages'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            jobs=options['jobs'],
+            progress=lambda message: self.stdout.write(f"  {message}"),
+        )
+        loaded = ', '.join(f"{count:,} {kind}" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {loaded} in {time.perf_counter() - started:.1f}s. "
+            f"Clinicians log in as {USERNAME_PREFIX}<n>@example.org / {PASSWORD}."
+        ))
@@ -0,0 +1,146 @@
+#  backend/benchmarks/report.py
+
+import json
+import os
+import platform
+import subprocess
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.html import escape
+
+PERCENTILES = (50, 90, 95, 99)
+
+# metric -> whether a larger value is better
+COMPARED = {'rps': True, 'p50_ms': False, 'p95_ms': False, 'p99_ms': False}
+
+
+def summarize(latencies, statuses, seconds):
+    """
+    Throughput and latency percentiles (milliseconds) of one scenario run.
+    Any status outside 2xx/3xx, and a request that failed to complete, is
+    an error.
+    """
+    ms = np.array(latencies) * 1000
+    summary = {
+        'requests': len(ms),
+        'errors': sum(count for status, count in statuses.items() if not 200 <= status < 400),
+        'rps': round(len(ms) / seconds, 2) if seconds > 0 else 0.0,
+        'mean_ms': round(float(ms.mean()), 2) if len(ms) else None,
+    }
+    for p, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES) if len(ms) else [None] * len(PERCENTILES)):
+        summary[f'p{p}_ms'] = round(float(value), 2) if value is not None else None
+    summary['max_ms'] = round(float(ms.max()), 2) if len(ms) else None
+    summary['statuses'] = {str(status): count for status, count in sorted(statuses.items())}
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_report(results, options, data):
+    """
+    The JSON-serialisable record of one run: what was run, against what
+    data and code, and each scenario's summary.
+    """
+    return {
+        'created_at': timezone.now().isoformat(),
+        'revision': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'cpus': os.cpu_count(),
+        },
+        'options': options,
+        'data': data,
+        'scenarios': results,
+    }
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current, baseline, tolerance=0.1):
+    """
+    Rows of {scenario, metric, baseline, current, change, verdict} for the
+    scenarios both reports ran. A metric has regressed when it is worse
+    than the baseline by more than `tolerance` (a fraction).
+    """
+    rows = []
+    for name, summary in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before.get(metric), summary.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            better = change if higher_is_better else -change
+            verdict = 'regressed' if better < -tolerance else 'improved' if better > tolerance else 'unchanged'
+            rows.append({
+                'scenario': name, 'metric': metric, 'baseline': old, 'current': new,
+                'change': round(change, 4), 'verdict': verdict,
+            })
+    return rows
+
+
+def _table(headings, rows):
+    head = ''.join(f'<th>{escape(heading)}</th>' for heading in headings)
+    body = ''.join(
+        '<tr>' + ''.join(f'<td class="{escape(css)}">{escape(value)}</td>' for value, css in row) + '</tr>'
+        for row in rows
+    )
+    return f'<table><tr>{head}</tr>{body}</table>'
+
+
+def render_html(report, comparison=None):
+    """
+    A standalone HTML page of the report and, when given, its comparison
+    with a baseline.
+    """
+    columns = ['requests', 'errors', 'rps', 'mean_ms', *(f'p{p}_ms' for p in PERCENTILES), 'max_ms']
+    sections = [_table(
+        ['scenario', *columns],
+        [[(name, '')] + [(summary[column], '') for column in columns]
+         for name, summary in report['scenarios'].items()],
+    )]
+    if comparison is not None:
+        sections.append('<h2>Against the baseline</h2>')
+        sections.append(_table(
+            ['scenario', 'metric', 'baseline', 'current', 'change', 'verdict'],
+            [[(row['scenario'], ''), (row['metric'], ''), (row['baseline'], ''), (row['current'], ''),
+              (f"{row['change']:+.1%}", row['verdict']), (row['verdict'], row['verdict'])]
+             for row in comparison],
+        ))
+    options = ', '.join(f'{key}={value}' for key, value in report['options'].items())
+    data = ', '.join(f'{value:,} {key}' for key, value in report['data'].items())
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>API benchmark {escape(report['created_at'])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 2em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 10px; text-align: right; }}
+th:first-child, td:first-child {{ text-align: left; }}
+.regressed {{ background: #fdd; }}
+.improved {{ background: #dfd; }}
+</style></head>
+<body>
+<h1>API benchmark</h1>
+<p>{escape(report['created_at'])} at revision {escape(report['revision'] or 'unknown')}
+on {escape(report['environment']['database'])}; {escape(options)}</p>
+<p>Data: {escape(data)}</p>
+{''.join(sections)}
+</body></html>
+"""
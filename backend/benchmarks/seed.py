@@ -0,0 +1,221 @@
+#  backend/benchmarks/seed.py
+
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from analytics.rollups import rebuild
+from chatbot.models import ChatMessage
+from patients.models import Patient
+from screenings.models import Screening
+from screenings.worker import init_worker
+from sync.models import Change
+
+USERNAME_PREFIX = 'bench-clinician-'
+PASSWORD = 'benchmark'
+
+FIRST_NAMES = [
+    'Abebe', 'Almaz', 'Abel', 'Aster', 'Bekele', 'Birtukan', 'Dawit', 'Eden', 'Elias', 'Fikirte',
+    'Genet', 'Girma', 'Hana', 'Haile', 'Meron', 'Mekdes', 'Mulugeta', 'Selam', 'Solomon', 'Tigist',
+    'Tesfaye', 'Yonas', 'Yordanos', 'Zewdu', 'Amina', 'Kebede', 'Lidya', 'Nahom', 'Rahel', 'Samuel',
+]
+LAST_NAMES = [
+    'Kebede', 'Tesfaye', 'Girma', 'Bekele', 'Haile', 'Alemu', 'Tadesse', 'Getachew', 'Mengistu', 'Wolde',
+    'Assefa', 'Desta', 'Negash', 'Mekonnen', 'Demissie', 'Abebe', 'Tekle', 'Gebre', 'Ayele', 'Yohannes',
+]
+TOWNS = [
+    'Addis Ababa', 'Adama', 'Hawassa', 'Bahir Dar', 'Gondar', 'Mekelle', 'Dire Dawa', 'Jimma',
+    'Dessie', 'Arba Minch', 'Gambela', 'Asosa', 'Metu', 'Bonga', 'Nekemte', 'Shashemene',
+]
+QUESTIONS = [
+    "How do bed nets prevent malaria?",
+    "What are the first symptoms of malaria?",
+    "Is artemisinin combination therapy safe in pregnancy?",
+    "How long does malaria treatment take?",
+    "Can children take chemoprevention?",
+    "When should a fever be tested for malaria?",
+    "What is severe malaria?",
+    "How often should nets be replaced?",
+]
+# Result codes with their share of screenings
+RESULTS = (('N', 80), ('P', 15), ('I', 5))
+INSERT_BATCH_SIZE = 5000   # rows per INSERT statement
+UPDATE_BATCH_SIZE = 1000   # rows per UPDATE statement, where not PostgreSQL
+
+
+def backdate(model, objs, created_at):
+    """
+    Give the rows bulk_create just inserted the `created_at` values meant
+    for them; auto_now_add replaced those with the current time.
+    """
+    for obj, value in zip(objs, created_at):
+        obj.created_at = value
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_update(objs, ['created_at'], batch_size=UPDATE_BATCH_SIZE)
+        return
+    # One statement joining the table to the new values; bulk_update's
+    # CASE per row is several times slower
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {connection.ops.quote_name(model._meta.db_table)} AS t SET created_at = v.created_at "
+            f"FROM unnest(%s::bigint[], %s::timestamptz[]) AS v(id, created_at) WHERE t.id = v.id",
+            [[obj.pk for obj in objs], created_at],
+        )
+
+
+def seeded_clinicians():
+    return CustomUser.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id')
+
+
+def seed_patients(first, count, owners, per_patient, extra, total, start, now, random_seed):
+    """
+    Insert patients `first` to `first + count` of `total` and their
+    screenings in one transaction; returns (patients, screenings) made.
+    Each chunk has its own random stream, so the rows do not depend on
+    how chunks are spread over processes.
+    """
+    rng = random.Random(f'{random_seed}:patients:{first}')
+    span = (now - start).total_seconds()
+    results, weights = zip(*RESULTS)
+    with transaction.atomic():
+        patients = []
+        for i in range(first, first + count):
+            # Registered in order over the period, a little out of step
+            patients.append(Patient(
+                created_by_id=owners[i % len(owners)],
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                gender=rng.choice('MF'),
+                birth_date=date(1950, 1, 1) + timedelta(days=rng.randrange(25000)),
+                address=f"Kebele {rng.randrange(40)}, {rng.choice(TOWNS)}",
+                phone=f"09{rng.randrange(10 ** 8):08d}",
+                created_at=start + timedelta(seconds=span * (i + rng.random()) / total),
+            ))
+        created_at = [patient.created_at for patient in patients]
+        patients = Patient.objects.bulk_create(patients)
+        backdate(Patient, patients, created_at)
+
+        screenings = []
+        for i, patient in enumerate(patients, start=first):
+            visits = per_patient + (i < extra)
+            remaining = (now - patient.created_at).total_seconds()
+            # The first screening within a minute of registration, follow-ups since
+            offsets = [60 * rng.random()] + sorted(rng.random() * remaining for _ in range(visits - 1))
+            for offset in offsets[:visits]:
+                confidence = 0.5 + rng.random() / 2
+                screenings.append(Screening(
+                    patient_id=patient.id,
+                    image='screenings/seed.jpg',
+                    result=rng.choices(results, weights)[0],
+                    confidence=confidence,
+                    parasite_count=int(confidence * 100),
+                    model_version='mobilenetv2-v1',
+                    created_at=min(now, patient.created_at + timedelta(seconds=offset)),
+                ))
+        created_at = [screening.created_at for screening in screenings]
+        screenings = Screening.objects.bulk_create(screenings, batch_size=INSERT_BATCH_SIZE)
+        backdate(Screening, screenings, created_at)
+
+        # Logged at txid 0, as the sync backfill logs rows that predate it
+        owner = {patient.id: patient.created_by_id for patient in patients}
+        Change.objects.bulk_create(
+            [Change(kind=Change.PATIENT, object_id=patient.id, owner_id=patient.created_by_id)
+             for patient in patients]
+            + [Change(kind=Change.SCREENING, object_id=screening.id, owner_id=owner[screening.patient_id])
+               for screening in screenings],
+            batch_size=INSERT_BATCH_SIZE,
+        )
+    return len(patients), len(screenings)
+
+
+def seed_messages(first, count, owners, start, now, random_seed):
+    rng = random.Random(f'{random_seed}:messages:{first}')
+    span = (now - start).total_seconds()
+    messages = [
+        ChatMessage(
+            user_id=owners[i % len(owners)],
+            query=rng.choice(QUESTIONS),
+            response="Sleep under an insecticide-treated net and see a health worker about any fever.",
+            search_urls=["https://www.who.int/news-room/fact-sheets/detail/malaria"],
+            created_at=start + timedelta(seconds=span * rng.random()),
+        )
+        for i in range(first, first + count)
+    ]
+    created_at = [message.created_at for message in messages]
+    with transaction.atomic():
+        messages = ChatMessage.objects.bulk_create(messages)
+        backdate(ChatMessage, messages, created_at)
+    return count
+
+
+def seed_data(clinicians=100, patients=100_000, screenings=1_000_000, messages=100_000, days=180,
+              batch_size=5000, random_seed=0, jobs=1, progress=None):
+    """
+    Bulk-load a clinic network's data spread over the last `days` days:
+    clinicians, their patients, screenings (spread evenly over patients,
+    the first at registration and the rest since) and chat history. The
+    analytics rollup and the sync change log are filled in as signals
+    would have. Returns the number of rows of each kind.
+
+    Chunks of `batch_size` patients are loaded by `jobs` processes at once;
+    bulk_create spends most of its time in Python, so on PostgreSQL spare
+    cores help. The same arguments always produce the same rows, apart
+    from ids and the reference time.
+    """
+    report = progress or (lambda message: None)
+    now = timezone.now()
+    start = now - timedelta(days=days)
+
+    with transaction.atomic():
+        password = make_password(PASSWORD)
+        users = CustomUser.objects.bulk_create(
+            CustomUser(username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.org',
+                       password=password, user_type=2 if i % 4 else 3)
+            for i in range(clinicians)
+        )
+    owners = [user.id for user in users]
+    report(f"{len(owners)} clinicians")
+
+    per_patient, extra = divmod(screenings, patients) if patients else (0, 0)
+    tasks = [
+        (seed_patients, first, min(batch_size, patients - first), owners, per_patient, extra, patients,
+         start, now, random_seed)
+        for first in range(0, patients, batch_size)
+    ] + [
+        (seed_messages, first, min(batch_size, messages - first), owners, start, now, random_seed)
+        for first in range(0, messages, batch_size)
+    ]
+    made = {'patients': 0, 'screenings': 0, 'chat_messages': 0}
+
+    def tally(fn, result):
+        if fn is seed_patients:
+            made['patients'] += result[0]
+            made['screenings'] += result[1]
+            report(f"{made['patients']} patients, {made['screenings']} screenings")
+        else:
+            made['chat_messages'] += result
+            report(f"{made['chat_messages']} chat messages")
+
+    if jobs > 1:
+        # Each process opens its own connection; the parent's is not shared
+        connection.close()
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker) as executor:
+            futures = [(task[0], executor.submit(*task)) for task in tasks]
+            for fn, future in futures:
+                tally(fn, future.result())
+    else:
+        for fn, *args in tasks:
+            tally(fn, fn(*args))
+
+    rebuild()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    return {'clinicians': len(owners), **made}
@@ -0,0 +1,102 @@
+import asyncio
+from collections import Counter
+
+import httpx
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from django.db.models import OuterRef, Subquery, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from analytics.models import DailyScreeningStats
+from chatbot.models import ChatMessage
+from patients.models import Patient
+from screenings.models import Screening
+from sync.models import Change
+from .loadgen import VirtualUser, drive, scenarios
+from .report import compare, render_html, summarize
+from .seed import seed_data, seeded_clinicians
+
+
+def small_seed():
+    return seed_data(clinicians=3, patients=12, screenings=40, messages=9, days=30, batch_size=5)
+
+
+class SeedTests(TestCase):
+    def test_seeds_related_rows_over_the_period(self):
+        counts = small_seed()
+        self.assertEqual(counts, {'clinicians': 3, 'patients': 12, 'screenings': 40, 'chat_messages': 9})
+        self.assertEqual(Screening.objects.count(), 40)
+        self.assertEqual(ChatMessage.objects.count(), 9)
+        # Rows look as if written over time, screenings after registration
+        self.assertGreater(Patient.objects.dates('created_at', 'day').count(), 5)
+        first_screening = Screening.objects.filter(patient=OuterRef('pk')).order_by('created_at')
+        first_screening = first_screening.values('created_at')[:1]
+        for created_at, screened_at in Patient.objects.annotate(
+            first=Subquery(first_screening)
+        ).values_list('created_at', 'first'):
+            self.assertGreaterEqual(screened_at, created_at)
+        # What signals would have written
+        self.assertEqual(DailyScreeningStats.objects.aggregate(total=Sum('total'))['total'], 40)
+        self.assertEqual(Change.objects.count(), 52)
+
+    def test_same_options_same_rows(self):
+        def snapshot():
+            return (
+                list(Patient.objects.order_by('id').values_list('first_name', 'last_name', 'address')),
+                list(Screening.objects.order_by('id').values_list('result', 'confidence')),
+            )
+
+        small_seed()
+        first = snapshot()
+        seeded_clinicians().delete()
+        small_seed()
+        self.assertEqual(snapshot(), first)
+
+
+@override_settings(CHATBOT_PROVIDER='chatbot.providers.FakeChatProvider')
+class LoadGeneratorTests(TransactionTestCase):
+    def test_drives_each_read_scenario(self):
+        small_seed()
+        users = [
+            VirtualUser(str(AccessToken.for_user(clinician)),
+                        list(Patient.objects.filter(created_by=clinician).values_list('id', flat=True)))
+            for clinician in seeded_clinicians()
+        ]
+        transport = httpx.ASGITransport(app=get_asgi_application())
+        available = scenarios(b'')
+        # The test database's in-memory SQLite locks whole tables on write
+        concurrency = 1 if connection.vendor == 'sqlite' else 2
+        for name in ('screening_list', 'dashboard', 'chatbot'):
+            with self.subTest(name):
+                latencies, statuses, seconds = asyncio.run(drive(
+                    'http://testserver', available[name], users, concurrency=concurrency, duration=0.3, warmup=0.1,
+                    transport=transport,
+                ))
+                self.assertEqual(set(statuses), {200})
+                self.assertEqual(summarize(latencies, statuses, seconds)['requests'], len(latencies))
+        self.assertGreater(ChatMessage.objects.filter(query__contains='(').count(), 0)
+
+
+class ReportTests(SimpleTestCase):
+    def test_summary_and_comparison(self):
+        summary = summarize([0.010, 0.020, 0.030, 0.040], Counter({200: 3, 503: 1}), seconds=2)
+        self.assertEqual(summary['requests'], 4)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['rps'], 2.0)
+        self.assertEqual(summary['p50_ms'], 25.0)
+        self.assertEqual(summary['max_ms'], 40.0)
+
+        baseline = {'scenarios': {'dashboard': {'rps': 100, 'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 30}}}
+        current = {'scenarios': {'dashboard': {'rps': 80, 'p50_ms': 10.5, 'p95_ms': 15, 'p99_ms': 30},
+                                 'chatbot': {'rps': 5}}}
+        verdicts = {row['metric']: row['verdict'] for row in compare(current, baseline, tolerance=0.1)}
+        self.assertEqual(verdicts, {'rps': 'regressed', 'p50_ms': 'unchanged', 'p95_ms': 'improved',
+                                    'p99_ms': 'unchanged'})
+
+        report = {'created_at': '2025-01-01T00:00:00', 'revision': None, 'environment': {'database': 'sqlite'},
+                  'options': {'concurrency': 8}, 'data': {'patients': 10},
+                  'scenarios': {'<dashboard>': summary}}
+        html = render_html(report, compare(current, baseline))
+        self.assertIn('&lt;dashboard&gt;', html)
+        self.assertIn('class="regressed"', html)
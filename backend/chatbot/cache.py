@@ -0,0 +1,245 @@
+#  backend/chatbot/cache.py
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from malaria_api.caching import DjangoCacheBackend, LRUBackend
+
+
+def normalize_query(query):
+    """
+    Lower-case a question and reduce it to its words, so "How to use bed
+    nets?" and "how to use  bed nets" share a cache entry.
+    """
+    return ' '.join(re.findall(r'\w+', query.lower()))
+
+
+def query_features(normalized):
+    """
+    Term counts for the similarity index: each word plus its padded
+    character trigrams, so "bednets" still overlaps "bed nets".
+    """
+    features = Counter()
+    for word in normalized.split():
+        features[word] += 1
+        padded = f'#{word}#'
+        features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+class SimilarityIndex:
+    """
+    TF-IDF index over the normalised questions currently in the cache,
+    bounded like an LRU. `best_match` returns the closest indexed question
+    and its cosine similarity.
+    """
+
+    def __init__(self, max_entries=1024, ttl=86400):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._entries = OrderedDict()      # normalized -> (features, expires_at)
+        self._postings = {}                # feature -> set of normalized
+        self._norms = {}                   # normalized -> TF-IDF vector length
+        self._lock = threading.Lock()
+
+    def add(self, normalized):
+        features = query_features(normalized)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if normalized in self._entries:
+                self._entries.move_to_end(normalized)
+                self._entries[normalized] = (features, expires_at)
+                return
+            self._entries[normalized] = (features, expires_at)
+            for feature in features:
+                self._postings.setdefault(feature, set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._norms.clear()
+
+    def discard(self, normalized):
+        with self._lock:
+            if normalized in self._entries:
+                self._remove(normalized)
+                self._norms.clear()
+
+    def _remove(self, normalized):
+        features, _ = self._entries.pop(normalized)
+        for feature in features:
+            documents = self._postings[feature]
+            documents.discard(normalized)
+            if not documents:
+                del self._postings[feature]
+
+    def _idf(self, feature):
+        # Smoothed as in scikit-learn, so terms every question shares still count
+        return math.log((1 + len(self._entries)) / (1 + len(self._postings.get(feature, ())))) + 1
+
+    def _norm(self, normalized):
+        # Document norms only change with the corpus, so they are kept until
+        # the next add or removal
+        norm = self._norms.get(normalized)
+        if norm is None:
+            features, _ = self._entries[normalized]
+            norm = math.sqrt(sum((count * self._idf(feature)) ** 2 for feature, count in features.items()))
+            self._norms[normalized] = norm
+        return norm
+
+    def best_match(self, normalized):
+        features = query_features(normalized)
+        now = time.monotonic()
+        with self._lock:
+            # Dot products accumulated through the postings, so only
+            # questions sharing a feature with the query are touched
+            dots = defaultdict(float)
+            query_norm = 0.0
+            for feature, count in features.items():
+                idf = self._idf(feature)
+                query_norm += (count * idf) ** 2
+                for candidate in self._postings.get(feature, ()):
+                    dots[candidate] += count * idf * idf * self._entries[candidate][0][feature]
+            query_norm = math.sqrt(query_norm)
+
+            best, best_score = None, 0.0
+            for candidate, dot in dots.items():
+                if self._entries[candidate][1] is not None and self._entries[candidate][1] <= now:
+                    continue
+                score = dot / (self._norm(candidate) * query_norm)
+                if score > best_score:
+                    best, best_score = candidate, score
+            if best is not None:
+                self._entries.move_to_end(best)
+        return best, best_score
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AnswerCache:
+    """
+    Maps a question to a stored answer (response text plus the search
+    results it was grounded on). Lookups match the normalised question
+    exactly and, when `similarity_threshold` is set, the most similar
+    cached question at or above it.
+    """
+
+    key_prefix = 'chatbot-answer'
+
+    def __init__(self, backend, index=None, similarity_threshold=0.0):
+        self.backend = backend
+        self.index = index
+        self.similarity_threshold = similarity_threshold
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.fallback_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, normalized):
+        return f"{self.key_prefix}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, query):
+        """
+        Return (answer dict, similarity) for a cached match, with similarity
+        1.0 for an exact match, or (None, None).
+        """
+        answer, similarity = self._lookup(query, self.similarity_threshold)
+        if answer is None:
+            self._count('misses')
+        else:
+            self._count('exact_hits' if similarity == 1.0 else 'similar_hits')
+        return answer, similarity
+
+    def closest(self, query, threshold):
+        """
+        Like get(), with a threshold of the caller's choosing: used for a
+        fallback answer when a new one cannot be generated.
+        """
+        answer, similarity = self._lookup(query, threshold)
+        if answer is not None:
+            self._count('fallback_hits')
+        return answer, similarity
+
+    def _lookup(self, query, threshold):
+        normalized = normalize_query(query)
+        if not normalized:
+            return None, None
+        answer = self.backend.get(self.make_key(normalized))
+        if answer is not None:
+            return answer, 1.0
+
+        if self.index is not None and threshold:
+            match, score = self.index.best_match(normalized)
+            if match is not None and score >= threshold:
+                answer = self.backend.get(self.make_key(match))
+                if answer is not None:
+                    return answer, score
+                # Evicted or expired in the backend
+                self.index.discard(match)
+        return None, None
+
+    def set(self, query, answer):
+        normalized = normalize_query(query)
+        if not normalized:
+            return
+        self.backend.set(self.make_key(normalized), answer)
+        if self.index is not None:
+            self.index.add(normalized)
+
+    def stats(self):
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        hits = self.exact_hits + self.similar_hits
+        return {
+            'exact_hits': self.exact_hits,
+            'similar_hits': self.similar_hits,
+            'fallback_hits': self.fallback_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'indexed_questions': len(self.index) if self.index is not None else None,
+        }
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """
+    Return the process-wide AnswerCache, or None when disabled.
+    """
+    global _answer_cache
+    from django.conf import settings
+
+    if settings.CHATBOT_CACHE_BACKEND == 'none':
+        return None
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                if settings.CHATBOT_CACHE_BACKEND == 'django':
+                    backend = DjangoCacheBackend(
+                        alias=settings.CHATBOT_CACHE_ALIAS,
+                        ttl=settings.CHATBOT_CACHE_TTL,
+                    )
+                else:
+                    backend = LRUBackend(
+                        max_entries=settings.CHATBOT_CACHE_MAX_ENTRIES,
+                        ttl=settings.CHATBOT_CACHE_TTL,
+                    )
+                index = None
+                if settings.CHATBOT_CACHE_SIMILARITY or settings.CHATBOT_FALLBACK_SIMILARITY:
+                    index = SimilarityIndex(
+                        max_entries=settings.CHATBOT_CACHE_MAX_ENTRIES,
+                        ttl=settings.CHATBOT_CACHE_TTL,
+                    )
+                _answer_cache = AnswerCache(
+                    backend, index=index, similarity_threshold=settings.CHATBOT_CACHE_SIMILARITY,
+                )
+    return _answer_cache
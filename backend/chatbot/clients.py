@@ -0,0 +1,294 @@
+#  backend/chatbot/clients.py
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from monitoring.metrics import span
+
+
+class CircuitOpen(Exception):
+    """
+    The upstream has been failing and is not being called for now.
+    """
+
+
+def is_transient(exc):
+    """
+    Whether a failed call is worth retrying and counts against the circuit:
+    connection errors, timeouts, 429 and 5xx. Other 4xx responses mean the
+    upstream is up and the request itself is wrong.
+    """
+    response = getattr(exc, 'response', None)
+    status = getattr(exc, 'status_code', None) or getattr(response, 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout, httpx.TransportError, OSError))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures, so calls
+    fail fast. After `reset_timeout` seconds one trial call is let through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            # Open long enough, or a half-open trial that never reported back
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class LatencyStats:
+    """
+    Call counters and the latencies of the most recent calls.
+    """
+
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.short_circuits = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            self._latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        percentiles = {}
+        for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            percentiles[f'{name}_ms'] = (
+                round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else None
+            )
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'retries': self.retries,
+            'short_circuits': self.short_circuits,
+            **percentiles,
+        }
+
+
+class Upstream:
+    """
+    One external service: its retry policy, circuit breaker and latency
+    stats. `call` and `acall` run a request function through all three.
+    Streamed calls are timed up to their first event.
+    """
+
+    def __init__(self, name, retries=2, backoff=0.3, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = LatencyStats()
+
+    def delay(self, attempt):
+        # Exponential backoff with full jitter, so retries from many workers
+        # do not arrive at the recovering upstream together
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def _before(self):
+        if not self.breaker.allow():
+            self.stats.add('short_circuits')
+            raise CircuitOpen(f"{self.name} is unavailable")
+
+    def _after_failure(self, exc, attempt, started):
+        """
+        Decide whether to retry; record the outcome when not.
+        """
+        transient = is_transient(exc)
+        if transient and attempt < self.retries:
+            self.stats.add('retries')
+            return True
+        if transient:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self.stats.record(time.perf_counter() - started, ok=False)
+        return False
+
+    def _after_success(self, started):
+        self.breaker.record_success()
+        self.stats.record(time.perf_counter() - started, ok=True)
+
+    def call(self, fn):
+        self._before()
+        started = time.perf_counter()
+        with span(self.name):
+            for attempt in range(self.retries + 1):
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not self._after_failure(e, attempt, started):
+                        raise
+                    time.sleep(self.delay(attempt))
+                else:
+                    self._after_success(started)
+                    return result
+
+    async def acall(self, fn):
+        self._before()
+        started = time.perf_counter()
+        with span(self.name):
+            for attempt in range(self.retries + 1):
+                try:
+                    result = await fn()
+                except Exception as e:
+                    if not self._after_failure(e, attempt, started):
+                        raise
+                    await asyncio.sleep(self.delay(attempt))
+                else:
+                    self._after_success(started)
+                    return result
+
+    def describe(self):
+        return {'state': self.breaker.state, **self.stats.snapshot()}
+
+
+def _timeout():
+    return httpx.Timeout(settings.CHATBOT_HTTP_READ_TIMEOUT, connect=settings.CHATBOT_HTTP_CONNECT_TIMEOUT)
+
+
+def _limits():
+    size = settings.CHATBOT_HTTP_POOL_SIZE
+    return httpx.Limits(max_connections=size, max_keepalive_connections=size)
+
+
+_upstreams = {}
+_session = None
+_cohere_clients = {}
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_upstream(name):
+    """
+    The process-wide Upstream for 'serper' or 'cohere'.
+    """
+    with _lock:
+        if name not in _upstreams:
+            _upstreams[name] = Upstream(
+                name,
+                retries=settings.CHATBOT_HTTP_RETRIES,
+                backoff=settings.CHATBOT_HTTP_BACKOFF,
+                failure_threshold=settings.CHATBOT_BREAKER_FAILURES,
+                reset_timeout=settings.CHATBOT_BREAKER_RESET,
+            )
+        return _upstreams[name]
+
+
+def upstream_stats():
+    with _lock:
+        return {name: upstream.describe() for name, upstream in _upstreams.items()}
+
+
+def request_timeout():
+    """
+    (connect, read) timeout for calls through get_session().
+    """
+    return settings.CHATBOT_HTTP_CONNECT_TIMEOUT, settings.CHATBOT_HTTP_READ_TIMEOUT
+
+
+def get_session():
+    """
+    A process-wide requests.Session with a keep-alive pool. Retries are left
+    to Upstream so they are counted and bounded by the circuit breaker.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=settings.CHATBOT_HTTP_POOL_SIZE, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def get_cohere_client(api_key):
+    """
+    A process-wide cohere.Client per API key over a pooled httpx.Client.
+    The SDK is imported on first use, so this module loads without it.
+    """
+    with _lock:
+        client = _cohere_clients.get(api_key)
+        if client is None:
+            import cohere
+            client = cohere.Client(
+                api_key,
+                base_url=settings.CHATBOT_COHERE_BASE_URL or None,
+                max_retries=0,
+                httpx_client=httpx.Client(timeout=_timeout(), limits=_limits()),
+            )
+            _cohere_clients[api_key] = client
+        return client
+
+
+def get_async_http():
+    """
+    An httpx.AsyncClient shared by everything on the running event loop
+    (under ASGI, one loop per worker process). Clients cannot be shared
+    across loops, so each loop gets its own.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(timeout=_timeout(), limits=_limits())
+        _async_clients[loop] = client
+    return client
+
+
+def get_async_cohere_client(api_key):
+    import cohere
+    return cohere.AsyncClient(
+        api_key,
+        base_url=settings.CHATBOT_COHERE_BASE_URL or None,
+        max_retries=0,
+        httpx_client=get_async_http(),
+    )
@@ -0,0 +1,29 @@
+#  backend/chatbot/management/commands/compact_chat_history.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.retention import compact_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete old chat history, drop old messages' stored search results and delete search "
+        "results no message uses any more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHAT_HISTORY_RETENTION_DAYS,
+                            help="Delete messages older than this many days (0 keeps them all).")
+        parser.add_argument('--search-days', type=int, default=settings.CHAT_SEARCH_RETENTION_DAYS,
+                            help="Drop search results of messages older than this many days (0 keeps them).")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows changed per transaction.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['search_days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--days and --search-days must be 0 or more, --batch-size at least 1")
+        counts = compact_history(options['days'], options['search_days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {counts['messages_deleted']} message(s), dropped search results from "
+            f"{counts['messages_stripped']} and deleted {counts['payloads_deleted']} unused search result(s)."
+        ))
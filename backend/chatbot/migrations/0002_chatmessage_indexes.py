@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chatmessage",
+            index=models.Index(
+                fields=["user", "created_at"], name="chatmessage_user_created_idx"
+            ),
+        ),
+        # The composite index above covers lookups by this column; drop the
+        # FK's own index only once it exists
+        migrations.AlterField(
+            model_name="chatmessage",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="chat_messages",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot", "0002_chatmessage_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatmessage",
+            name="cache_hit",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="cache_similarity",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:15
+
+import hashlib
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def move_search_results(apps, schema_editor):
+    ChatMessage = apps.get_model("chatbot", "ChatMessage")
+    SearchPayload = apps.get_model("chatbot", "SearchPayload")
+    messages = ChatMessage.objects.filter(search_results__isnull=False).values_list("id", "search_results")
+    batch = []
+    for row in messages.iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            store_batch(ChatMessage, SearchPayload, batch)
+            batch = []
+    store_batch(ChatMessage, SearchPayload, batch)
+
+
+def store_batch(ChatMessage, SearchPayload, batch):
+    # As SearchPayloadManager.store, a batch at a time
+    digests, payloads = {}, {}
+    for message_id, data in batch:
+        raw = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        digest = digests[message_id] = hashlib.sha256(raw).hexdigest()
+        payloads.setdefault(digest, zlib.compress(raw))
+    SearchPayload.objects.bulk_create(
+        [SearchPayload(digest=digest, data=data) for digest, data in payloads.items()], ignore_conflicts=True
+    )
+    ids = dict(SearchPayload.objects.filter(digest__in=payloads).values_list("digest", "id"))
+    ChatMessage.objects.bulk_update(
+        [ChatMessage(id=message_id, search_payload_id=ids[digest]) for message_id, digest in digests.items()],
+        ["search_payload"],
+    )
+
+
+def restore_search_results(apps, schema_editor):
+    ChatMessage = apps.get_model("chatbot", "ChatMessage")
+    SearchPayload = apps.get_model("chatbot", "SearchPayload")
+    for payload in SearchPayload.objects.iterator(chunk_size=BATCH_SIZE):
+        ChatMessage.objects.filter(search_payload=payload).update(
+            search_results=json.loads(zlib.decompress(payload.data))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot", "0003_chatmessage_cache_hit"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchPayload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=64, unique=True)),
+                ("data", models.BinaryField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="search_payload",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="messages",
+                to="chatbot.searchpayload",
+            ),
+        ),
+        migrations.RunPython(move_search_results, restore_search_results),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot", "0004_search_payload"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="chatmessage",
+            name="search_results",
+        ),
+    ]
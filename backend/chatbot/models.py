@@ -1,16 +1,77 @@
+import hashlib
+import json
+import zlib
+
 from django.db import models
 from django.conf import settings
 
+
+def encode_payload(data):
+    """
+    (sha256 hex digest, zlib-compressed bytes) of `data` as canonical JSON,
+    so equal payloads get the same digest whatever their key order.
+    """
+    raw = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(raw).hexdigest(), zlib.compress(raw)
+
+
+class SearchPayloadManager(models.Manager):
+    def store(self, data):
+        """
+        The stored payload equal to `data`, created if new; None for None.
+        """
+        if data is None:
+            return None
+        digest, compressed = encode_payload(data)
+        return self.get_or_create(digest=digest, defaults={'data': compressed})[0]
+
+
+class SearchPayload(models.Model):
+    """
+    A raw Serper response, compressed and stored once however many
+    messages were answered from it.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SearchPayloadManager()
+
+    @property
+    def content(self):
+        return json.loads(zlib.decompress(self.data))
+
+    def __str__(self):
+        return self.digest
+
+
 class ChatMessage(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="chat_messages")
+    # Indexed through chatmessage_user_created_idx below
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="chat_messages", db_index=False
+    )
     query = models.TextField()
-    search_results = models.JSONField(null=True, blank=True)  # Store Serper results
+    # Serper results, kept apart so history rows stay small; see search_results
+    search_payload = models.ForeignKey(
+        SearchPayload, null=True, blank=True, on_delete=models.SET_NULL, related_name="messages"
+    )
     search_urls = models.JSONField(null=True, blank=True)  # Store URLs as list
     response = models.TextField()
+    # Answered from the answer cache; similarity 1.0 is an exact match
+    cache_hit = models.BooleanField(default=False)
+    cache_similarity = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A user's conversation in order
+            models.Index(fields=['user', 'created_at'], name='chatmessage_user_created_idx'),
+        ]
+
+    @property
+    def search_results(self):
+        return self.search_payload.content if self.search_payload_id else None
 
     def __str__(self):
-        return f"{self.user.username}: {self.query[:50]}..."
\ No newline at end of file
+        return f"{self.user.username}: {self.query[:50]}..."
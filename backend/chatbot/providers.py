@@ -0,0 +1,227 @@
+#  backend/chatbot/providers.py
+
+import asyncio
+import os
+import logging
+
+import httpx
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .clients import (
+    CircuitOpen,
+    get_async_cohere_client,
+    get_async_http,
+    get_cohere_client,
+    get_session,
+    get_upstream,
+    request_timeout,
+)
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_MESSAGE = "The assistant is temporarily unavailable. Please try again in a few minutes."
+
+PREAMBLE = """
+                ## Task and Context
+                You are an AI assistant specialized in providing accurate and helpful information on malaria treatment and protection. Use the provided search results as context to answer user queries. Include relevant details about malaria prevention (e.g., insecticide-treated nets, chemoprevention), treatment (e.g., artemisinin-based therapies), and risks (e.g., severe symptoms in children, pregnant women). If search results are insufficient, rely on your knowledge but prioritize factual accuracy. Provide concise, professional, and friendly responses.
+
+                ## Style Guide
+                Use clear language, avoid jargon, and explain medical terms simply. Cite search results by referencing their URLs when applicable.
+                """
+
+
+def search_payload(query):
+    return {"q": f"{query} malaria treatment and protection"}
+
+
+def chat_documents(organic_results):
+    """
+    Serper's organic results in the shape Cohere's `documents` expects.
+    """
+    return [
+        {
+            "title": item.get("title", ""),
+            "snippet": item.get("snippet", ""),
+            "url": item.get("link", "")
+        }
+        for item in organic_results
+    ]
+
+
+class ProviderError(Exception):
+    """
+    The answer could not be generated; the message is shown to the user.
+    """
+
+
+def _serper_headers():
+    serper_api_key = os.getenv('SERPER_API_KEY')
+    if not serper_api_key:
+        logger.warning("Serper API key is missing.")
+        return None
+    return {"X-API-KEY": serper_api_key, "Content-Type": "application/json"}
+
+
+def _cohere_api_key():
+    cohere_api_key = os.getenv('COHERE_API_KEY')
+    if not cohere_api_key:
+        logger.warning("Cohere API key is missing.")
+        raise ProviderError("Cohere API key is missing. Please contact the administrator.")
+    return cohere_api_key
+
+
+def search_web(query):
+    """
+    Serper results for a question: (raw results or None, up to five
+    organic results). Failures are logged and leave the answer without
+    sources rather than failing it.
+    """
+    headers = _serper_headers()
+    if headers is None:
+        return None, []
+
+    def post():
+        response = get_session().post(
+            settings.CHATBOT_SERPER_URL, json=search_payload(query), headers=headers, timeout=request_timeout(),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        search_results = get_upstream('serper').call(post)
+    except (requests.RequestException, ValueError, CircuitOpen) as e:
+        logger.error(f"Serper API call failed: {str(e)}")
+        return None, []
+    return search_results, search_results.get("organic", [])[:5]
+
+
+def generate_reply(query, organic_results):
+    """
+    Cohere's answer to a question grounded on the search results. Raises
+    ProviderError when there is none.
+    """
+    co = get_cohere_client(_cohere_api_key())
+    try:
+        cohere_response = get_upstream('cohere').call(lambda: co.chat(
+            message=query,
+            preamble=PREAMBLE,
+            documents=chat_documents(organic_results),
+            max_tokens=400
+        ))
+    except CircuitOpen as e:
+        logger.warning(f"Cohere chat skipped: {str(e)}")
+        raise ProviderError(UNAVAILABLE_MESSAGE) from e
+    except Exception as e:
+        logger.error(f"Cohere chat error: {str(e)}")
+        raise ProviderError(f"Error generating response: {str(e)}") from e
+    return cohere_response.text
+
+
+class ChatProvider:
+    """
+    Web search plus streamed answer generation for the chatbot. Subclasses
+    implement both coroutines; CHATBOT_PROVIDER picks the one in use.
+    """
+
+    async def search(self, query):
+        """
+        Return (raw search results or None, up to five organic results).
+        """
+        raise NotImplementedError
+
+    def stream_answer(self, query, organic_results):
+        """
+        Async iterator of answer text chunks as they are generated. Raises
+        ProviderError when no answer can be produced.
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+class SerperCohereProvider(ChatProvider):
+    """
+    Serper web search and Cohere's streaming chat API over the event loop's
+    shared HTTP client, with the same retries and circuit breakers as the
+    synchronous calls.
+    """
+
+    async def search(self, query):
+        headers = _serper_headers()
+        if headers is None:
+            return None, []
+
+        async def post():
+            response = await get_async_http().post(
+                settings.CHATBOT_SERPER_URL, json=search_payload(query), headers=headers,
+            )
+            response.raise_for_status()
+            return response.json()
+
+        try:
+            search_results = await get_upstream('serper').acall(post)
+        except (httpx.HTTPError, ValueError, CircuitOpen) as e:
+            logger.error(f"Serper API call failed: {str(e)}")
+            return None, []
+        return search_results, search_results.get("organic", [])[:5]
+
+    async def stream_answer(self, query, organic_results):
+        co = get_async_cohere_client(_cohere_api_key())
+
+        async def open_stream():
+            # Retried as a whole until the first event arrives; after that a
+            # failure ends the answer where it is
+            events = co.chat_stream(
+                message=query,
+                preamble=PREAMBLE,
+                documents=chat_documents(organic_results),
+                max_tokens=400,
+            ).__aiter__()
+            return events, await anext(events, None)
+
+        try:
+            events, event = await get_upstream('cohere').acall(open_stream)
+            while event is not None:
+                if event.event_type == 'text-generation':
+                    yield event.text
+                event = await anext(events, None)
+        except CircuitOpen as e:
+            logger.warning(f"Cohere chat skipped: {str(e)}")
+            raise ProviderError(UNAVAILABLE_MESSAGE) from e
+        except Exception as e:
+            logger.error(f"Cohere chat error: {str(e)}")
+            raise ProviderError(f"Error generating response: {str(e)}") from e
+
+
+class FakeChatProvider(ChatProvider):
+    """
+    Canned answer streamed word by word, for tests and for working on the
+    chat UI without API keys.
+    """
+
+    answer = (
+        "Sleep under an insecticide-treated net every night, and see a health worker "
+        "within a day if you develop a fever."
+    )
+    urls = ["https://www.who.int/news-room/fact-sheets/detail/malaria"]
+    delay = 0.0   # seconds between chunks
+
+    async def search(self, query):
+        organic = [{"title": "Malaria", "link": url, "snippet": ""} for url in self.urls]
+        return {"organic": organic}, organic
+
+    async def stream_answer(self, query, organic_results):
+        for i, word in enumerate(self.answer.split(' ')):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield word if i == 0 else f' {word}'
+
+
+def get_provider():
+    """
+    A new provider instance of the class named by CHATBOT_PROVIDER.
+    """
+    return import_string(settings.CHATBOT_PROVIDER)()
@@ -0,0 +1,51 @@
+#  backend/chatbot/retention.py
+
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ChatMessage, SearchPayload
+
+
+def in_batches(queryset, batch_size):
+    """
+    Yield querysets of up to `batch_size` rows of `queryset` by primary
+    key, until it is empty. Each batch must take its rows out of
+    `queryset`, or this never ends. Batches keep the conditions of
+    `queryset`, so a row that stopped matching after its id was read is
+    left alone.
+    """
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield queryset.filter(pk__in=ids)
+
+
+def compact_history(history_days, search_days, batch_size=5000):
+    """
+    Delete chat messages older than `history_days`, drop the stored search
+    results of messages older than `search_days` (their answer and source
+    URLs stay), then delete search payloads no message uses. 0 days keeps
+    everything. Works in batches of `batch_size` rows, each its own short
+    transaction, so the tables stay writable and freed space is reused.
+    Returns how many messages were deleted and stripped and how many
+    payloads deleted.
+    """
+    now = timezone.now()
+    counts = {'messages_deleted': 0, 'messages_stripped': 0, 'payloads_deleted': 0}
+    if history_days:
+        old = ChatMessage.objects.filter(created_at__lt=now - timedelta(days=history_days))
+        for batch in in_batches(old, batch_size):
+            counts['messages_deleted'] += batch.delete()[1].get(ChatMessage._meta.label, 0)
+    if search_days:
+        old = ChatMessage.objects.filter(
+            created_at__lt=now - timedelta(days=search_days), search_payload__isnull=False
+        )
+        for batch in in_batches(old, batch_size):
+            counts['messages_stripped'] += batch.update(search_payload=None)
+    unused = SearchPayload.objects.filter(~Exists(ChatMessage.objects.filter(search_payload=OuterRef('pk'))))
+    for batch in in_batches(unused, batch_size):
+        counts['payloads_deleted'] += batch.delete()[1].get(SearchPayload._meta.label, 0)
+    return counts
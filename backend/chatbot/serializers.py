@@ -2,7 +2,15 @@ from rest_framework import serializers
 from .models import ChatMessage
 
 class ChatMessageSerializer(serializers.ModelSerializer):
+    search_results = serializers.JSONField(read_only=True)
+
     class Meta:
         model = ChatMessage
-        fields = ['id', 'query', 'response', 'search_results', 'search_urls', 'created_at']
-        read_only_fields = ['id', 'response', 'search_results', 'search_urls', 'created_at']
\ No newline at end of file
+        fields = ['id', 'query', 'response', 'search_results', 'search_urls', 'cache_hit', 'cache_similarity',
+                  'created_at']
+        read_only_fields = ['id', 'response', 'search_urls', 'cache_hit', 'cache_similarity', 'created_at']
+
+class ChatMessageListSerializer(ChatMessageSerializer):
+    # History pages leave out the raw search results unless ?include=search_results
+    class Meta(ChatMessageSerializer.Meta):
+        fields = ['id', 'query', 'response', 'search_urls', 'cache_hit', 'cache_similarity', 'created_at']
@@ -1,3 +1,313 @@
-from django.test import TestCase
+import json
+import os
+import threading
+from datetime import timedelta
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db.models import Exists, OuterRef
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import CustomUser
+from malaria_api.caching import LRUBackend
+from tests.utils import QueryPlanTestCase, postgres_only, seed_clinic
+from . import cache, clients
+from .cache import AnswerCache, SimilarityIndex
+from .models import ChatMessage, SearchPayload
+from .providers import FakeChatProvider
+from .retention import in_batches
+from .views import ChatMessageViewSet
+
+
+class ChatMessageQueryTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_clinic()[0]
+
+    def test_history_pages_cost_one_query(self):
+        response, queries = self.capture('/api/chatbot/messages/?page_size=60', self.user)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(response.data['results']), 60)
+        self.assertNotIn('search_results', response.data['results'][0])
+        self.assertNotIn('chatbot_searchpayload', queries[0])
+
+        response, queries = self.capture(response.data['next'], self.user)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(response.data['results']), 40)
+
+        response, queries = self.capture('/api/chatbot/messages/?include=search_results', self.user)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('search_results', response.data['results'][0])
+
+    @postgres_only
+    def test_history_uses_user_index(self):
+        _, queries = self.capture('/api/chatbot/messages/', self.user)
+        self.assertIndexScans(queries, 'chatbot_chatmessage', 'chatmessage_user_created_idx')
+
+
+class AnswerCacheTests(SimpleTestCase):
+    def make_cache(self, threshold=0.8, ttl=60):
+        return AnswerCache(LRUBackend(ttl=ttl), index=SimilarityIndex(ttl=ttl), similarity_threshold=threshold)
+
+    def test_exact_match_ignores_case_and_punctuation(self):
+        answers = self.make_cache(threshold=0)
+        answers.set('How to use bed nets?', {'response': 'Tuck them in.'})
+        self.assertEqual(answers.get('how to use  BED nets'), ({'response': 'Tuck them in.'}, 1.0))
+        self.assertEqual(answers.get('how to wash bed nets'), (None, None))
+        self.assertEqual(answers.stats()['hit_rate'], 0.5)
+
+    def test_near_duplicates_match_above_threshold(self):
+        answers = self.make_cache()
+        for question in ('how to use bed nets', 'artemisinin dosage for adults', 'is malaria contagious',
+                         'what are the symptoms of malaria', 'how to prevent malaria in pregnancy',
+                         'when to see a doctor for fever'):
+            answers.set(question, {'response': question})
+        answer, similarity = answers.get('How do I use bed nets?')
+        self.assertEqual(answer, {'response': 'how to use bed nets'})
+        self.assertLess(similarity, 1.0)
+        self.assertEqual(answers.get('artemisinin dosage for kids'), (None, None))
+        self.assertEqual(answers.get('is dengue contagious'), (None, None))
+
+    def test_expired_entries_miss(self):
+        answers = self.make_cache(ttl=60)
+        answers.set('artemisinin dosage', {'response': 'dose'})
+        with mock.patch('time.monotonic', return_value=10 ** 9):
+            self.assertEqual(answers.get('artemisinin dosage'), (None, None))
+            self.assertEqual(answers.get('artemisinin dosages'), (None, None))
+
+
+@override_settings(CHATBOT_CACHE_BACKEND='lru', CHATBOT_CACHE_SIMILARITY=0)
+class ChatMessageCacheTests(APITestCase):
+    def setUp(self):
+        cache._answer_cache = None
+        self.addCleanup(setattr, cache, '_answer_cache', None)
+        self.client.force_authenticate(CustomUser.objects.create_user('health-worker', 'hw@example.org', 'pw'))
+
+    def test_repeated_question_skips_search_and_llm(self):
+        answer = {'search_results': None, 'search_urls': [], 'response': 'Sleep under a treated net.'}
+        with mock.patch.object(ChatMessageViewSet, 'generate_answer', return_value=answer) as generate:
+            first = self.client.post('/api/chatbot/messages/', {'query': 'How to use bed nets?'})
+            second = self.client.post('/api/chatbot/messages/', {'query': 'how to use bed nets'})
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual((first.data['cache_hit'], second.data['cache_hit']), (False, True))
+        self.assertEqual(second.data['cache_similarity'], 1.0)
+        self.assertEqual(second.data['response'], 'Sleep under a treated net.')
+
+    def test_search_results_are_stored_once(self):
+        results = {'organic': [{'link': 'https://www.who.int/', 'snippet': 'Malaria ' * 500}]}
+        answer = {'search_results': results, 'search_urls': ['https://www.who.int/'], 'response': 'Use a net.'}
+        with mock.patch.object(ChatMessageViewSet, 'generate_answer', return_value=answer):
+            first = self.client.post('/api/chatbot/messages/', {'query': 'How to use bed nets?'})
+            self.client.post('/api/chatbot/messages/', {'query': 'how to use bed nets'})
+        self.assertEqual(first.data['search_results'], results)
+        payload = SearchPayload.objects.get()
+        self.assertEqual(payload.messages.count(), 2)
+        self.assertLess(len(payload.data), len(json.dumps(results)) / 10)
+        self.assertEqual(self.client.get(f"/api/chatbot/messages/{first.data['id']}/").data['search_results'],
+                         results)
+
+
+class CompactHistoryTests(TestCase):
+    def test_deletes_old_messages_and_unused_search_results(self):
+        user = CustomUser.objects.create_user('health-worker', 'hw@example.org', 'pw')
+        now = timezone.now()
+        shared, recent = SearchPayload.objects.store({'q': 'nets'}), SearchPayload.objects.store({'q': 'fever'})
+        for age, payload in ((400, shared), (100, shared), (40, recent), (1, recent)):
+            message = ChatMessage.objects.create(user=user, query='q', response='a', search_payload=payload)
+            ChatMessage.objects.filter(pk=message.pk).update(created_at=now - timedelta(days=age))
+
+        out = StringIO()
+        call_command('compact_chat_history', '--days=365', '--search-days=30', '--batch-size=1', stdout=out)
+        self.assertIn('Deleted 1 message(s), dropped search results from 2 and deleted 1', out.getvalue())
+        self.assertEqual(
+            list(ChatMessage.objects.order_by('created_at').values_list('search_payload', flat=True)),
+            [None, None, recent.pk],
+        )
+        self.assertEqual(list(SearchPayload.objects.all()), [recent])
+
+    def test_payload_reused_during_a_batch_is_kept(self):
+        user = CustomUser.objects.create_user('health-worker', 'hw@example.org', 'pw')
+        payload = SearchPayload.objects.store({'q': 'nets'})
+        unused = SearchPayload.objects.filter(~Exists(ChatMessage.objects.filter(search_payload=OuterRef('pk'))))
+        batch = next(in_batches(unused, 10))
+        # A new message is answered from the payload after its id was read
+        message = ChatMessage.objects.create(user=user, query='q', response='a', search_payload=payload)
+        self.assertEqual(batch.delete()[0], 0)
+        message.refresh_from_db()
+        self.assertEqual(message.search_payload, payload)
+
+
+@override_settings(CHATBOT_PROVIDER='chatbot.providers.FakeChatProvider', CHATBOT_CACHE_BACKEND='lru',
+                   CHATBOT_CACHE_SIMILARITY=0)
+class ChatStreamTests(TestCase):
+    def setUp(self):
+        cache._answer_cache = None
+        self.addCleanup(setattr, cache, '_answer_cache', None)
+        user = CustomUser.objects.create_user('health-worker', 'hw@example.org', 'pw')
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    async def stream(self, query, headers=None):
+        response = await self.async_client.post(
+            '/api/chatbot/stream/', {'query': query}, content_type='application/json',
+            headers=self.auth if headers is None else headers,
+        )
+        if not response.streaming:
+            return response, []
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        events = []
+        for block in body.strip().split('\n\n'):
+            name, data = block.split('\n')
+            events.append((name.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return response, events
+
+    async def test_streams_tokens_then_saves_message(self):
+        response, events = await self.stream('How do I use a bed net?')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        names = [name for name, _ in events]
+        self.assertEqual((names[0], names[-1]), ('meta', 'done'))
+        self.assertGreater(names.count('token'), 1)
+        answer = ''.join(data['text'] for name, data in events if name == 'token')
+        self.assertEqual(answer, FakeChatProvider.answer)
+
+        message = await ChatMessage.objects.aget(pk=events[-1][1]['id'])
+        self.assertEqual(message.response, FakeChatProvider.answer)
+        self.assertEqual(message.search_urls, FakeChatProvider.urls)
+
+        _, events = await self.stream('how do I use a bed net')
+        self.assertEqual(events[0], ('meta', {'search_urls': FakeChatProvider.urls, 'cache_hit': True}))
+        self.assertTrue(events[-1][1]['cache_hit'])
+        cached = await ChatMessage.objects.aget(pk=events[-1][1]['id'])
+        self.assertEqual(cached.search_payload_id, message.search_payload_id)
+        self.assertEqual(events[-1][1]['search_results'], {'organic': [
+            {'title': 'Malaria', 'link': url, 'snippet': ''} for url in FakeChatProvider.urls
+        ]})
+
+    async def test_rejects_anonymous_and_empty_queries(self):
+        response, _ = await self.stream('malaria', headers={})
+        self.assertEqual(response.status_code, 401)
+        response, _ = await self.stream('  ')
+        self.assertEqual(response.status_code, 400)
+
+
+class StubUpstreamHandler(BaseHTTPRequestHandler):
+    """
+    Serper at /search and Cohere at /v1/chat. Each path answers with the
+    next status queued for it, then 200.
+    """
+    protocol_version = 'HTTP/1.1'   # keep-alive, so connection reuse shows
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests.append(self.path)
+            server.client_ports.add(self.client_address[1])
+            statuses = server.statuses.get(self.path, [])
+            status = statuses.pop(0) if statuses else 200
+        if status != 200:
+            payload, content_type = b'{"message": "unavailable"}', 'application/json'
+        elif self.path == '/search':
+            organic = [{'title': 'Bed nets', 'link': 'https://example.org/nets', 'snippet': 'Use them nightly.'}]
+            payload, content_type = json.dumps({'organic': organic}).encode(), 'application/json'
+        elif body.get('stream'):
+            events = [{'event_type': 'stream-start', 'generation_id': 'g'}]
+            events += [{'event_type': 'text-generation', 'text': text} for text in ('Use ', 'a ', 'net.')]
+            events.append({'event_type': 'stream-end', 'finish_reason': 'COMPLETE'})
+            payload = '\n'.join(json.dumps(event) for event in events).encode()
+            content_type = 'application/stream+json'
+        else:
+            payload, content_type = json.dumps({'text': 'Use a net.', 'generation_id': 'g'}).encode(), 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class ProviderClientTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubUpstreamHandler)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests, self.server.client_ports, self.server.statuses = [], set(), {}
+        overrides = override_settings(
+            CHATBOT_SERPER_URL=f'{self.url}/search', CHATBOT_COHERE_BASE_URL=self.url,
+            CHATBOT_CACHE_BACKEND='lru', CHATBOT_CACHE_SIMILARITY=0, CHATBOT_FALLBACK_SIMILARITY=0.6,
+            CHATBOT_HTTP_RETRIES=1, CHATBOT_HTTP_BACKOFF=0, CHATBOT_BREAKER_FAILURES=1, CHATBOT_BREAKER_RESET=60,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        environ = mock.patch.dict(os.environ, {'SERPER_API_KEY': 'serper', 'COHERE_API_KEY': 'cohere'})
+        environ.start()
+        self.addCleanup(environ.stop)
+        for state in (clients._upstreams, clients._cohere_clients):
+            state.clear()
+        clients._session = cache._answer_cache = None
+        self.client.force_authenticate(CustomUser.objects.create_user('health-worker', 'hw@example.org', 'pw'))
+
+    def ask(self, query):
+        response = self.client.post('/api/chatbot/messages/', {'query': query})
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_retries_transient_failures_on_pooled_connections(self):
+        self.server.statuses = {'/search': [503], '/v1/chat': [502]}
+        message = self.ask('How do I use a bed net?')
+        self.assertEqual(message['response'], 'Use a net.')
+        self.assertEqual(message['search_urls'], ['https://example.org/nets'])
+        self.assertEqual(self.server.requests, ['/search', '/search', '/v1/chat', '/v1/chat'])
+
+        self.ask('Can children sleep under treated nets?')
+        stats = clients.upstream_stats()
+        self.assertEqual((stats['serper']['retries'], stats['cohere']['retries']), (1, 1))
+        # One keep-alive connection per upstream across both questions
+        self.assertEqual(len(self.server.client_ports), 2)
+
+    def test_open_circuit_fails_fast_to_cached_answer(self):
+        self.ask('How to use bed nets')
+        self.server.statuses = {'/v1/chat': [503, 503]}
+
+        with self.assertLogs('chatbot.providers', 'WARNING'):
+            message = self.ask('How do I use bed nets?')
+        self.assertTrue(message['cache_hit'])
+        self.assertEqual(message['response'], 'Use a net.')
+        self.assertEqual(clients.upstream_stats()['cohere']['state'], 'open')
+
+        calls = self.server.requests.count('/v1/chat')
+        with self.assertLogs('chatbot.providers', 'WARNING'):
+            message = self.ask('What are the symptoms of malaria?')
+        self.assertEqual(self.server.requests.count('/v1/chat'), calls)
+        self.assertFalse(message['cache_hit'])
+        self.assertIn('temporarily unavailable', message['response'])
+
+    async def test_streams_from_cohere(self):
+        token = AccessToken.for_user(await CustomUser.objects.aget(username='health-worker'))
+        response = await self.async_client.post(
+            '/api/chatbot/stream/', {'query': 'How do I use a bed net?'}, content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        tokens = [json.loads(line.removeprefix('data: '))['text'] for line in body.splitlines()
+                  if line.startswith('data: ') and '"text"' in line]
+        self.assertEqual(tokens, ['Use ', 'a ', 'net.'])
+        self.assertIn('https://example.org/nets', body)
@@ -2,11 +2,14 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ChatMessageViewSet
+from .views import ChatbotCacheStatsView, ChatbotUpstreamStatsView, ChatMessageViewSet, stream_chat_message
 
 router = DefaultRouter()
 router.register(r'messages', ChatMessageViewSet, basename='chat-message')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('stream/', stream_chat_message, name='chat-stream'),
+    path('cache/stats/', ChatbotCacheStatsView.as_view(), name='chatbot-cache-stats'),
+    path('upstreams/stats/', ChatbotUpstreamStatsView.as_view(), name='chatbot-upstream-stats'),
 ]
\ No newline at end of file
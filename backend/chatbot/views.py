@@ -1,13 +1,29 @@
-import os
+import json
 import logging
-import requests
-import cohere
+from datetime import timedelta
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from .models import ChatMessage
-from .serializers import ChatMessageSerializer
+from rest_framework.views import APIView
+
+from accounts.authentication import CachedJWTAuthentication
+from malaria_api.pagination import CreatedAtCursorPagination
+from malaria_api.serializers import query_param_set
+from .cache import get_answer_cache
+from .clients import upstream_stats
+from .models import ChatMessage, SearchPayload
+from .providers import ProviderError, generate_reply, get_provider, search_web
+from .serializers import ChatMessageListSerializer, ChatMessageSerializer
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -16,79 +32,205 @@ class ChatMessageViewSet(viewsets.ModelViewSet):
     queryset = ChatMessage.objects.all()
     serializer_class = ChatMessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def include_search_results(self):
+        return self.action != 'list' or 'search_results' in query_param_set(self.request, 'include')
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).order_by('created_at')
+        queryset = self.queryset.filter(user=self.request.user)
+        # Only read the stored search results when they are going to be serialized
+        if self.include_search_results():
+            queryset = queryset.select_related('search_payload')
+        return queryset
+
+    def get_serializer_class(self):
+        return ChatMessageSerializer if self.include_search_results() else ChatMessageListSerializer
 
     def perform_create(self, serializer):
         query = self.request.data.get('query')
         if not query:
             raise Response({"error": "Query is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # === 1. Serper Search ===
-        serper_api_key = os.getenv('SERPER_API_KEY')
-        search_results = None
-        search_urls = []
-        organic_results = []
-
-        if not serper_api_key:
-            logger.warning("Serper API key is missing.")
-        else:
-            serper_url = "https://google.serper.dev/search"
-            headers = {"X-API-KEY": serper_api_key, "Content-Type": "application/json"}
-            payload = {"q": f"{query} malaria treatment and protection"}
-            try:
-                response = requests.post(serper_url, json=payload, headers=headers)
-                response.raise_for_status()
-                search_results = response.json()
-                organic_results = search_results.get("organic", [])[:5]
-                search_urls = [item.get("link") for item in organic_results if item.get("link")]
-            except requests.RequestException as e:
-                logger.error(f"Serper API call failed: {str(e)}")
-
-        # === 2. Cohere Chat ===
-        cohere_api_key = os.getenv('COHERE_API_KEY')
-        if not cohere_api_key:
-            response_text = "Cohere API key is missing. Please contact the administrator."
-            logger.warning("Cohere API key is missing.")
-        else:
+        # Common questions are answered from the cache without Serper or Cohere
+        answer_cache = get_answer_cache()
+        answer, similarity = answer_cache.get(query) if answer_cache is not None else (None, None)
+        if answer is None:
             try:
-                co = cohere.Client(cohere_api_key)
-
-                preamble = """
-                ## Task and Context
-                You are an AI assistant specialized in providing accurate and helpful information on malaria treatment and protection. Use the provided search results as context to answer user queries. Include relevant details about malaria prevention (e.g., insecticide-treated nets, chemoprevention), treatment (e.g., artemisinin-based therapies), and risks (e.g., severe symptoms in children, pregnant women). If search results are insufficient, rely on your knowledge but prioritize factual accuracy. Provide concise, professional, and friendly responses.
-
-                ## Style Guide
-                Use clear language, avoid jargon, and explain medical terms simply. Cite search results by referencing their URLs when applicable.
-                """
-
-                documents = [
-                    {
-                        "title": item.get("title", ""),
-                        "snippet": item.get("snippet", ""),
-                        "url": item.get("link", "")
-                    }
-                    for item in organic_results
-                ]
-
-                cohere_response = co.chat(
-                    message=query,
-                    preamble=preamble,
-                    documents=documents,
-                    max_tokens=400
-                )
-                response_text = cohere_response.text
-
-            except Exception as e:
-                response_text = f"Error generating response: {str(e)}"
-                logger.error(f"Cohere chat error: {str(e)}")
-
-        # === 3. Save to Database ===
+                answer = self.generate_answer(query)
+            except ProviderError as e:
+                answer, similarity = fallback_answer(query, str(e))
+            else:
+                if answer_cache is not None:
+                    answer_cache.set(query, answer)
+
         serializer.save(
             user=self.request.user,
             query=query,
-            search_results=search_results,
-            search_urls=search_urls,
-            response=response_text
+            cache_hit=similarity is not None,
+            cache_similarity=similarity,
+            **message_fields(answer)
         )
+
+    def generate_answer(self, query):
+        """
+        Search the web and have Cohere answer from the results. Raises
+        ProviderError when Cohere is unconfigured, failing or unavailable.
+        """
+        search_results, organic_results = search_web(query)
+        return {
+            'search_results': search_results,
+            'search_urls': [item.get("link") for item in organic_results if item.get("link")],
+            'response': generate_reply(query, organic_results),
+        }
+
+
+def message_fields(answer):
+    """
+    ChatMessage fields for an answer dict, with its search results stored
+    in (or found among) the shared search payloads.
+    """
+    return {
+        'search_payload': SearchPayload.objects.store(answer['search_results']),
+        'search_urls': answer['search_urls'],
+        'response': answer['response'],
+    }
+
+
+def fallback_answer(query, error):
+    """
+    What to reply when no answer can be generated: the cached answer to the
+    closest question (CHATBOT_FALLBACK_SIMILARITY) and its similarity, or
+    else the error message.
+    """
+    answer_cache = get_answer_cache()
+    if answer_cache is not None and settings.CHATBOT_FALLBACK_SIMILARITY:
+        answer, similarity = answer_cache.closest(query, settings.CHATBOT_FALLBACK_SIMILARITY)
+        if answer is not None:
+            return answer, similarity
+    return {'search_results': None, 'search_urls': [], 'response': error}, None
+
+
+class ChatbotUpstreamStatsView(APIView):
+    """
+    Circuit state, call counts and recent latency of Serper and Cohere in
+    this process, for operators.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(upstream_stats())
+
+
+class ChatbotCacheStatsView(APIView):
+    """
+    Answer cache counters for this process, and the hit rate recorded on
+    the last week's messages across all workers, for operators.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        answer_cache = get_answer_cache()
+        recent = ChatMessage.objects.filter(created_at__gte=timezone.now() - timedelta(days=7)).aggregate(
+            total=Count('id'), hits=Count('id', filter=Q(cache_hit=True)),
+        )
+        recent['hit_rate'] = recent['hits'] / recent['total'] if recent['total'] else 0.0
+        return Response({
+            'answer_cache': answer_cache.stats() if answer_cache is not None else None,
+            'last_7_days': recent,
+        })
+
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def chat_events(user, query):
+    """
+    Server-sent events for one question: `meta` (source URLs, cache hit),
+    a `token` per chunk of answer text, `error` if generation failed (unless
+    a cached fallback answer was sent instead), and finally `done` with the
+    saved ChatMessage.
+    """
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        answer, similarity = await sync_to_async(answer_cache.get)(query)
+        if answer is not None:
+            yield sse_event('meta', {'search_urls': answer['search_urls'], 'cache_hit': True})
+            yield sse_event('token', {'text': answer['response']})
+            message = await ChatMessage.objects.acreate(
+                user=user, query=query, cache_hit=True, cache_similarity=similarity,
+                **await sync_to_async(message_fields)(answer)
+            )
+            yield sse_event('done', ChatMessageSerializer(message).data)
+            return
+
+    provider = get_provider()
+    search_results, search_urls, chunks, error, completed = None, [], [], None, False
+    try:
+        search_results, organic_results = await provider.search(query)
+        search_urls = [item.get("link") for item in organic_results if item.get("link")]
+        yield sse_event('meta', {'search_urls': search_urls, 'cache_hit': False})
+        async for chunk in provider.stream_answer(query, organic_results):
+            chunks.append(chunk)
+            yield sse_event('token', {'text': chunk})
+        completed = True
+    except ProviderError as e:
+        error = str(e)
+    finally:
+        # Runs on client disconnect too, so a partial answer is still kept
+        await provider.aclose()
+        answer = {
+            'search_results': search_results,
+            'search_urls': search_urls,
+            'response': ''.join(chunks) or error or '',
+        }
+        similarity = None
+        if error is not None and not chunks:
+            cached, similarity = await sync_to_async(fallback_answer)(query, error)
+            if similarity is not None:
+                answer = cached
+        message = await ChatMessage.objects.acreate(
+            user=user, query=query, cache_hit=similarity is not None, cache_similarity=similarity,
+            **await sync_to_async(message_fields)(answer)
+        )
+        if answer_cache is not None and completed and chunks:
+            await sync_to_async(answer_cache.set)(query, answer)
+    if similarity is not None:
+        yield sse_event('token', {'text': answer['response']})
+    elif error is not None:
+        yield sse_event('error', {'error': error})
+    yield sse_event('done', ChatMessageSerializer(message).data)
+
+
+async def authenticate(request):
+    try:
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+@csrf_exempt
+@require_POST
+async def stream_chat_message(request):
+    """
+    POST {"query": ...} and receive the answer as it is generated, as
+    text/event-stream (see chat_events). Needs an ASGI server to stream;
+    under WSGI the events arrive all at once.
+    """
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    try:
+        query = json.loads(request.body or b'{}').get('query')
+    except (ValueError, AttributeError):
+        query = None
+    if not isinstance(query, str) or not query.strip():
+        return JsonResponse({"error": "Query is required"}, status=400)
+
+    response = StreamingHttpResponse(chat_events(user, query), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'   # let nginx pass events through unbuffered
+    return response
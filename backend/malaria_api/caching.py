@@ -0,0 +1,64 @@
+#  backend/malaria_api/caching.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+class LRUBackend:
+    """
+    In-process cache holding at most `max_entries` items, each for `ttl`
+    seconds. The least recently used entry is evicted first.
+    """
+
+    def __init__(self, max_entries=1024, ttl=86400):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoCacheBackend:
+    """
+    Stores entries in one of Django's configured caches, so several worker
+    processes (or hosts, with a shared backend) reuse each other's results.
+    """
+
+    def __init__(self, alias='default', ttl=86400):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, timeout=self.ttl or None)
@@ -0,0 +1,19 @@
+#  backend/malaria_api/pagination.py
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    Each page is an indexed range scan that starts where the previous page
+    ended, so page 1000 is as cheap as page 1 and rows inserted while a
+    client is scrolling never shift or repeat items. Responses look like
+    {"next": <url>, "previous": <url>, "results": [...]}.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,35 @@
+#  backend/malaria_api/serializers.py
+
+from rest_framework import serializers
+
+
+def query_param_set(request, name):
+    if request is None:
+        return set()
+    value = request.query_params.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def field_requested(request, name):
+    """
+    Whether a SparseFieldsetMixin serializer will render field `name`,
+    e.g. to decide whether a relation is worth joining.
+    """
+    wanted = query_param_set(request, 'fields')
+    return not wanted or name in wanted
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for lightweight list rows.
+
+    `?fields=id,result,created_at` keeps only the named fields (unknown names
+    are ignored); without it every field is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = query_param_set(self.context.get('request'), 'fields')
+        if wanted:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     'corsheaders',
 
     'rest_framework',
@@ -55,12 +56,20 @@ INSTALLED_APPS = [
     'analytics',
     'chatbot',
     'uploads',
+    'sync',
+    'monitoring',
 
     
 ]
 
+# Load-test tooling (manage.py seed_benchmark_data / run_benchmark); keep it
+# off on production hosts, where seeding would mix fake rows into real data
+if os.getenv("ENABLE_BENCHMARKS", "False") == "True":
+    INSTALLED_APPS.append('benchmarks')
+
 MIDDLEWARE = [
-    
+    # First, so its timings cover every other middleware
+    'monitoring.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
 
@@ -112,21 +121,149 @@ DATABASES = {
     }
 }
 
+# Shared cache, e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# and CACHE_LOCATION=redis://127.0.0.1:6379/1. The per-process default is fine
+# for a single worker; with several, analytics invalidation and model reloads
+# only reach every process through a shared backend.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
 #  file storage
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Inference
+MODELS_DIR = os.path.join(BASE_DIR.parent, 'model_training', 'models')
+INFERENCE_MODEL_PATH = os.getenv(
+    "INFERENCE_MODEL_PATH", os.path.join(MODELS_DIR, 'malaria_mobilenetv2_model.tflite')
+)
+# Servable model versions; each Screening records which one produced it
+INFERENCE_MODELS = {
+    'mobilenetv2-v1': INFERENCE_MODEL_PATH,
+    'cnn-v1': os.path.join(MODELS_DIR, 'malaria_model.tflite'),
+}
+# More versions, e.g. quantized ones from model_training/scripts/convert_quantized.py:
+# "mobilenetv2-int8=/srv/models/malaria_mobilenetv2_model_int8.tflite,cnn-fp16=..."
+INFERENCE_MODELS.update(
+    pair.split('=', 1) for pair in os.getenv("INFERENCE_EXTRA_MODELS", "").split(',') if pair
+)
+INFERENCE_DEFAULT_MODEL = os.getenv("INFERENCE_DEFAULT_MODEL", "mobilenetv2-v1")
+# Percentage split such as "mobilenetv2-v1:90,cnn-v1:10"; empty sends everything to the default
+INFERENCE_TRAFFIC_SPLIT = {
+    name: int(weight)
+    for name, weight in (
+        pair.split(':') for pair in os.getenv("INFERENCE_TRAFFIC_SPLIT", "").split(',') if pair
+    )
+}
+INFERENCE_MODEL_WATCH_INTERVAL = float(os.getenv("INFERENCE_MODEL_WATCH_INTERVAL", "5"))  # seconds between file checks
+INFERENCE_RETIRE_GRACE = 60                                                    # seconds a swapped-out model lingers
+INFERENCE_RUNTIME = os.getenv("INFERENCE_RUNTIME", "auto")                  # ai_edge_litert, tflite_runtime, tensorflow
+INFERENCE_WARMUP = os.getenv("INFERENCE_WARMUP", "False") == "True"          # load the model at boot
+INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", "2"))             # interpreters per process
+INFERENCE_NUM_THREADS = int(os.getenv("INFERENCE_NUM_THREADS", "0")) or None  # per interpreter; None = cores / pool
+INFERENCE_USE_XNNPACK = os.getenv("INFERENCE_USE_XNNPACK", "True") == "True"
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16"))   # images per invoke
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))        # wait for a batch to fill
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "256"))           # images waiting before 503
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))               # seconds a request waits
+
+# Async screening jobs: "local" runs a process pool inside each web worker,
+# "db" leaves pending rows for `manage.py run_screening_worker`.
+SCREENING_ASYNC_UPLOADS = os.getenv("SCREENING_ASYNC_UPLOADS", "False") == "True"   # default for ?async=
+SCREENING_JOB_BACKEND = os.getenv("SCREENING_JOB_BACKEND", "local")
+SCREENING_JOB_WORKERS = int(os.getenv("SCREENING_JOB_WORKERS", "2"))
+SCREENING_JOB_LEASE = int(os.getenv("SCREENING_JOB_LEASE", "600"))   # seconds before a "db" claim is retaken
+SCREENING_STATUS_MAX_WAIT = float(os.getenv("SCREENING_STATUS_MAX_WAIT", "30"))     # long-poll cap, seconds
+SCREENING_STATUS_POLL_INTERVAL = 0.5
+
+# Batch uploads (/api/screenings/upload/batch/)
+SCREENING_BATCH_MAX_ITEMS = int(os.getenv("SCREENING_BATCH_MAX_ITEMS", "100"))
+SCREENING_BATCH_MAX_FILE_SIZE = int(os.getenv("SCREENING_BATCH_MAX_FILE_SIZE", str(20 * 1024 * 1024)))
+
+# Downscaled copies of each screening image for list views, made from the
+# decode already done for inference
+SCREENING_RENDITIONS = os.getenv("SCREENING_RENDITIONS", "True") == "True"
+SCREENING_THUMBNAIL_SIZE = int(os.getenv("SCREENING_THUMBNAIL_SIZE", "320"))    # longest side, pixels
+SCREENING_MEDIUM_SIZE = int(os.getenv("SCREENING_MEDIUM_SIZE", "800"))          # longest side, pixels
+SCREENING_RENDITION_FORMAT = os.getenv("SCREENING_RENDITION_FORMAT", "WEBP")    # WEBP or JPEG
+SCREENING_RENDITION_QUALITY = int(os.getenv("SCREENING_RENDITION_QUALITY", "80"))
+
+# Reporting exports (/api/screenings/export/ and `manage.py export_screenings`)
+SCREENING_EXPORT_CHUNK_SIZE = int(os.getenv("SCREENING_EXPORT_CHUNK_SIZE", "2000"))         # rows per fetch
+SCREENING_EXPORT_ROW_GROUP_SIZE = int(os.getenv("SCREENING_EXPORT_ROW_GROUP_SIZE", "50000"))  # rows per Parquet row group
+
+# Results cached by image + model digest: "lru" (per process), "django" or "none"
+INFERENCE_CACHE_BACKEND = os.getenv("INFERENCE_CACHE_BACKEND", "lru")
+INFERENCE_CACHE_ALIAS = os.getenv("INFERENCE_CACHE_ALIAS", "default")         # for the "django" backend
+INFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("INFERENCE_CACHE_MAX_ENTRIES", "4096"))
+INFERENCE_CACHE_TTL = int(os.getenv("INFERENCE_CACHE_TTL", "86400"))          # seconds; 0 = no expiry
+
+# Time-series analytics (/api/analytics/timeseries/)
+ANALYTICS_MAX_BUCKETS = int(os.getenv("ANALYTICS_MAX_BUCKETS", "2000"))       # points per series
+# Analytics responses are cached until a screening or patient changes
+ANALYTICS_CACHE_ALIAS = os.getenv("ANALYTICS_CACHE_ALIAS", "default")
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "3600"))           # seconds; upper bound on staleness
+
+# Chatbot answers cached by normalised question: "lru" (per process), "django" or "none"
+CHATBOT_CACHE_BACKEND = os.getenv("CHATBOT_CACHE_BACKEND", "lru")
+CHATBOT_CACHE_ALIAS = os.getenv("CHATBOT_CACHE_ALIAS", "default")             # for the "django" backend
+CHATBOT_CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_CACHE_MAX_ENTRIES", "1024"))
+CHATBOT_CACHE_TTL = int(os.getenv("CHATBOT_CACHE_TTL", "86400"))              # seconds; 0 = no expiry
+# Also reuse the answer to the most similar cached question (TF-IDF cosine,
+# e.g. 0.8); 0 matches exact questions only
+CHATBOT_CACHE_SIMILARITY = float(os.getenv("CHATBOT_CACHE_SIMILARITY", "0"))
+# Search + answer backend of the streaming chat endpoint; FakeChatProvider needs no API keys
+CHATBOT_PROVIDER = os.getenv("CHATBOT_PROVIDER", "chatbot.providers.SerperCohereProvider")
+# Serper and Cohere clients: pooled per process, retried with jittered backoff,
+# and cut off by a circuit breaker after repeated failures
+CHATBOT_SERPER_URL = os.getenv("CHATBOT_SERPER_URL", "https://google.serper.dev/search")
+CHATBOT_COHERE_BASE_URL = os.getenv("CHATBOT_COHERE_BASE_URL", "")               # empty = Cohere's API
+CHATBOT_HTTP_CONNECT_TIMEOUT = float(os.getenv("CHATBOT_HTTP_CONNECT_TIMEOUT", "3.05"))  # seconds
+CHATBOT_HTTP_READ_TIMEOUT = float(os.getenv("CHATBOT_HTTP_READ_TIMEOUT", "30"))       # seconds between bytes
+CHATBOT_HTTP_POOL_SIZE = int(os.getenv("CHATBOT_HTTP_POOL_SIZE", "20"))              # connections per upstream
+CHATBOT_HTTP_RETRIES = int(os.getenv("CHATBOT_HTTP_RETRIES", "2"))
+CHATBOT_HTTP_BACKOFF = float(os.getenv("CHATBOT_HTTP_BACKOFF", "0.3"))             # seconds, doubled per retry
+CHATBOT_BREAKER_FAILURES = int(os.getenv("CHATBOT_BREAKER_FAILURES", "5"))          # in a row, to open
+CHATBOT_BREAKER_RESET = float(os.getenv("CHATBOT_BREAKER_RESET", "30"))             # seconds before a trial call
+# When Cohere fails, reply with the cached answer to a question at least this similar
+CHATBOT_FALLBACK_SIMILARITY = float(os.getenv("CHATBOT_FALLBACK_SIMILARITY", "0.8"))
+# What `manage.py compact_chat_history` keeps (run it daily, e.g. from cron); 0 = keep forever
+CHAT_HISTORY_RETENTION_DAYS = int(os.getenv("CHAT_HISTORY_RETENTION_DAYS", "365"))
+CHAT_SEARCH_RETENTION_DAYS = int(os.getenv("CHAT_SEARCH_RETENTION_DAYS", "30"))    # raw search results; URLs stay
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
 }
+# Rows per page for the cursor-paginated listings (?page_size= up to 200)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+# /api/patients/search/?q=...&limit=...
+PATIENT_SEARCH_LIMIT = 20
+PATIENT_SEARCH_MAX_LIMIT = 100
+# /api/sync/?since=...&limit=...: changes per response
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+SYNC_MAX_PAGE_SIZE = 2000
+# Request metrics at /metrics (Prometheus text format), kept per process
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "True") == "True"   # Server-Timing response header
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")            # bearer token for scrapers; empty = DEBUG only
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
+# Authenticated users are read from this cache, not the database, on each
+# request. Saving or deleting a user drops their entry; changes made with
+# queryset.update(), or in another process with a per-process cache, show
+# once the entry expires.
+AUTH_USER_CACHE_ALIAS = os.getenv("AUTH_USER_CACHE_ALIAS", "default")
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))             # seconds; 0 = read every time
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=2),         # ← extend to 2 hours
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),         # ← refresh valid for 7 days
@@ -38,6 +38,8 @@ urlpatterns = [
     path('api/screenings/', include('screenings.urls')),
     path('api/analytics/', include('analytics.urls')),
     path('api/chatbot/', include('chatbot.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('metrics', include('monitoring.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
 if settings.DEBUG:
@@ -0,0 +1,188 @@
+#  backend/monitoring/metrics.py
+#
+#  Imported by the screening pipeline, which also runs in job worker
+#  processes before Django is set up, so nothing here may import Django.
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Seconds; Prometheus' defaults plus the long tail of uploads and long-polls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))   # 1 KiB to 256 MiB
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Observations counted into cumulative `buckets` per combination of label
+    values, with their sum and count, as Prometheus histograms are.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}    # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        # Counts are kept per bucket and made cumulative when rendered
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def total(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return series[-1] if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labelvalues, list(values)) for labelvalues, values in self._series.items())
+        for labelvalues, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), values):
+                cumulative += count
+                labels = _labels(self.labelnames, labelvalues, [('le', _number(float(bound)))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _labels(self.labelnames, labelvalues)
+            yield f'{self.name}_sum{labels} {_number(values[-1])}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    """
+    The metrics of this process, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', "Time to the response headers, per route.",
+    ('method', 'route', 'status'),
+))
+REQUEST_DB_QUERIES = REGISTRY.register(Histogram(
+    'http_request_db_queries', "Database queries run per request.",
+    ('method', 'route'), buckets=QUERY_COUNT_BUCKETS,
+))
+REQUEST_DB_DURATION = REGISTRY.register(Histogram(
+    'http_request_db_duration_seconds', "Time spent in database queries per request.",
+    ('method', 'route'),
+))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    'http_response_size_bytes', "Response body size, streamed bodies included.",
+    ('method', 'route'), buckets=SIZE_BUCKETS,
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    'stage_duration_seconds', "Time spent in one stage of request handling, e.g. decode or cohere.",
+    ('stage',),
+))
+
+
+class RequestTimings:
+    """
+    What one request spent its time on: database queries, and each named
+    span as (total seconds, times entered).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            total, count = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + seconds, count + 1)
+
+    def server_timing(self, total):
+        """
+        The Server-Timing header value, durations in milliseconds.
+        """
+        entries = [f'total;dur={total * 1000:.1f}']
+        if self.db_queries:
+            entries.append(f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"')
+        for name, (seconds, count) in self.spans.items():
+            entry = f'{name};dur={seconds * 1000:.1f}'
+            entries.append(f'{entry};desc="{count} calls"' if count > 1 else entry)
+        return ', '.join(entries)
+
+
+# Set by the middleware for the length of a request. Context variables
+# follow the request into sync_to_async threads and async tasks, but not
+# into the inference batcher's threads, whose spans only reach the
+# histogram.
+current_timings = ContextVar('current_timings', default=None)
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block as the stage `name`, for the stage histogram and the
+    current request's Server-Timing header.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_DURATION.observe(seconds, name)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add_span(name, seconds)
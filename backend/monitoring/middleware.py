@@ -0,0 +1,131 @@
+#  backend/monitoring/middleware.py
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import (
+    REQUEST_DB_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_DURATION,
+    RESPONSE_SIZE,
+    RequestTimings,
+    current_timings,
+)
+
+# Anything else is counted as "other", so stray methods cannot add series
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+def route_label(request):
+    """
+    The URL pattern's name (or view path) that handled the request, so all
+    patients share one series rather than one per id.
+    """
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Record each request's latency, database queries and response size per
+    route, and report where its time went in a Server-Timing header.
+
+    Latency is measured to the response headers. A streamed response has
+    its size and the queries it runs while streaming recorded when the
+    stream ends.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    async def _acall(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        elapsed = time.perf_counter() - timings.started
+        method = request.method if request.method in METHODS else 'other'
+        route = route_label(request)
+        REQUEST_DURATION.observe(elapsed, method, route, str(response.status_code))
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(elapsed)
+
+        def record(size):
+            REQUEST_DB_QUERIES.observe(timings.db_queries, method, route)
+            REQUEST_DB_DURATION.observe(timings.db_seconds, method, route)
+            RESPONSE_SIZE.observe(size, method, route)
+
+        if response.streaming:
+            response.streaming_content = (
+                _measure_async(response.streaming_content, timings, record) if response.is_async
+                else _measure(response.streaming_content, timings, record)
+            )
+        else:
+            record(len(response.content))
+        return response
+
+
+def _measure(content, timings, record):
+    """
+    Pass a streamed body through, counting its bytes and attributing the
+    queries that produce each chunk to the request.
+    """
+    size = 0
+    iterator = iter(content)
+    try:
+        while True:
+            token = current_timings.set(timings)
+            try:
+                chunk = next(iterator, None)
+            finally:
+                current_timings.reset(token)
+            if chunk is None:
+                return
+            size += len(chunk)
+            yield chunk
+    finally:
+        record(size)
+
+
+async def _measure_async(content, timings, record):
+    size = 0
+    iterator = aiter(content)
+    try:
+        while True:
+            token = current_timings.set(timings)
+            try:
+                chunk = await anext(iterator, None)
+            finally:
+                current_timings.reset(token)
+            if chunk is None:
+                return
+            size += len(chunk)
+            yield chunk
+    finally:
+        record(size)
@@ -0,0 +1,30 @@
+#  backend/monitoring/signals.py
+
+import time
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import current_timings
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query's time to the current
+    request's timings. Queries outside a request pass straight through.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Fires again when a closed connection reconnects
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
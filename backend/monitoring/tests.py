@@ -0,0 +1,99 @@
+from datetime import date
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from patients.models import Patient
+from screenings.models import Screening
+from .metrics import (
+    REQUEST_DB_QUERIES,
+    REQUEST_DURATION,
+    RESPONSE_SIZE,
+    Histogram,
+    RequestTimings,
+    current_timings,
+    span,
+)
+
+
+@override_settings(METRICS_TOKEN='scrape-me')
+class MetricsMiddlewareTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            username='ministry', email='ministry@example.org', password='password', is_staff=True,
+        )
+        patient = Patient.objects.create(
+            created_by=cls.admin, first_name='Abebe', last_name='Kebede', gender='M',
+            birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+        )
+        Screening.objects.create(patient=patient, image='screenings/seed.jpg', result='N')
+
+    def test_requests_are_timed_per_route(self):
+        before = REQUEST_DURATION.count('GET', 'sync', '200')
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/sync/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertEqual(REQUEST_DURATION.count('GET', 'sync', '200'), before + 1)
+
+        scrape = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(scrape.status_code, 200)
+        self.assertTrue(scrape['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(
+            f'http_request_duration_seconds_count{{method="GET",route="sync",status="200"}} {before + 1}',
+            scrape.content.decode(),
+        )
+
+    def test_streamed_response_is_measured_when_it_ends(self):
+        route = ('GET', 'screening-export')
+        sizes, queries = RESPONSE_SIZE.total(*route), REQUEST_DB_QUERIES.total(*route)
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/screenings/export/')
+        self.assertEqual(RESPONSE_SIZE.total(*route), sizes)
+        self.assertNotIn('db;', response['Server-Timing'])
+
+        content = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(RESPONSE_SIZE.total(*route), sizes + len(content))
+        # The export's query only runs while streaming, and still counts
+        self.assertEqual(REQUEST_DB_QUERIES.total(*route), queries + 1)
+
+    def test_metrics_need_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer guess').status_code, 401)
+        with self.settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+
+class MetricsTests(SimpleTestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = Histogram('test_seconds', "Test.", ('route',), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value, 'a"b')
+        self.assertEqual(list(histogram.samples()), [
+            'test_seconds_bucket{route="a\\"b",le="0.1"} 2',
+            'test_seconds_bucket{route="a\\"b",le="1.0"} 3',
+            'test_seconds_bucket{route="a\\"b",le="+Inf"} 4',
+            'test_seconds_sum{route="a\\"b"} 5.65',
+            'test_seconds_count{route="a\\"b"} 4',
+        ])
+
+    def test_spans_add_up_in_server_timing(self):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            for _ in range(2):
+                with span('decode'):
+                    pass
+            with span('invoke'):
+                pass
+        finally:
+            current_timings.reset(token)
+        with span('invoke'):
+            pass
+        self.assertRegex(
+            timings.server_timing(0.0125),
+            r'^total;dur=12\.5, decode;dur=[\d.]+;desc="2 calls", invoke;dur=[\d.]+$',
+        )
@@ -0,0 +1,28 @@
+#  backend/monitoring/views.py
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .metrics import REGISTRY
+
+
+@require_GET
+def metrics_view(request):
+    """
+    This process's metrics in the Prometheus text format. Scrapers send
+    `Authorization: Bearer <METRICS_TOKEN>`; without a token configured the
+    endpoint is only open when DEBUG is on.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        expected = f'Bearer {token}'.encode()
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+            response = HttpResponse("A valid metrics token is required.", status=401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+    elif not settings.DEBUG:
+        return HttpResponseForbidden("Set METRICS_TOKEN to scrape metrics.")
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
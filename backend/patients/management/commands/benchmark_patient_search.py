@@ -0,0 +1,139 @@
+#  backend/patients/management/commands/benchmark_patient_search.py
+
+import random
+import secrets
+import time
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from accounts.models import CustomUser
+from benchmarks.seed import FIRST_NAMES, LAST_NAMES, TOWNS
+from patients.models import Patient
+from patients.search import search_index, search_patients
+
+
+def typo(word):
+    i = random.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a large synthetic patient table and measure /api/patients/search/ lookups. "
+        "Runs inside a transaction that is rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=1_000_000)
+        parser.add_argument('--clinicians', type=int, default=200)
+        parser.add_argument('--queries', type=int, default=100, help="Lookups per query kind.")
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help="Commit the generated rows.")
+
+    def load(self, options):
+        password = make_password(None)
+        run = secrets.token_hex(3)  # keeps --keep runs from colliding
+        clinicians = CustomUser.objects.bulk_create(
+            CustomUser(username=f'bench-{run}-{i}', email=f'bench-{run}-{i}@example.org',
+                       password=password, user_type=2)
+            for i in range(options['clinicians'])
+        )
+        clinician_ids = [c.id for c in clinicians]
+
+        table = connection.ops.quote_name(Patient._meta.db_table)
+        self.stdout.write(f"Inserting {options['patients']:,} patients...")
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            # Bulk load without the trigram index, then build it once
+            cursor.execute('DROP INDEX IF EXISTS patient_search_trgm_idx')
+            cursor.execute('SELECT setseed(0)')
+            cursor.execute(
+                f"""
+                INSERT INTO {table}
+                    (created_by_id, first_name, last_name, gender, birth_date, address, phone, created_at)
+                SELECT
+                    (%(clinicians)s::bigint[])[1 + floor(random() * %(n_clinicians)s)::int],
+                    (%(first)s::text[])[1 + floor(random() * %(n_first)s)::int],
+                    (%(last)s::text[])[1 + floor(random() * %(n_last)s)::int],
+                    CASE WHEN random() < 0.5 THEN 'M' ELSE 'F' END,
+                    DATE '1950-01-01' + floor(random() * 25000)::int,
+                    'Kebele ' || floor(random() * 40)::int || ', '
+                        || (%(towns)s::text[])[1 + floor(random() * %(n_towns)s)::int],
+                    '09' || lpad(floor(random() * 100000000)::bigint::text, 8, '0'),
+                    now() - make_interval(mins => i %% 500000)
+                FROM generate_series(1, %(count)s) AS i
+                """,
+                {
+                    'clinicians': clinician_ids, 'n_clinicians': len(clinician_ids),
+                    'first': FIRST_NAMES, 'n_first': len(FIRST_NAMES),
+                    'last': LAST_NAMES, 'n_last': len(LAST_NAMES),
+                    'towns': TOWNS, 'n_towns': len(TOWNS),
+                    'count': options['patients'],
+                },
+            )
+            # Run the deferred foreign-key checks now; CREATE INDEX refuses
+            # to run while they are pending
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        self.stdout.write(f"  {time.perf_counter() - start:.1f}s")
+
+        self.stdout.write("Building the trigram index...")
+        start = time.perf_counter()
+        with connection.schema_editor(atomic=False) as editor:
+            editor.add_index(Patient, search_index())
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {table}')
+        self.stdout.write(f"  {time.perf_counter() - start:.1f}s")
+        return clinician_ids
+
+    def sample_queries(self, kind, count):
+        queries = []
+        for _ in range(count):
+            first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+            queries.append({
+                'prefix': first[:3],
+                'full name': f'{first} {last}',
+                'typo': typo(last),
+                'phone prefix': '09' + str(random.randrange(1000, 10000)),
+                'town': random.choice(TOWNS),
+            }[kind])
+        return queries
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("The search benchmark needs PostgreSQL (pg_trgm); other databases use the in-memory fallback.")
+        random.seed(0)
+
+        with transaction.atomic():
+            clinician_ids = self.load(options)
+            per_clinician = options['patients'] // len(clinician_ids)
+            self.stdout.write(
+                f"\nSearching one clinician's ~{per_clinician:,} patients out of {options['patients']:,}, "
+                f"limit {options['limit']}\n"
+            )
+            self.stdout.write(f"{'query kind':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'hits':>6}")
+
+            all_timings = []
+            for kind in ('prefix', 'full name', 'typo', 'phone prefix', 'town'):
+                timings, hits = [], 0
+                for query in self.sample_queries(kind, options['queries']):
+                    clinician_id = random.choice(clinician_ids)
+                    start = time.perf_counter()
+                    hits += len(search_patients(Patient.objects.all(), clinician_id, query, options['limit']))
+                    timings.append((time.perf_counter() - start) * 1000)
+                all_timings.extend(timings)
+                p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+                self.stdout.write(
+                    f"{kind:<14} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {max(timings):>8.2f} "
+                    f"{hits / len(timings):>6.1f}"
+                )
+
+            p95 = np.percentile(all_timings, 95)
+            style = self.style.SUCCESS if p95 < 50 else self.style.WARNING
+            self.stdout.write(style(f"\nOverall p95: {p95:.2f} ms (target < 50 ms)"))
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+                self.stdout.write("Rolled back the generated rows.")
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["created_by", "-created_at", "-id"],
+                name="patient_owner_created_idx",
+            ),
+        ),
+        # The composite index above covers lookups by this column; drop the
+        # FK's own index only once it exists
+        migrations.AlterField(
+            model_name="patient",
+            name="created_by",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
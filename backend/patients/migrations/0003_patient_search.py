@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:41
+
+from django.conf import settings
+from django.db import migrations
+
+import patients.search
+
+EXTENSIONS = ("pg_trgm", "btree_gin")
+
+
+def create_search_index(apps, schema_editor):
+    # PostgreSQL only, and kept out of the model state so other databases
+    # (SQLite in development and tests) never see it; search falls back to
+    # matching in Python there
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for extension in EXTENSIONS:
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS %s" % schema_editor.quote_name(extension))
+    schema_editor.add_index(apps.get_model("patients", "Patient"), patients.search.search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.remove_index(apps.get_model("patients", "Patient"), patients.search.search_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0002_patient_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
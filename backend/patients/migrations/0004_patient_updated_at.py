@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    Patient.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0003_patient_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
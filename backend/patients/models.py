@@ -6,7 +6,8 @@ from accounts.models import CustomUser
 class Patient(models.Model):
     GENDER_CHOICES = [('M', 'Male'), ('F', 'Female')]
     
-    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    # Indexed through patient_owner_created_idx below
+    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES)
@@ -14,6 +15,15 @@ class Patient(models.Model):
     address = models.TextField()
     phone = models.CharField(max_length=20)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # A clinician's patient list, keyset-paginated newest first
+            models.Index(fields=['created_by', '-created_at', '-id'], name='patient_owner_created_idx'),
+            # Name/phone/address search uses patient_search_trgm_idx, which
+            # migration 0003 creates on PostgreSQL only and so is not listed here
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
\ No newline at end of file
@@ -0,0 +1,121 @@
+#  backend/patients/search.py
+
+import re
+from difflib import SequenceMatcher
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, F, Func, TextField, Value
+from django.db.models.functions import Cast
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'phone', 'address')
+
+# Lowest match score returned. pg_trgm's default word-similarity threshold
+# (0.6) drops single-letter typos in short names such as "kebde" for
+# "Kebede", so searches lower it for their transaction.
+MIN_SCORE = 0.5
+
+
+class SearchText(Func):
+    """
+    The searchable text of a patient: name, phone and address joined by
+    spaces. Used both in the trigram index and in queries, so the SQL must
+    stay identical in the two places for the index to be used.
+    """
+    template = '(%(expressions)s)'
+    arg_joiner = " || ' ' || "
+    output_field = TextField()
+
+    def __init__(self, **extra):
+        super().__init__(*(F(name) for name in SEARCH_FIELDS), **extra)
+
+
+def search_index():
+    """
+    patient_search_trgm_idx: name/phone/address search within one
+    clinician's patients (btree_gin lets the owner column share the GIN).
+    PostgreSQL only, so it is created by migration 0003 rather than listed
+    in Patient.Meta.indexes.
+    """
+    return GinIndex(F('created_by'), OpClass(SearchText(), name='gin_trgm_ops'), name='patient_search_trgm_idx')
+
+
+def _postgres_search(queryset, owner_id, query, limit):
+    # Both conditions are answered by patient_search_trgm_idx. The owner id
+    # is cast to bigint because btree_gin has no int4 = int8 operator, and a
+    # plain integer parameter would leave the clinician filter out of the
+    # index scan. The score is word_similarity(query, text).
+    text = SearchText()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(MIN_SCORE)])
+        return list(
+            queryset
+            .filter(created_by_id=Cast(Value(owner_id), BigIntegerField()))
+            .alias(search_text=text)
+            .filter(search_text__trigram_word_similar=query)
+            .annotate(score=TrigramWordSimilarity(query, text))
+            .order_by('-score', '-created_at', '-id')[:limit]
+        )
+
+
+def _words(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def word_score(query_words, text):
+    """
+    Python stand-in for word_similarity: each query word is scored against
+    its best-matching word of the text (1.0 for a prefix match, otherwise
+    the edit similarity) and the scores are averaged.
+    """
+    words = _words(text)
+    if not words or not query_words:
+        return 0.0
+    total = 0.0
+    for query_word in query_words:
+        total += max(
+            1.0 if word.startswith(query_word) else SequenceMatcher(None, query_word, word).ratio()
+            for word in words
+        )
+    return total / len(query_words)
+
+
+def _in_memory_search(queryset, owner_id, query, limit):
+    """
+    Fallback for databases without pg_trgm (SQLite in development and
+    tests): score every candidate row in Python.
+    """
+    query_words = _words(query)
+    scored = []
+    candidates = queryset.filter(created_by_id=owner_id)
+    for row in candidates.values('id', 'created_at', *SEARCH_FIELDS).iterator():
+        score = word_score(query_words, ' '.join(row[name] for name in SEARCH_FIELDS))
+        if score >= MIN_SCORE:
+            scored.append((score, row['created_at'], row['id']))
+    scored.sort(reverse=True)
+    scored = scored[:limit]
+
+    patients = queryset.in_bulk([pk for _, _, pk in scored])
+    results = []
+    for score, _, pk in scored:
+        patient = patients[pk]
+        patient.score = score
+        results.append(patient)
+    return results
+
+
+def search_patients(queryset, owner_id, query, limit):
+    """
+    Return up to `limit` of the patients in `queryset` registered by
+    `owner_id` whose name, phone or address matches `query` by prefix or
+    fuzzily, best matches first. Each patient carries its match `score`
+    (0 to 1).
+    """
+    query = query.strip()
+    if not query:
+        return []
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, owner_id, query, limit)
+    return _in_memory_search(queryset, owner_id, query, limit)
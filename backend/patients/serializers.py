@@ -1,10 +1,11 @@
 #  backend/patients/serializers.py
 
 from rest_framework import serializers
+from malaria_api.serializers import SparseFieldsetMixin
 from .models import Patient
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Patient
         fields = '__all__'
-        read_only_fields = ('created_by', 'created_at')
\ No newline at end of file
+        read_only_fields = ('created_by', 'created_at', 'updated_at')
\ No newline at end of file
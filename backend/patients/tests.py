@@ -1,3 +1,45 @@
-from django.test import TestCase
+from tests.utils import QueryPlanTestCase, postgres_only, seed_clinic
+from .models import Patient
 
-# Create your tests here.
+
+class PatientQueryTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = seed_clinic()[:2]
+        for owner in (cls.user, cls.other):
+            Patient.objects.create(created_by=owner, first_name='Abebe', last_name='Kebede', gender='M',
+                                   birth_date='1990-01-01', address='Bahir Dar', phone='0922334455')
+
+    def test_list_pages_cost_one_query(self):
+        response, queries = self.capture('/api/patients/?page_size=25', self.user)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertTrue(all(row['created_by'] == self.user.id for row in response.data['results']))
+
+        response, queries = self.capture(response.data['next'], self.user)
+        self.assertEqual(len(queries), 1)
+
+    @postgres_only
+    def test_list_uses_owner_index(self):
+        response, queries = self.capture('/api/patients/?page_size=25', self.user)
+        self.assertIndexScans(queries, 'patients_patient', 'patient_owner_created_idx')
+        _, queries = self.capture(response.data['next'], self.user)
+        self.assertIndexScans(queries, 'patients_patient', 'patient_owner_created_idx')
+
+    def test_search_finds_own_patients_by_prefix_and_typo(self):
+        for query in ('abeb', 'kebde', '092233'):
+            response, _ = self.capture(f'/api/patients/search/?q={query}', self.user)
+            self.assertEqual(response.data[0]['last_name'], 'Kebede', query)
+            self.assertTrue(all(row['created_by'] == self.user.id for row in response.data))
+            self.assertEqual([row['score'] for row in response.data],
+                             sorted((row['score'] for row in response.data), reverse=True))
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/patients/search/?q=abe&limit=x').status_code, 400)
+
+    @postgres_only
+    def test_search_avoids_sequential_scans(self):
+        # At this size the owner index wins; the trigram index takes over for
+        # clinicians with thousands of patients (see benchmark_patient_search)
+        _, queries = self.capture('/api/patients/search/?q=kebede', self.user)
+        self.assertIndexScans(queries, 'patients_patient')
@@ -1,16 +1,43 @@
 #  backend/patients/views.py
 
-from rest_framework import viewsets, permissions
+from django.conf import settings
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from malaria_api.pagination import CreatedAtCursorPagination
 from .models import Patient
+from .search import search_patients
 from .serializers import PatientSerializer
 
 class PatientViewSet(viewsets.ModelViewSet):
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
+    pagination_class = CreatedAtCursorPagination
     # permission_classes = [permissions.IsAuthenticated]
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     def get_queryset(self):
-        return self.queryset.filter(created_by=self.request.user)
\ No newline at end of file
+        return self.queryset.filter(created_by=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Find the user's patients by name, phone or address: `?q=` matches
+        word prefixes and tolerates typos; `?limit=` caps the results.
+        Results are ordered best match first and carry a `score` (0 to 1).
+        """
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', settings.PATIENT_SEARCH_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.PATIENT_SEARCH_MAX_LIMIT))
+
+        # search_patients() applies the owner filter in the form the index needs
+        patients = search_patients(self.queryset, request.user.pk, query, limit)
+        rows = self.get_serializer(patients, many=True).data
+        for row, patient in zip(rows, patients):
+            row['score'] = round(patient.score, 3)
+        return Response(rows)
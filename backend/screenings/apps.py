@@ -1,6 +1,17 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ScreeningsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "screenings"
+
+    def ready(self):
+        # The model is otherwise loaded on the first upload. Warming up in the
+        # background keeps boot fast while still hiding that cost from users.
+        if settings.INFERENCE_WARMUP:
+            from .registry import warm_up
+
+            threading.Thread(target=warm_up, name='inference-warmup', daemon=True).start()
@@ -0,0 +1,195 @@
+#  backend/screenings/batch.py
+
+import json
+import os
+import tarfile
+import zipfile
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .cache import file_digest, get_result_cache
+from .inference import summarize_prediction
+from .preprocessing import INPUT_SIZE, decode_image, to_tensor
+from .renditions import rendition_longest_side
+
+
+class BatchError(ValueError):
+    """
+    The batch as a whole is malformed (as opposed to a single bad item).
+    """
+
+
+def _parse_manifest(raw):
+    if not raw:
+        raise BatchError("An archive upload needs a 'manifest' listing file, patient and notes.")
+    try:
+        manifest = json.loads(raw)
+    except (TypeError, ValueError):
+        raise BatchError("'manifest' must be a JSON list.")
+    if not isinstance(manifest, list) or not all(isinstance(entry, dict) for entry in manifest):
+        raise BatchError("'manifest' must be a JSON list of objects.")
+    names = [entry.get('file') for entry in manifest]
+    duplicates = sorted({str(name) for name in names if names.count(name) > 1})
+    if duplicates:
+        raise BatchError(f"'manifest' lists {', '.join(duplicates)} more than once.")
+    return manifest
+
+
+def _too_many_items():
+    return BatchError(f"At most {settings.SCREENING_BATCH_MAX_ITEMS} images per batch.")
+
+
+def _too_large(name):
+    return BatchError(f"{name} is larger than {settings.SCREENING_BATCH_MAX_FILE_SIZE} bytes.")
+
+
+def _archive_members(archive, wanted):
+    """
+    Yield (name, bytes) for each regular file in a zip or tar upload whose
+    name is in `wanted`. Other members are skipped without being read, and
+    the batch is rejected as soon as it holds too many or too large files.
+    """
+    max_size = settings.SCREENING_BATCH_MAX_FILE_SIZE
+    count = 0
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.is_dir() or info.filename not in wanted:
+                        continue
+                    count += 1
+                    if count > settings.SCREENING_BATCH_MAX_ITEMS:
+                        raise _too_many_items()
+                    if info.file_size > max_size:
+                        raise _too_large(info.filename)
+                    yield info.filename, zf.read(info)
+        except (zipfile.BadZipFile, zlib.error, EOFError):
+            raise BatchError("'archive' is not a readable zip file.")
+        return
+
+    archive.seek(0)
+    try:
+        tar = tarfile.open(fileobj=archive, mode='r:*')
+    except tarfile.TarError:
+        raise BatchError("'archive' must be a zip or tar file.")
+    try:
+        with tar:
+            for member in tar:
+                if not member.isfile() or member.name not in wanted:
+                    continue
+                count += 1
+                if count > settings.SCREENING_BATCH_MAX_ITEMS:
+                    raise _too_many_items()
+                if member.size > max_size:
+                    raise _too_large(member.name)
+                yield member.name, tar.extractfile(member).read()
+    except (tarfile.TarError, OSError, zlib.error, EOFError):
+        raise BatchError("'archive' is not a readable tar file.")
+
+
+def items_from_archive(archive, raw_manifest):
+    """
+    Pair the images in an archive with their manifest entries.
+    """
+    manifest = _parse_manifest(raw_manifest)
+    if len(manifest) > settings.SCREENING_BATCH_MAX_ITEMS:
+        raise _too_many_items()
+    by_name = {entry.get('file'): entry for entry in manifest}
+    items = []
+    # by_name shrinks as files are found, so a name repeated in the archive is read once
+    for name, data in _archive_members(archive, by_name):
+        entry = by_name.pop(name)
+        items.append({
+            'file': name,
+            'image': ContentFile(data, name=os.path.basename(name)),
+            'patient': entry.get('patient'),
+            'notes': entry.get('notes', ''),
+        })
+    # Entries whose file is missing from the archive still get an error row
+    for name, entry in by_name.items():
+        items.append({'file': name, 'image': None, 'patient': entry.get('patient'), 'notes': ''})
+    return items
+
+
+def items_from_multipart(data, files):
+    """
+    Pair the `images` files with the `patients` (and optional `notes`)
+    fields, which are matched by position.
+    """
+    images = files.getlist('images')
+    patients = data.getlist('patients')
+    notes = data.getlist('notes')
+    if len(patients) != len(images):
+        raise BatchError("Send one 'patients' value for each file in 'images'.")
+    if notes and len(notes) != len(images):
+        raise BatchError("When sent, 'notes' needs one value for each file in 'images'.")
+    if len(images) > settings.SCREENING_BATCH_MAX_ITEMS:
+        raise _too_many_items()
+    for image in images:
+        if image.size > settings.SCREENING_BATCH_MAX_FILE_SIZE:
+            raise _too_large(image.name)
+    return [
+        {
+            'file': image.name,
+            'image': image,
+            'patient': patient,
+            'notes': notes[i] if notes else '',
+        }
+        for i, (image, patient) in enumerate(zip(images, patients))
+    ]
+
+
+def predict_images(image_files, version, on_decode=None):
+    """
+    Run many images through one model version as batches of at most
+    INFERENCE_MAX_BATCH_SIZE, reusing cached results where possible.
+
+    Returns one entry per input: a (result, confidence, parasite_count)
+    tuple, or the exception raised while decoding that image. When given,
+    `on_decode(index, image)` is called with each image decoded here, kept
+    large enough to make its renditions from.
+    """
+    result_cache = get_result_cache()
+    engine = version.engine
+    longest_side = rendition_longest_side() if on_decode is not None else 0
+    predictions = [None] * len(image_files)
+    keys = [None] * len(image_files)
+
+    pending = []
+    for i, image_file in enumerate(image_files):
+        if result_cache is not None:
+            keys[i] = result_cache.make_key(file_digest(image_file), engine.model_digest)
+            predictions[i] = result_cache.get(keys[i])
+        if predictions[i] is None:
+            pending.append(i)
+
+    chunk_size = settings.INFERENCE_MAX_BATCH_SIZE
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        batch = np.empty((len(chunk), INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.float32)
+        decoded = []
+        for row, i in enumerate(chunk):
+            try:
+                img = decode_image(image_files[i], longest_side=longest_side)
+                to_tensor(img, out=batch[row])
+            except Exception as exc:
+                predictions[i] = exc
+                continue
+            image_files[i].seek(0)
+            if on_decode is not None:
+                on_decode(i, img)
+            decoded.append(row)
+        if not decoded:
+            continue
+
+        outputs = engine.run(batch[decoded], timeout=settings.INFERENCE_TIMEOUT)
+        for row, output in zip(decoded, outputs):
+            i = chunk[row]
+            predictions[i] = summarize_prediction(float(output))
+            if result_cache is not None:
+                result_cache.set(keys[i], predictions[i])
+    return predictions
@@ -0,0 +1,89 @@
+#  backend/screenings/cache.py
+
+import hashlib
+import threading
+
+from malaria_api.caching import DjangoCacheBackend, LRUBackend
+
+
+def file_digest(fileobj, chunk_size=1024 * 1024):
+    """
+    SHA-256 of an open file or Django UploadedFile, leaving it rewound.
+    """
+    sha = hashlib.sha256()
+    if hasattr(fileobj, 'chunks'):
+        for chunk in fileobj.chunks():
+            sha.update(chunk)
+    else:
+        for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+            sha.update(chunk)
+    fileobj.seek(0)
+    return sha.hexdigest()
+
+
+class InferenceResultCache:
+    """
+    Maps (image bytes, model file) to a stored (result, confidence,
+    parasite_count) tuple so re-uploads of the same photo skip inference.
+    """
+
+    key_prefix = 'screening-inference'
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, image_digest, model_digest):
+        return f"{self.key_prefix}:{model_digest[:16]}:{image_digest}"
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if value is None else tuple(value)
+
+    def set(self, key, value):
+        self.backend.set(key, tuple(value))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Return the process-wide InferenceResultCache, or None when disabled.
+    """
+    global _result_cache
+    from django.conf import settings
+
+    if settings.INFERENCE_CACHE_BACKEND == 'none':
+        return None
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                if settings.INFERENCE_CACHE_BACKEND == 'django':
+                    backend = DjangoCacheBackend(
+                        alias=settings.INFERENCE_CACHE_ALIAS,
+                        ttl=settings.INFERENCE_CACHE_TTL,
+                    )
+                else:
+                    backend = LRUBackend(
+                        max_entries=settings.INFERENCE_CACHE_MAX_ENTRIES,
+                        ttl=settings.INFERENCE_CACHE_TTL,
+                    )
+                _result_cache = InferenceResultCache(backend)
+    return _result_cache
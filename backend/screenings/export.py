@@ -0,0 +1,205 @@
+#  backend/screenings/export.py
+
+import csv
+import io
+import zlib
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from .models import Screening
+
+# (column, queryset field) in output order. Names and phone numbers are
+# left out; reports get the patient's id, demographics and address.
+COLUMNS = [
+    ('screening_id', 'id'),
+    ('screened_at', 'created_at'),
+    ('status', 'status'),
+    ('result', 'result'),
+    ('confidence', 'confidence'),
+    ('parasite_count', 'parasite_count'),
+    ('model_version', 'model_version'),
+    ('patient_id', 'patient_id'),
+    ('patient_gender', 'patient__gender'),
+    ('patient_birth_date', 'patient__birth_date'),
+    ('patient_address', 'patient__address'),
+    ('clinician_id', 'patient__created_by_id'),
+]
+HEADER = [name for name, _ in COLUMNS] + ['patient_age']
+
+# format -> (content type, file extension)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def export_queryset(start=None, end=None, results=None):
+    """
+    Screenings created between two dates (inclusive, local time) with the
+    given results, oldest first, as tuples in COLUMNS order.
+    """
+    screenings = Screening.objects.all()
+    tz = timezone.get_current_timezone()
+    if start is not None:
+        screenings = screenings.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min), tz))
+    if end is not None:
+        screenings = screenings.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+        )
+    if results:
+        screenings = screenings.filter(result__in=results)
+    return screenings.order_by('created_at', 'id').values_list(*(field for _, field in COLUMNS))
+
+
+def export_filename(fmt, start=None, end=None):
+    span = f"{start or 'all'}-{end or timezone.localdate()}"
+    return f"screenings-{span}.{FORMATS[fmt][1]}"
+
+
+def age_on(birth_date, day):
+    if birth_date is None:
+        return None
+    return day.year - birth_date.year - ((day.month, day.day) < (birth_date.month, birth_date.day))
+
+
+def _chunks(rows, chunk_size):
+    """
+    Rows in lists of `chunk_size`, each with the patient's age at the
+    screening appended. The query streams from the database, so at most
+    one chunk is held in memory.
+    """
+    iterator = rows.iterator(chunk_size=chunk_size)
+    age_index = HEADER.index('patient_birth_date')
+    # Looked up once: timezone.localdate() per row costs as much as the CSV writing
+    tz = timezone.get_current_timezone()
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield [row + (age_on(row[age_index], row[1].astimezone(tz).date()),) for row in chunk]
+
+
+def csv_chunks(rows, chunk_size=2000):
+    """
+    The export as CSV text, one string per chunk of rows. The header comes
+    first, before the query runs, so a download starts at once.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    yield buffer.getvalue()
+    for chunk in _chunks(rows, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, level=6):
+    """
+    Compress a stream of text chunks into gzip bytes as they come.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _Drain:
+    """
+    Write-only file for pyarrow that hands back what was written so far.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def load_pyarrow():
+    """
+    Import pyarrow, which only Parquet exports need.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from None
+    return pa, pq
+
+
+def parquet_schema(pa):
+    return pa.schema([
+        ('screening_id', pa.int64()),
+        ('screened_at', pa.timestamp('us', tz='UTC')),
+        ('status', pa.string()),
+        ('result', pa.string()),
+        ('confidence', pa.float64()),
+        ('parasite_count', pa.int64()),
+        ('model_version', pa.string()),
+        ('patient_id', pa.int64()),
+        ('patient_gender', pa.string()),
+        ('patient_birth_date', pa.date32()),
+        ('patient_address', pa.string()),
+        ('clinician_id', pa.int64()),
+        ('patient_age', pa.int32()),
+    ])
+
+
+def parquet_chunks(rows, chunk_size=2000, row_group_size=50000):
+    """
+    The export as Parquet bytes. Each chunk of rows becomes an Arrow record
+    batch; batches are written out as a row group every `row_group_size`
+    rows, so memory is bounded by one row group. Needs pyarrow.
+    """
+    pa, pq = load_pyarrow()
+    schema = parquet_schema(pa)
+    sink = _Drain()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='zstd')
+    # The file's leading magic bytes, sent before the first row group is built
+    yield sink.take()
+    batches, pending = [], 0
+    for chunk in _chunks(rows, chunk_size):
+        columns = zip(*chunk)
+        batches.append(pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema,
+        ))
+        pending += len(chunk)
+        if pending >= row_group_size:
+            writer.write_table(pa.Table.from_batches(batches), row_group_size=pending)
+            batches, pending = [], 0
+            yield sink.take()
+    if batches:
+        writer.write_table(pa.Table.from_batches(batches), row_group_size=pending)
+    writer.close()
+    yield sink.take()
+
+
+def export_stream(fmt, rows, chunk_size=2000, row_group_size=50000):
+    """
+    Iterator of str/bytes chunks of `rows` in one of FORMATS.
+    """
+    if fmt == 'parquet':
+        return parquet_chunks(rows, chunk_size, row_group_size)
+    if fmt == 'csv.gz':
+        return gzip_chunks(csv_chunks(rows, chunk_size))
+    return csv_chunks(rows, chunk_size)
@@ -0,0 +1,295 @@
+#  backend/screenings/inference.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import cached_property
+
+import numpy as np
+
+from monitoring.metrics import span
+from .preprocessing import dequantize_output, quantize_input
+
+# Interpreter runtimes in order of preference. The first two ship only the
+# TFLite interpreter and import in a fraction of the time and memory that
+# the full tensorflow package needs.
+RUNTIMES = ('ai_edge_litert', 'tflite_runtime', 'tensorflow')
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def _import_runtime(name):
+    if name == 'ai_edge_litert':
+        from ai_edge_litert import interpreter as module
+        return module.Interpreter, module.OpResolverType
+    if name == 'tflite_runtime':
+        from tflite_runtime import interpreter as module
+        return module.Interpreter, module.OpResolverType
+    if name == 'tensorflow':
+        import tensorflow as tf
+        return tf.lite.Interpreter, tf.lite.experimental.OpResolverType
+    raise ValueError("Unknown inference runtime %r" % name)
+
+
+def load_runtime(preferred='auto'):
+    """
+    Import the interpreter runtime on first use and return
+    (name, Interpreter class, OpResolverType enum).
+    """
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                names = RUNTIMES if preferred == 'auto' else (preferred,)
+                for name in names:
+                    try:
+                        interpreter_class, resolver_type = _import_runtime(name)
+                    except ImportError:
+                        continue
+                    _runtime = (name, interpreter_class, resolver_type)
+                    break
+                else:
+                    raise ImportError(
+                        "No TFLite runtime found; install one of: %s" % ', '.join(names)
+                    )
+    return _runtime
+
+
+def summarize_prediction(prediction):
+    """
+    Turn the model's sigmoid output into the values stored on a Screening.
+    """
+    result = 'N' if prediction > 0.5 else 'P'
+    confidence = float(prediction if prediction > 0.5 else 1 - prediction)
+    parasite_count = int(confidence * 100)  # Example scaling logic
+    return result, confidence, parasite_count
+
+
+class InferenceBusy(Exception):
+    """
+    Raised when no interpreter or queue slot frees up in time.
+    """
+
+
+class PooledInterpreter:
+    """
+    One TFLite interpreter plus the bookkeeping needed to run batches on it.
+    Only ever used by the thread that checked it out of an InferenceEngine.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.interpreter.allocate_tensors()
+        self.input_details = interpreter.get_input_details()[0]
+        self.output_details = interpreter.get_output_details()[0]
+        self._allocated_size = int(self.input_details['shape'][0])
+
+    def run(self, inputs):
+        """
+        Run a float (N, H, W, C) batch and return the first output column as
+        floats, shape (N,). Integer-quantized models are handled transparently.
+        """
+        if inputs.shape[0] != self._allocated_size:
+            self.interpreter.resize_tensor_input(self.input_details['index'], inputs.shape)
+            self.interpreter.allocate_tensors()
+            self._allocated_size = inputs.shape[0]
+        self.interpreter.set_tensor(
+            self.input_details['index'], quantize_input(inputs, self.input_details)
+        )
+        with span('invoke'):
+            self.interpreter.invoke()
+        outputs = self.interpreter.get_tensor(self.output_details['index'])
+        outputs = dequantize_output(outputs, self.output_details)
+        return outputs.reshape(inputs.shape[0], -1)[:, 0]
+
+
+class InferenceEngine:
+    """
+    Owns a fixed pool of interpreters for one model file.
+
+    Each interpreter runs with `num_threads` intra-op threads, so a pool of
+    `pool_size` keeps roughly `pool_size * num_threads` cores busy. Callers
+    borrow an interpreter with `checkout()`; when all are in use they block
+    for up to `timeout` seconds and then get InferenceBusy.
+    """
+
+    def __init__(self, model_path, pool_size=1, num_threads=None, use_xnnpack=True,
+                 runtime='auto'):
+        self.model_path = model_path
+        self.runtime, self._interpreter_class, self._resolver_type = load_runtime(runtime)
+        self.pool_size = max(1, int(pool_size))
+        if num_threads is None:
+            num_threads = max(1, (os.cpu_count() or 1) // self.pool_size)
+        self.num_threads = int(num_threads)
+        self.use_xnnpack = use_xnnpack
+
+        interpreters = [PooledInterpreter(self._create_interpreter()) for _ in range(self.pool_size)]
+        # Read once here, so asking for it never waits for a busy interpreter
+        self.input_shape = tuple(int(dim) for dim in interpreters[0].input_details['shape'])
+        self._pool = queue.Queue(maxsize=self.pool_size)
+        for pooled in interpreters:
+            self._pool.put(pooled)
+
+    def _create_interpreter(self):
+        kwargs = {'model_path': self.model_path, 'num_threads': self.num_threads}
+        if not self.use_xnnpack:
+            # XNNPACK is applied by default; the plain builtin resolver skips it.
+            kwargs['experimental_op_resolver_type'] = (
+                self._resolver_type.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+            )
+        return self._interpreter_class(**kwargs)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        try:
+            pooled = self._pool.get(timeout=timeout)
+        except queue.Empty:
+            raise InferenceBusy("No interpreter became available within %ss" % timeout)
+        try:
+            yield pooled
+        finally:
+            self._pool.put(pooled)
+
+    @cached_property
+    def model_digest(self):
+        from .cache import file_digest
+
+        with open(self.model_path, 'rb') as model_file:
+            return file_digest(model_file)
+
+    def warm_up(self):
+        """
+        Run one throwaway image through every pooled interpreter so the first
+        real upload does not pay for tensor allocation.
+        """
+        shape = [1, *self.input_shape[1:]]
+        for _ in range(self.pool_size):
+            self.run(np.zeros(shape, dtype=np.float32))
+
+    def run(self, inputs, timeout=None):
+        with self.checkout(timeout=timeout) as pooled:
+            return pooled.run(np.asarray(inputs, dtype=np.float32))
+
+
+class BatchScheduler:
+    """
+    Collects preprocessed image tensors from concurrent requests and runs them
+    through an InferenceEngine in batches.
+
+    One worker thread per pooled interpreter drains the queue, so request
+    threads never touch an interpreter directly. A worker waits at most
+    `max_wait_ms` after the first queued image for others to arrive, and never
+    runs more than `max_batch_size` images per invoke. Once `max_queue` images
+    are waiting, submit() raises InferenceBusy instead of growing the backlog.
+    """
+
+    _STOP = object()
+
+    def __init__(self, engine, max_batch_size=16, max_wait_ms=5.0, max_queue=256):
+        self.engine = engine
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        # 0 means no limit. Enforced by submit() rather than by the queue, so
+        # close() can always add its stop markers without blocking
+        self.max_queue = max(0, int(max_queue))
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._closed = False
+
+    def submit(self, tensor):
+        """
+        Queue a single preprocessed image, shaped (H, W, C) or (1, H, W, C).
+        Returns a Future resolving to the model's raw output for that image.
+        """
+        tensor = np.asarray(tensor, dtype=np.float32)
+        if tensor.ndim == 4:
+            if tensor.shape[0] != 1:
+                raise ValueError("submit() takes one image; got a batch of %d" % tensor.shape[0])
+            tensor = tensor[0]
+
+        future = Future()
+        # Checked and queued under the lock close() takes, so nothing can be
+        # queued behind the workers' stop markers and never run
+        with self._lock:
+            if self._closed:
+                raise InferenceBusy("This model version has been retired")
+            if self.max_queue and self._queue.qsize() >= self.max_queue:
+                raise InferenceBusy("Inference queue is full (%d images waiting)" % self.max_queue)
+            self._start_workers()
+            self._queue.put_nowait((tensor, future))
+        return future
+
+    def predict(self, tensor, timeout=None):
+        return self.submit(tensor).result(timeout=timeout)
+
+    def close(self):
+        """
+        Stop the worker threads once every image queued so far is processed.
+        Returns at once, however long the backlog.
+        """
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put_nowait((self._STOP, None))
+
+    def _start_workers(self):
+        # Called with self._lock held
+        if not self._threads:
+            for i in range(self.engine.pool_size):
+                thread = threading.Thread(
+                    target=self._run, name='inference-batcher-%d' % i, daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _collect_batch(self):
+        """
+        Return (items, stop); `stop` is set once this worker's close() marker
+        has been taken off the queue.
+        """
+        item = self._queue.get()
+        if item[0] is self._STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            items, stop = self._collect_batch()
+            batch = [
+                (tensor, future) for tensor, future in items
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            tensors, futures = zip(*batch)
+
+            try:
+                outputs = self.engine.run(np.stack(tensors))
+            except Exception as exc:
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+
+            for future, output in zip(futures, outputs):
+                future.set_result(float(output))
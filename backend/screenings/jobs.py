@@ -0,0 +1,181 @@
+#  backend/screenings/jobs.py
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from monitoring.metrics import span
+from .models import Screening
+from .worker import infer_stored_image, init_worker
+
+logger = logging.getLogger(__name__)
+
+
+def complete_screening(screening_id, prediction=None, model_version='', error=None, renditions=None):
+    """
+    Store the outcome of a job on its Screening row.
+    """
+    screening = Screening.objects.get(pk=screening_id)
+    if error is not None:
+        logger.error("Screening #%s inference failed: %s", screening_id, error)
+        screening.status = Screening.STATUS_FAILED
+        with span('db_save'):
+            screening.save(update_fields=['status', 'updated_at'])
+        return screening
+
+    screening.result, screening.confidence, screening.parasite_count = prediction
+    screening.model_version = model_version
+    screening.status = Screening.STATUS_COMPLETED
+    renditions = renditions or {}
+    for field, name in renditions.items():
+        getattr(screening, field).name = name
+    with span('db_save'):
+        screening.save(update_fields=[
+            'result', 'confidence', 'parasite_count', 'model_version', 'status', 'updated_at', *renditions,
+        ])
+    return screening
+
+
+def process_screening(screening_id):
+    """
+    Run a pending screening's inference in the current process.
+    """
+    screening = Screening.objects.get(pk=screening_id)
+    try:
+        prediction, label, renditions = infer_stored_image(screening.image.name, screening.model_version)
+    except Exception as e:
+        return complete_screening(screening_id, error=e)
+    return complete_screening(screening_id, prediction=prediction, model_version=label, renditions=renditions)
+
+
+class LocalJobQueue:
+    """
+    Runs inference in a pool of worker processes owned by this web process.
+
+    No broker is involved: jobs live only in memory, so anything still queued
+    when the web process exits stays pending until `run_screening_worker
+    --once` picks it up.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=init_worker,
+                    )
+        return self._executor
+
+    def enqueue(self, screening):
+        try:
+            future = self._submit(screening)
+        except Exception as e:
+            # Runs after the upload has committed: fail the job, not the request
+            logger.exception("Screening #%s could not be queued", screening.pk)
+            complete_screening(screening.pk, error=e)
+            return
+        future.add_done_callback(lambda f, pk=screening.pk: self._finish(pk, f))
+
+    def _submit(self, screening):
+        executor = self.executor
+        try:
+            return executor.submit(infer_stored_image, screening.image.name, screening.model_version)
+        except BrokenProcessPool:
+            # A worker died, which breaks the pool for good: start a new one
+            logger.warning("Screening worker pool is broken; starting a new one")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return self.executor.submit(infer_stored_image, screening.image.name, screening.model_version)
+
+    def _finish(self, screening_id, future):
+        try:
+            error = future.exception()
+            if error is None:
+                prediction, label, renditions = future.result()
+                complete_screening(
+                    screening_id, prediction=prediction, model_version=label, renditions=renditions
+                )
+            else:
+                complete_screening(screening_id, error=error)
+        finally:
+            # Callbacks run on the executor's management thread
+            close_old_connections()
+
+
+class DatabaseJobQueue:
+    """
+    Leaves screenings pending in the database for `manage.py
+    run_screening_worker` processes to claim. Survives web restarts and
+    spreads work across hosts. A job whose worker died is retaken once its
+    claim is older than SCREENING_JOB_LEASE seconds.
+    """
+
+    def enqueue(self, screening):
+        pass
+
+    @staticmethod
+    def claim(limit=1):
+        """
+        Mark up to `limit` pending screenings as processing and return their
+        ids, topped up with processing ones whose lease has run out.
+        Concurrent workers skip rows another worker has locked.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                Screening.objects.select_for_update(skip_locked=True)
+                .filter(status=Screening.STATUS_PENDING)
+                .order_by('created_at')
+                .values_list('id', flat=True)[:limit]
+            )
+            if len(ids) < limit:
+                ids += list(
+                    Screening.objects.select_for_update(skip_locked=True)
+                    .filter(status=Screening.STATUS_PROCESSING,
+                            claimed_at__lt=now - timedelta(seconds=settings.SCREENING_JOB_LEASE))
+                    .order_by('claimed_at')
+                    .values_list('id', flat=True)[:limit - len(ids)]
+                )
+            Screening.objects.filter(id__in=ids).update(status=Screening.STATUS_PROCESSING, claimed_at=now)
+        return ids
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if settings.SCREENING_JOB_BACKEND == 'db':
+                    _queue = DatabaseJobQueue()
+                else:
+                    _queue = LocalJobQueue(max_workers=settings.SCREENING_JOB_WORKERS)
+    return _queue
+
+
+def enqueue_screening(screening):
+    """
+    Queue inference for a screening saved in the pending state. The job is
+    handed over only after the surrounding transaction commits.
+    """
+    transaction.on_commit(lambda: get_job_queue().enqueue(screening))
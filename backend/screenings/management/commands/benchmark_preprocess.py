@@ -0,0 +1,90 @@
+#  backend/screenings/management/commands/benchmark_preprocess.py
+
+import io
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from screenings.preprocessing import preprocess_batch, preprocess_image
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff'}
+
+
+def legacy_preprocess(image_file):
+    # The pipeline ScreeningUploadView used before screenings.preprocessing.
+    img = Image.open(image_file).convert('RGB')
+    img = img.resize((128, 128))
+    img_array = np.array(img) / 255.0
+    return np.expand_dims(img_array, axis=0).astype(np.float32)
+
+
+def synthetic_smears(count, width, height):
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(pixels).save(buf, 'JPEG', quality=90)
+        images.append(buf.getvalue())
+    return images
+
+
+class Command(BaseCommand):
+    help = "Compare ms/image and peak allocation of the legacy and current preprocessing pipelines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help="Image files or directories of sample smears.")
+        parser.add_argument('--synthetic', type=int, default=8,
+                            help="Number of generated JPEGs to use when no paths are given.")
+        parser.add_argument('--size', default='4032x3024',
+                            help="WIDTHxHEIGHT of generated JPEGs (default: 12 MP phone photo).")
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def load_images(self, options):
+        files = []
+        for path in map(Path, options['paths']):
+            if path.is_dir():
+                files.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES))
+            elif path.is_file():
+                files.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+        if files:
+            return [p.read_bytes() for p in files]
+
+        try:
+            width, height = (int(v) for v in options['size'].lower().split('x'))
+        except ValueError:
+            raise CommandError("--size must look like 4032x3024")
+        self.stdout.write(f"Generating {options['synthetic']} synthetic {width}x{height} JPEGs...")
+        return synthetic_smears(options['synthetic'], width, height)
+
+    def measure(self, fn, images, repeat):
+        best = None
+        peak = 0
+        for _ in range(repeat):
+            files = [io.BytesIO(data) for data in images]
+            tracemalloc.start()
+            start = time.perf_counter()
+            fn(files)
+            elapsed = time.perf_counter() - start
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000 / len(images), peak
+
+    def handle(self, *args, **options):
+        images = self.load_images(options)
+        pipelines = [
+            ('legacy per-image', lambda files: [legacy_preprocess(f) for f in files]),
+            ('current per-image', lambda files: [preprocess_image(f) for f in files]),
+            ('current batch', preprocess_batch),
+        ]
+        self.stdout.write(f"{'pipeline':<20} {'ms/image':>10} {'peak numpy alloc':>18}")
+        for label, fn in pipelines:
+            ms_per_image, peak = self.measure(fn, images, options['repeat'])
+            self.stdout.write(f"{label:<20} {ms_per_image:10.2f} {peak / 1024:15.1f} KB")
@@ -0,0 +1,69 @@
+#  backend/screenings/management/commands/benchmark_startup.py
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Each scenario runs in a fresh interpreter so module caches do not leak
+# between measurements. The probe prints wall time and peak RSS as JSON.
+PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+import malaria_api.urls
+{extra}
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+except ImportError:
+    rss_kb = None
+print(json.dumps({{'seconds': elapsed, 'rss_kb': rss_kb}}))
+"""
+
+SCENARIOS = [
+    ('lazy (URLconf only)', ''),
+    ('eager tensorflow import', 'import tensorflow'),
+    ('eager model load', 'from screenings.registry import warm_up; warm_up()'),
+]
+
+
+class Command(BaseCommand):
+    help = "Measure Django boot time and peak RSS with and without loading the screening model."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per scenario; the best is reported.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, INFERENCE_WARMUP='False')
+        rows = []
+        for label, extra in SCENARIOS:
+            best = None
+            for _ in range(options['repeat']):
+                proc = subprocess.run(
+                    [sys.executable, '-c', PROBE.format(extra=extra)],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+                )
+                if proc.returncode != 0:
+                    best = None
+                    error = proc.stderr.strip().splitlines()[-1:] or ['failed']
+                    break
+                sample = json.loads(proc.stdout.strip().splitlines()[-1])
+                if best is None or sample['seconds'] < best['seconds']:
+                    best = sample
+            if best is None:
+                self.stdout.write(f"{label:<26} skipped: {error[0]}")
+                continue
+            rows.append((label, best))
+            rss = f"{best['rss_kb'] / 1024:.1f} MB" if best['rss_kb'] else 'n/a'
+            self.stdout.write(f"{label:<26} {best['seconds'] * 1000:8.1f} ms   peak RSS {rss}")
+
+        if rows:
+            self.stdout.write(json.dumps({label: sample for label, sample in rows}))
@@ -0,0 +1,52 @@
+#  backend/screenings/management/commands/export_screenings.py
+
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from screenings.export import FORMATS, export_filename, export_queryset, export_stream, load_pyarrow
+from screenings.serializers import ExportQuerySerializer
+
+
+class Command(BaseCommand):
+    help = "Export screenings with patient demographics as CSV, gzipped CSV or Parquet, streamed to a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--output', help="File to write, or - for stdout. Defaults to a dated name here.")
+        parser.add_argument('--start', help="First day, YYYY-MM-DD.")
+        parser.add_argument('--end', help="Last day, YYYY-MM-DD.")
+        parser.add_argument('--result', help="Comma-separated result codes (P, N, I).")
+        parser.add_argument('--chunk-size', type=int, default=settings.SCREENING_EXPORT_CHUNK_SIZE,
+                            help="Rows fetched from the database at a time.")
+
+    def handle(self, *args, **options):
+        params = ExportQuerySerializer(data={
+            name: options[name] for name in ('start', 'end', 'result') if options[name]
+        })
+        if not params.is_valid():
+            raise CommandError(params.errors)
+        start, end = params.validated_data.get('start'), params.validated_data.get('end')
+        fmt = options['format']
+        if fmt == 'parquet':
+            try:
+                load_pyarrow()
+            except ImportError as e:
+                raise CommandError(str(e))
+
+        rows = export_queryset(start, end, params.validated_data.get('result'))
+        chunks = export_stream(fmt, rows, options['chunk_size'], settings.SCREENING_EXPORT_ROW_GROUP_SIZE)
+        path = options['output'] or export_filename(fmt, start, end)
+        out = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        written = 0
+        try:
+            for chunk in chunks:
+                data = chunk.encode() if isinstance(chunk, str) else chunk
+                out.write(data)
+                written += len(data)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        if path != '-':
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {path}."))
@@ -0,0 +1,32 @@
+#  backend/screenings/management/commands/generate_screening_renditions.py
+
+from django.core.management.base import BaseCommand
+
+from screenings.models import Screening
+from screenings.renditions import renditions_for
+
+
+class Command(BaseCommand):
+    help = "Make thumbnail and medium renditions for screenings uploaded before they existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=100, help="Screenings fetched per query.")
+
+    def handle(self, *args, **options):
+        made = skipped = 0
+        screenings = Screening.objects.filter(thumbnail='').exclude(image='').only('id', 'image')
+        for screening in screenings.iterator(chunk_size=options['batch']):
+            try:
+                with screening.image.open('rb') as image_file:
+                    files = renditions_for(image_file)
+            except OSError as e:
+                self.stderr.write(f"Screening #{screening.id}: {e}")
+                files = {}
+            if not files:
+                skipped += 1
+                continue
+            for field, content in files.items():
+                getattr(screening, field).save(content.name, content, save=False)
+            screening.save(update_fields=[*files, 'updated_at'])
+            made += 1
+        self.stdout.write(self.style.SUCCESS(f"Made renditions for {made} screening(s); skipped {skipped}."))
@@ -0,0 +1,32 @@
+#  backend/screenings/management/commands/run_screening_worker.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from screenings.jobs import DatabaseJobQueue, process_screening
+
+
+class Command(BaseCommand):
+    help = "Run inference for pending screenings (SCREENING_JOB_BACKEND = 'db')."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=8, help="Screenings claimed per poll.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once no pending screenings remain.")
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            ids = DatabaseJobQueue.claim(limit=options['batch'])
+            for screening_id in ids:
+                screening = process_screening(screening_id)
+                processed += 1
+                self.stdout.write(f"Screening #{screening_id}: {screening.status}")
+            if not ids:
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} screening(s)."))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("screenings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="screening",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("completed", "Completed"),
+                    ("failed", "Failed"),
+                ],
+                default="completed",
+                max_length=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="screening",
+            name="confidence",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="screening",
+            name="parasite_count",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="screening",
+            name="result",
+            field=models.CharField(
+                blank=True,
+                choices=[("P", "Positive"), ("N", "Negative"), ("I", "Inconclusive")],
+                max_length=1,
+            ),
+        ),
+    ]
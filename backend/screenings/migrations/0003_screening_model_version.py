@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("screenings", "0002_screening_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="screening",
+            name="model_version",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0002_patient_indexes"),
+        ("screenings", "0003_screening_model_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="screening",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="screening_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="screening",
+            index=models.Index(
+                fields=["patient", "-created_at", "-id"],
+                name="screening_patient_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="screening",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["created_at"],
+                name="screening_pending_idx",
+            ),
+        ),
+        # The composite index above covers lookups by this column; drop the
+        # FK's own index only once it exists
+        migrations.AlterField(
+            model_name="screening",
+            name="patient",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="screenings",
+                to="patients.patient",
+            ),
+        ),
+    ]
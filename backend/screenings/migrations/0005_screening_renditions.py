@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("screenings", "0004_screening_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="screening",
+            name="medium",
+            field=models.ImageField(blank=True, upload_to="screenings/"),
+        ),
+        migrations.AddField(
+            model_name="screening",
+            name="thumbnail",
+            field=models.ImageField(blank=True, upload_to="screenings/"),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    Screening = apps.get_model("screenings", "Screening")
+    Screening.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("screenings", "0005_screening_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="screening",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
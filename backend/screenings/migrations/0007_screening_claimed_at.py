@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:26
+
+from django.db import migrations, models
+
+
+def date_existing_claims(apps, schema_editor):
+    # Rows left processing before claims had a time are retaken after one lease
+    Screening = apps.get_model("screenings", "Screening")
+    Screening.objects.filter(status="processing").update(claimed_at=models.F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0004_patient_updated_at"),
+        ("screenings", "0006_screening_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="screening",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="screening",
+            index=models.Index(
+                condition=models.Q(("status", "processing")),
+                fields=["claimed_at"],
+                name="screening_processing_idx",
+            ),
+        ),
+        migrations.RunPython(date_existing_claims, migrations.RunPython.noop),
+    ]
@@ -5,14 +5,54 @@ from patients.models import Patient
 
 class Screening(models.Model):
     RESULT_CHOICES = [('P', 'Positive'), ('N', 'Negative'), ('I', 'Inconclusive')]
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
     
-    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='screenings')
+    # Indexed through screening_patient_created_idx below
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='screenings', db_index=False)
     image = models.ImageField(upload_to='screenings/')
-    result = models.CharField(max_length=1, choices=RESULT_CHOICES)
-    parasite_count = models.PositiveIntegerField()
-    confidence = models.FloatField()
+    # Downscaled WebP/JPEG copies for list views, stored next to the original
+    thumbnail = models.ImageField(upload_to='screenings/', blank=True)
+    medium = models.ImageField(upload_to='screenings/', blank=True)
+    # result, parasite_count and confidence stay empty until an async job completes
+    result = models.CharField(max_length=1, choices=RESULT_CHOICES, blank=True)
+    parasite_count = models.PositiveIntegerField(null=True, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_COMPLETED)
+    model_version = models.CharField(max_length=64, blank=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # When a run_screening_worker took the job; see DatabaseJobQueue.claim
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Listings and date-range analytics, keyset-paginated newest first
+            models.Index(fields=['-created_at', '-id'], name='screening_created_idx'),
+            # One patient's history
+            models.Index(fields=['patient', '-created_at', '-id'], name='screening_patient_created_idx'),
+            # Job queue: the few pending rows, oldest first
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status='pending'),
+                name='screening_pending_idx',
+            ),
+            # Job queue: claims whose worker may have died, oldest claim first
+            models.Index(
+                fields=['claimed_at'],
+                condition=models.Q(status='processing'),
+                name='screening_processing_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"Screening #{self.id} - {self.get_result_display()}"
\ No newline at end of file
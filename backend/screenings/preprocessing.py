@@ -0,0 +1,95 @@
+#  backend/screenings/preprocessing.py
+
+import math
+
+import numpy as np
+from PIL import Image
+
+from monitoring.metrics import span
+
+INPUT_SIZE = (128, 128)   # (width, height) the models were trained on
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+def decode_image(image_file, size=INPUT_SIZE, longest_side=0):
+    """
+    Open an image as RGB, letting the JPEG decoder downscale on the fly.
+
+    draft() picks the largest DCT scale (1/2, 1/4 or 1/8) that still leaves
+    the image at least `size`, so a 12 MP phone photo is decoded at a
+    fraction of the cost and memory. Other formats are decoded in full.
+    With `longest_side`, the image is also kept at least that long on its
+    longer side, so renditions can be made from the same decode.
+    """
+    with span('decode'):
+        img = Image.open(image_file)
+        width, height = img.size
+        scale = min(1.0, longest_side / max(width, height))
+        img.draft('RGB', (max(size[0], math.ceil(width * scale)), max(size[1], math.ceil(height * scale))))
+        # Decoded here rather than lazily by whatever touches the pixels first
+        img.load()
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+    return img
+
+
+def to_tensor(img, out=None, size=INPUT_SIZE):
+    """
+    Resize a decoded RGB image and write it, scaled to [0, 1], into `out`.
+
+    `out` is a float32 array of shape (H, W, 3), typically a row of a batch
+    buffer; a new one is allocated when omitted.
+    """
+    with span('preprocess'):
+        if img.size != size:
+            img = img.resize(size, Image.BICUBIC, reducing_gap=3.0)
+        if out is None:
+            out = np.empty((size[1], size[0], 3), dtype=np.float32)
+        np.multiply(np.asarray(img), _SCALE, out=out)
+    return out
+
+
+def preprocess_image(image_file, out=None, size=INPUT_SIZE):
+    """
+    Decode one uploaded image into a float32 (H, W, 3) model input.
+    """
+    return to_tensor(decode_image(image_file, size), out=out, size=size)
+
+
+def preprocess_batch(image_files, size=INPUT_SIZE):
+    """
+    Decode many images into one contiguous float32 (N, H, W, 3) array.
+    """
+    batch = np.empty((len(image_files), size[1], size[0], 3), dtype=np.float32)
+    for i, image_file in enumerate(image_files):
+        preprocess_image(image_file, out=batch[i], size=size)
+    return batch
+
+
+def quantize_input(batch, details):
+    """
+    Convert a float batch to an integer-input model's dtype using the input
+    tensor's (scale, zero_point). Float models get the batch back unchanged.
+    """
+    dtype = details['dtype']
+    if not np.issubdtype(dtype, np.integer):
+        return batch
+    scale, zero_point = details['quantization']
+    info = np.iinfo(dtype)
+    quantized = np.empty(batch.shape, dtype=np.float32)
+    np.divide(batch, np.float32(scale), out=quantized)
+    quantized += np.float32(zero_point)
+    np.rint(quantized, out=quantized)
+    np.clip(quantized, info.min, info.max, out=quantized)
+    return quantized.astype(dtype)
+
+
+def dequantize_output(output, details):
+    """
+    Map an integer-output model's raw values back to floats.
+    """
+    if not np.issubdtype(details['dtype'], np.integer):
+        return output
+    scale, zero_point = details['quantization']
+    return (output.astype(np.float32) - np.float32(zero_point)) * np.float32(scale)
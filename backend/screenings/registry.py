@@ -0,0 +1,277 @@
+#  backend/screenings/registry.py
+
+import logging
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .inference import BatchScheduler, InferenceEngine
+
+logger = logging.getLogger(__name__)
+
+# Shared through Django's cache so an admin reload or traffic change made on
+# one worker process reaches the others at their next refresh. Each change
+# gets the next generation number from an atomic counter and is stored under
+# its own key, so concurrent changes cannot overwrite one another.
+GENERATION_CACHE_KEY = 'screening-model-registry-generation'
+STATE_CACHE_KEY = 'screening-model-registry'
+
+
+def state_key(generation):
+    return f'{STATE_CACHE_KEY}:{generation}'
+
+
+class ModelLoadError(Exception):
+    """
+    A model version could not be loaded; the copy already loaded, if any,
+    keeps serving.
+    """
+
+
+class ModelVersion:
+    """
+    One loaded model file: its interpreter pool and batching scheduler.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.engine = InferenceEngine(
+            path,
+            pool_size=settings.INFERENCE_POOL_SIZE,
+            num_threads=settings.INFERENCE_NUM_THREADS,
+            use_xnnpack=settings.INFERENCE_USE_XNNPACK,
+            runtime=settings.INFERENCE_RUNTIME,
+        )
+        self.scheduler = BatchScheduler(
+            self.engine,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            max_queue=settings.INFERENCE_MAX_QUEUE,
+        )
+        self.loaded_at = time.time()
+
+    @property
+    def digest(self):
+        return self.engine.model_digest
+
+    @property
+    def label(self):
+        """
+        What a Screening records as its model_version, e.g. "cnn-v1@3fa2b9c0".
+        """
+        return f"{self.name}@{self.digest[:8]}"
+
+    def retire(self):
+        # Give requests that already hold this version time to finish.
+        timer = threading.Timer(settings.INFERENCE_RETIRE_GRACE, self.scheduler.close)
+        timer.daemon = True
+        timer.start()
+
+
+class ModelRegistry:
+    """
+    The process-wide set of servable model versions.
+
+    Each configured file is loaded once, on first use, and shared by every
+    request. A version is swapped for a freshly loaded copy, without
+    blocking requests, when its file changes on disk or when an admin
+    publishes a reload; if the new copy fails to load, the old one stays.
+    route() spreads traffic across versions by weight.
+    """
+
+    def __init__(self, models, default, traffic=None):
+        if default not in models:
+            raise ValueError(f"INFERENCE_DEFAULT_MODEL {default!r} is not in INFERENCE_MODELS")
+        self.paths = dict(models)
+        self.default = default
+        self.traffic = self._clean_traffic(traffic or {})
+        self.generation = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self._checked_at = time.monotonic()
+
+    def _clean_traffic(self, traffic):
+        unknown = set(traffic) - set(self.paths)
+        if unknown:
+            raise ValueError(f"Unknown model version(s) in traffic split: {', '.join(sorted(unknown))}")
+        return {name: int(weight) for name, weight in traffic.items() if int(weight) > 0}
+
+    def get(self, name=None):
+        """
+        Return the loaded version called `name` (the default when omitted
+        or no longer configured), loading it if needed.
+        """
+        self._maybe_refresh()
+        if name not in self.paths:
+            name = self.default
+        version = self._versions.get(name)
+        if version is None:
+            with self._lock:
+                version = self._versions.get(name)
+                if version is None:
+                    version = ModelVersion(name, self.paths[name])
+                    self._versions[name] = version
+        return version
+
+    def route_name(self):
+        """
+        Pick the version name that serves the next request according to the
+        traffic split; everything goes to the default without one.
+        """
+        self._maybe_refresh()
+        traffic = self.traffic
+        if not traffic:
+            return self.default
+        names = list(traffic)
+        return random.choices(names, weights=[traffic[n] for n in names])[0]
+
+    def route(self):
+        return self.get(self.route_name())
+
+    def reload(self, name=None):
+        """
+        Load a fresh copy of one version (or every loaded one) and swap it in.
+        The old copy keeps serving until the swap and is retired afterwards.
+        """
+        names = [name] if name else list(self._versions)
+        for version_name in names:
+            try:
+                fresh = ModelVersion(version_name, self.paths[version_name])
+                fresh.engine.warm_up()
+            except Exception as e:
+                raise ModelLoadError(f"Could not load model {version_name}: {e}") from e
+            with self._lock:
+                old = self._versions.get(version_name)
+                self._versions[version_name] = fresh
+            if old is not None:
+                old.retire()
+            logger.info("Loaded model %s from %s", fresh.label, fresh.path)
+
+    def publish(self, reload=None, traffic=None):
+        """
+        Apply a reload and/or traffic change here and announce it to the
+        other worker processes through the shared cache. `reload` is a
+        version name, or '*' for every loaded version.
+
+        Nothing is applied or announced when the traffic split is invalid
+        (ValueError or TypeError) or the reload fails (ModelLoadError).
+        """
+        if traffic is not None:
+            traffic = self._clean_traffic(traffic)
+        if reload:
+            self.reload(None if reload == '*' else reload)
+        if traffic is not None:
+            self.traffic = traffic
+
+        cache.add(GENERATION_CACHE_KEY, 0, timeout=None)
+        generation = cache.incr(GENERATION_CACHE_KEY)
+        cache.set(state_key(generation), {'reload': reload, 'traffic': self.traffic}, timeout=None)
+        # Changes published in between by other processes are still to be applied
+        if self.generation == generation - 1:
+            self.generation = generation
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < settings.INFERENCE_MODEL_WATCH_INTERVAL:
+            return
+        # One refresh at a time, off the request thread: loading and warming
+        # up a model is slow, and a failure must not reach the request.
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        self._checked_at = now
+        try:
+            self._refresh_thread = threading.Thread(target=self._refresh, name='model-refresh', daemon=True)
+            self._refresh_thread.start()
+        except BaseException:
+            self._refresh_lock.release()
+            raise
+
+    def _refresh(self):
+        try:
+            latest = cache.get(GENERATION_CACHE_KEY) or 0
+            if latest > self.generation:
+                keys = [state_key(generation) for generation in range(self.generation + 1, latest + 1)]
+                states = cache.get_many(keys)
+                self.generation = latest
+                reloads = set()
+                for key in keys:
+                    if key in states:
+                        self.traffic = states[key]['traffic']
+                        reloads.add(states[key]['reload'])
+                if '*' in reloads:
+                    self._try_reload(None)
+                else:
+                    for name in reloads - {None}:
+                        self._try_reload(name)
+
+            for name, version in list(self._versions.items()):
+                try:
+                    changed = os.path.getmtime(self.paths[name]) != version.mtime
+                except OSError:
+                    continue
+                if changed:
+                    # Retried at the next check while the file still differs
+                    self._try_reload(name)
+        except Exception:
+            logger.exception("Model refresh failed")
+        finally:
+            self._refresh_lock.release()
+
+    def _try_reload(self, name):
+        try:
+            self.reload(name)
+        except Exception:
+            logger.exception("Could not reload model %s; the current copy keeps serving", name or '(all loaded)')
+
+    def describe(self):
+        total = sum(self.traffic.values())
+        rows = []
+        for name, path in self.paths.items():
+            version = self._versions.get(name)
+            if self.traffic:
+                share = self.traffic.get(name, 0) / total
+            else:
+                share = 1.0 if name == self.default else 0.0
+            rows.append({
+                'name': name,
+                'path': path,
+                'default': name == self.default,
+                'traffic': share,
+                'loaded': version is not None,
+                'version': version.label if version else None,
+                'runtime': version.engine.runtime if version else None,
+            })
+        return rows
+
+    def warm_up(self):
+        for name in set(self.traffic) | {self.default}:
+            self.get(name).engine.warm_up()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(
+                    settings.INFERENCE_MODELS,
+                    settings.INFERENCE_DEFAULT_MODEL,
+                    settings.INFERENCE_TRAFFIC_SPLIT,
+                )
+    return _registry
+
+
+def warm_up():
+    get_registry().warm_up()
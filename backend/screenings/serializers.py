@@ -2,6 +2,8 @@
 
 from patients.models import Patient
 from rest_framework import serializers
+from malaria_api.serializers import SparseFieldsetMixin
+from .export import FORMATS
 from .models import Screening
 
 class PatientBasicSerializer(serializers.ModelSerializer):
@@ -12,9 +14,12 @@ class ScreeningSerializer(serializers.ModelSerializer):
     class Meta:
         model = Screening
         fields = '__all__'
-        read_only_fields = ('result', 'parasite_count', 'confidence')
+        read_only_fields = (
+            'result', 'parasite_count', 'confidence', 'status', 'model_version', 'thumbnail', 'medium',
+        )
 
-class ScreeningGetSerializer(serializers.ModelSerializer):
+class ScreeningGetSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Left out (and not joined) when ?fields= does not name it
     patient = PatientBasicSerializer(read_only=True)
 
     class Meta:
@@ -23,9 +28,36 @@ class ScreeningGetSerializer(serializers.ModelSerializer):
             'id',
             'patient',
             'image',
+            'thumbnail',
+            'medium',
             'result',
             'parasite_count',
             'confidence',
             'notes',
+            'status',
+            'model_version',
             'created_at',
-        ]
\ No newline at end of file
+        ]
+
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the export endpoint. Without a range every
+    screening is exported. `output` rather than `format`, which DRF
+    reserves for content negotiation.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    result = serializers.CharField(required=False)       # comma-separated P, N, I
+    output = serializers.ChoiceField(choices=list(FORMATS), default='csv')
+
+    def validate_result(self, value):
+        results = {item.strip().upper() for item in value.split(',') if item.strip()}
+        unknown = results - {code for code, _ in Screening.RESULT_CHOICES}
+        if unknown:
+            raise serializers.ValidationError(f"Unknown result codes: {', '.join(sorted(unknown))}.")
+        return sorted(results)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': "start must not be after end."})
+        return attrs
@@ -0,0 +1,9 @@
+#  backend/screenings/signals.py
+
+from django.dispatch import Signal
+
+# Sent after Screening.objects.bulk_create(), which skips post_save.
+# Receivers get `screenings`, the list of created Screening instances.
+# Queryset update() sends nothing: after changing `result` that way, run
+# `manage.py backfill_screening_stats` to recount the analytics rollup.
+screenings_bulk_created = Signal()
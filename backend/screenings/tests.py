@@ -1,3 +1,706 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import os
+import json
+import tarfile
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import numpy as np
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from malaria_api.caching import LRUBackend
+from patients.models import Patient
+from tests.utils import QueryPlanTestCase, postgres_only, seed_clinic
+from .cache import InferenceResultCache
+from .jobs import DatabaseJobQueue, LocalJobQueue
+from .inference import BatchScheduler, InferenceBusy, InferenceEngine
+from .models import Screening
+from .registry import GENERATION_CACHE_KEY, ModelLoadError, ModelRegistry
+from .renditions import renditions_for
+
+
+class ScreeningQueryTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_clinic()[0]
+        cls.patient = cls.user.patient_set.first()
+        cls.pending = Screening.objects.create(
+            patient=cls.patient, image='screenings/seed.jpg', status=Screening.STATUS_PENDING
+        )
+
+    def test_list_pages_cost_one_query(self):
+        response, queries = self.capture('/api/screenings/screenings/', self.user)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(response.data['results']), 50)
+
+        response, queries = self.capture(response.data['next'], self.user)
+        self.assertEqual(len(queries), 1)
+
+    def test_fields_leaves_out_unrequested_fields(self):
+        response, _ = self.capture('/api/screenings/screenings/?fields=id,result,created_at', self.user)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'result', 'created_at'})
+
+        # Unknown names are ignored
+        response, _ = self.capture('/api/screenings/screenings/?fields=id,patient,nope', self.user)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'patient'})
+
+    def test_patient_is_nested_unless_left_out(self):
+        url = f'/api/screenings/screenings/patient/{self.patient.id}/'
+        response, nested = self.capture(url, self.user)
+        patient = response.data['results'][0]['patient']
+        self.assertEqual((patient['id'], patient['first_name']), (self.patient.id, self.patient.first_name))
+
+        # The patient is joined, not fetched row by row, and only when it is shown
+        response, plain = self.capture(f'{url}?fields=id,result', self.user)
+        self.assertNotIn('patient', response.data['results'][0])
+        self.assertEqual(len(nested), len(plain))
+        self.assertNotIn('patients_patient', plain[0])
+        self.assertIn('patients_patient', nested[0])
+        _, nested = self.capture('/api/screenings/screenings/', self.user)
+        _, plain = self.capture('/api/screenings/screenings/?fields=id,result', self.user)
+        self.assertEqual(len(nested), len(plain))
+
+    def test_patient_history_costs_one_query(self):
+        response, queries = self.capture(f'/api/screenings/screenings/patient/{self.patient.id}/', self.user)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(response.data['results']), 6)
+
+    @postgres_only
+    def test_list_uses_created_at_index(self):
+        response, queries = self.capture('/api/screenings/screenings/', self.user)
+        self.assertIndexScans(queries, 'screenings_screening', 'screening_created_idx')
+        _, queries = self.capture(response.data['next'], self.user)
+        self.assertIndexScans(queries, 'screenings_screening', 'screening_created_idx')
+
+    @postgres_only
+    def test_patient_history_uses_patient_index(self):
+        _, queries = self.capture(f'/api/screenings/screenings/patient/{self.patient.id}/', self.user)
+        self.assertIndexScans(queries, 'screenings_screening', 'screening_patient_created_idx')
+
+    @postgres_only
+    def test_job_claim_uses_pending_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(DatabaseJobQueue.claim(limit=5), [self.pending.id])
+        sqls = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertIndexScans([sql for sql in sqls if "'pending'" in sql], 'screenings_screening',
+                              'screening_pending_idx')
+        self.assertIndexScans([sql for sql in sqls if "'processing'" in sql], 'screenings_screening',
+                              'screening_processing_idx')
+
+
+class ScreeningJobQueueTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user('clinician', 'clinician@example.org', 'pw')
+        patient = Patient.objects.create(created_by=user, first_name='Abebe', last_name='Kebede', gender='M',
+                                         birth_date='1990-01-01', address='Bahir Dar', phone='0922334455')
+        self.screening = Screening.objects.create(
+            patient=patient, image='screenings/seed.jpg', status=Screening.STATUS_PENDING
+        )
+
+    def test_claim_retakes_jobs_whose_lease_ran_out(self):
+        self.assertEqual(DatabaseJobQueue.claim(), [self.screening.id])
+        self.assertEqual(DatabaseJobQueue.claim(), [])
+        # The worker died mid-job
+        Screening.objects.filter(pk=self.screening.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=settings.SCREENING_JOB_LEASE + 1)
+        )
+        self.assertEqual(DatabaseJobQueue.claim(), [self.screening.id])
+        self.assertEqual(Screening.objects.get().status, Screening.STATUS_PROCESSING)
+
+    def test_local_queue_replaces_a_broken_pool(self):
+        done = Future()
+        done.set_result((('N', 0.9, 0), 'v1', {}))
+        broken, fresh = mock.Mock(), mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool('A process in the process pool was terminated abruptly')
+        fresh.submit.return_value = done
+        # The finished job is stored on this thread, inside the test's transaction
+        with mock.patch('screenings.jobs.ProcessPoolExecutor', side_effect=[broken, fresh]), \
+                mock.patch('screenings.jobs.close_old_connections'), self.assertLogs('screenings.jobs', 'WARNING'):
+            LocalJobQueue(max_workers=1).enqueue(self.screening)
+        broken.shutdown.assert_called_once_with(wait=False)
+        self.assertEqual(Screening.objects.get().status, Screening.STATUS_COMPLETED)
+
+    def test_local_queue_fails_the_job_when_no_pool_starts(self):
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool('A process in the process pool was terminated abruptly')
+        with mock.patch('screenings.jobs.ProcessPoolExecutor', return_value=broken), \
+                self.assertLogs('screenings.jobs', 'ERROR'):
+            LocalJobQueue(max_workers=1).enqueue(self.screening)
+        self.assertEqual(Screening.objects.get().status, Screening.STATUS_FAILED)
+
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class ScreeningExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            username='ministry', email='ministry@example.org', password='password', is_staff=True,
+        )
+        cls.clinician = CustomUser.objects.create_user(
+            username='clinician', email='clinician@example.org', password='password',
+        )
+        patient = Patient.objects.create(
+            created_by=cls.clinician, first_name='Abebe', last_name='Kebede', gender='M',
+            birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+        )
+        for day, result in ((1, 'P'), (2, 'N'), (3, 'P'), (4, 'I')):
+            screening = Screening.objects.create(patient=patient, image='screenings/seed.jpg', result=result)
+            Screening.objects.filter(id=screening.id).update(
+                created_at=datetime(2025, 3, day, 12, tzinfo=dt_timezone.utc)
+            )
+
+    def export(self, query):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(f'/api/screenings/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export_streams_filtered_rows_without_names(self):
+        response, content = self.export('start=2025-03-02&end=2025-03-04&result=P,I')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('screenings-2025-03-02-2025-03-04.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual([row['result'] for row in rows], ['P', 'I'])
+        self.assertEqual(rows[0]['patient_age'], '34')
+        self.assertEqual(rows[0]['patient_address'], 'Bahir Dar')
+        self.assertNotIn('Abebe', content.decode())
+
+        self.client.force_authenticate(self.clinician)
+        self.assertEqual(self.client.get('/api/screenings/export/').status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get('/api/screenings/export/?result=X').status_code, 400)
+
+    def test_gzip_export_round_trips(self):
+        _, content = self.export('output=csv.gz')
+        rows = list(csv.reader(io.StringIO(gzip.decompress(content).decode())))
+        self.assertEqual(len(rows), 5)
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_export(self):
+        _, content = self.export('output=parquet&result=P')
+        table = pq.read_table(io.BytesIO(content))
+        self.assertEqual(table.column('result').to_pylist(), ['P', 'P'])
+        self.assertEqual(table.column('patient_birth_date').to_pylist(), [date(1990, 6, 15)] * 2)
+
+
+def phone_photo(size=(4000, 3000), orientation=None):
+    img = Image.new('RGB', size, (180, 60, 90))
+    exif = img.getexif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', exif=exif.tobytes())
+    return ContentFile(buffer.getvalue(), name='smear.jpg')
+
+
+@override_settings(SCREENING_THUMBNAIL_SIZE=320, SCREENING_MEDIUM_SIZE=800, SCREENING_RENDITION_FORMAT='WEBP')
+class ScreeningRenditionTests(SimpleTestCase):
+    def test_renditions_are_downscaled_upright_webp(self):
+        # Orientation 6: the phone was held upright, so the stored pixels are rotated
+        files = renditions_for(phone_photo(orientation=6))
+        self.assertEqual(files['medium'].name, 'smear_medium.webp')
+        self.assertEqual(files['thumbnail'].name, 'smear_thumbnail.webp')
+        medium, thumbnail = Image.open(files['medium']), Image.open(files['thumbnail'])
+        self.assertEqual((medium.format, medium.size), ('WEBP', (600, 800)))
+        self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (240, 320)))
+
+    def test_small_and_unreadable_images(self):
+        files = renditions_for(phone_photo(size=(200, 150)))
+        self.assertEqual(Image.open(files['thumbnail']).size, (200, 150))
+        with self.assertLogs('screenings.renditions', 'WARNING'):
+            self.assertEqual(renditions_for(ContentFile(b'not an image', name='broken.jpg')), {})
+        with self.settings(SCREENING_RENDITIONS=False):
+            self.assertEqual(renditions_for(phone_photo()), {})
+
+
+class ScreeningRenditionBackfillTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.user = CustomUser.objects.create_user(
+            username='clinician', email='clinician@example.org', password='password',
+        )
+        patient = Patient.objects.create(
+            created_by=self.user, first_name='Abebe', last_name='Kebede', gender='M',
+            birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+        )
+        self.screening = Screening.objects.create(patient=patient, image=phone_photo(), result='N')
+
+    def test_backfill_stores_renditions_next_to_the_original(self):
+        call_command('generate_screening_renditions', stdout=io.StringIO())
+        self.screening.refresh_from_db()
+        self.assertEqual(self.screening.thumbnail.name, 'screenings/smear_thumbnail.webp')
+        self.assertEqual(self.screening.medium.name, 'screenings/smear_medium.webp')
+
+        self.client.force_authenticate(self.user)
+        row = self.client.get('/api/screenings/screenings/').data['results'][0]
+        self.assertTrue(row['thumbnail'].endswith('/media/screenings/smear_thumbnail.webp'))
+        self.assertTrue(row['medium'].endswith('/media/screenings/smear_medium.webp'))
+
+
+def smear_archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    buffer.seek(0)
+    buffer.name = 'batch.zip'
+    return buffer
+
+
+class ScreeningBatchUploadTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.user = CustomUser.objects.create_user(
+            username='clinician', email='clinician@example.org', password='password',
+        )
+        self.patient = Patient.objects.create(
+            created_by=self.user, first_name='Abebe', last_name='Kebede', gender='M',
+            birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+        )
+        self.client.force_authenticate(self.user)
+
+    def photo(self):
+        return phone_photo(size=(300, 200)).read()
+
+    def upload(self, images, patients):
+        return self.client.post('/api/screenings/upload/batch/', {
+            'images': [ContentFile(data, name=f'smear{i}.jpg') for i, data in enumerate(images)],
+            'patients': patients,
+        })
+
+    def upload_archive(self, files, manifest):
+        return self.client.post('/api/screenings/upload/batch/', {
+            'archive': smear_archive(files), 'manifest': json.dumps(manifest),
+        })
+
+    def test_all_items_created(self):
+        response = self.upload([self.photo(), self.photo()], [self.patient.pk, self.patient.pk])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 0))
+        self.assertEqual(Screening.objects.filter(patient=self.patient).count(), 2)
+
+        response = self.upload_archive({'a.jpg': self.photo()}, [{'file': 'a.jpg', 'patient': self.patient.pk}])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Screening.objects.count(), 3)
+
+    def test_partial_failure(self):
+        response = self.upload(
+            [self.photo(), b'not an image', self.photo()], [self.patient.pk, self.patient.pk, 999999],
+        )
+        self.assertEqual(response.status_code, 207, response.data)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([row['status'] for row in response.data['results']], ['created', 'error', 'error'])
+        self.assertIn('image', response.data['results'][1]['errors'])
+        self.assertIn('patient', response.data['results'][2]['errors'])
+        self.assertEqual(Screening.objects.count(), 1)
+
+        response = self.upload_archive({'a.jpg': self.photo()}, [
+            {'file': 'a.jpg', 'patient': self.patient.pk}, {'file': 'missing.jpg', 'patient': self.patient.pk},
+        ])
+        self.assertEqual(response.status_code, 207, response.data)
+        self.assertEqual(response.data['results'][1]['errors'], {'image': ["File not found in archive."]})
+
+    def test_nothing_created(self):
+        response = self.upload([b'not an image'], [self.patient.pk])
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual(Screening.objects.count(), 0)
+
+    @override_settings(SCREENING_BATCH_MAX_ITEMS=2)
+    def test_too_many_items(self):
+        response = self.upload([self.photo()] * 3, [self.patient.pk] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': "At most 2 images per batch."})
+
+        manifest = [{'file': f'{i}.jpg', 'patient': self.patient.pk} for i in range(3)]
+        response = self.upload_archive({f'{i}.jpg': self.photo() for i in range(3)}, manifest)
+        self.assertEqual(response.data, {'error': "At most 2 images per batch."})
+        self.assertEqual(Screening.objects.count(), 0)
+
+    def test_archive_is_capped_while_it_is_read(self):
+        files = {f'{i}.jpg': self.photo() for i in range(3)}
+        manifest = [{'file': '0.jpg', 'patient': self.patient.pk}, {'file': '1.jpg', 'patient': self.patient.pk}]
+        with override_settings(SCREENING_BATCH_MAX_ITEMS=2), mock.patch.object(
+            zipfile.ZipFile, 'read', autospec=True, side_effect=zipfile.ZipFile.read,
+        ) as read:
+            response = self.upload_archive(files, manifest)
+        self.assertEqual(response.status_code, 201, response.data)
+        # The file left out of the manifest was never decompressed
+        self.assertEqual(sorted(call.args[1].filename for call in read.call_args_list), ['0.jpg', '1.jpg'])
+
+    def test_oversized_items(self):
+        photo = self.photo()
+        with override_settings(SCREENING_BATCH_MAX_FILE_SIZE=len(photo) - 1):
+            response = self.upload([photo], [self.patient.pk])
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {'error': f"smear0.jpg is larger than {len(photo) - 1} bytes."})
+
+            response = self.upload_archive({'a.jpg': photo}, [{'file': 'a.jpg', 'patient': self.patient.pk}])
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {'error': f"a.jpg is larger than {len(photo) - 1} bytes."})
+        self.assertEqual(Screening.objects.count(), 0)
+
+    def test_duplicate_manifest_files(self):
+        response = self.upload_archive({'a.jpg': self.photo()}, [
+            {'file': 'a.jpg', 'patient': self.patient.pk}, {'file': 'a.jpg', 'patient': self.patient.pk},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': "'manifest' lists a.jpg more than once."})
+
+    def test_corrupt_archives(self):
+        manifest = json.dumps([{'file': 'a.jpg', 'patient': self.patient.pk}])
+        photo = self.photo()
+
+        # A stored member whose bytes no longer match its CRC
+        archive = smear_archive({'a.jpg': photo})
+        data = archive.getvalue()
+        offset = data.index(photo) + len(photo) // 2
+        broken = io.BytesIO(data[:offset] + bytes([data[offset] ^ 0xFF]) + data[offset + 1:])
+        broken.name = 'batch.zip'
+        response = self.client.post('/api/screenings/upload/batch/', {'archive': broken, 'manifest': manifest})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': "'archive' is not a readable zip file."})
+
+        # A gzipped tar cut off partway through the image
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            info = tarfile.TarInfo('a.jpg')
+            info.size = len(photo)
+            tar.addfile(info, io.BytesIO(photo))
+        truncated = io.BytesIO(buffer.getvalue()[:len(buffer.getvalue()) // 2])
+        truncated.name = 'batch.tar.gz'
+        response = self.client.post('/api/screenings/upload/batch/', {'archive': truncated, 'manifest': manifest})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': "'archive' is not a readable tar file."})
+
+
+@override_settings(INFERENCE_MODEL_WATCH_INTERVAL=0)
+class ModelRegistryRefreshTests(SimpleTestCase):
+    def setUp(self):
+        model = tempfile.NamedTemporaryFile(suffix='.tflite')
+        self.addCleanup(model.close)
+        self.registry = ModelRegistry({'v1': model.name}, 'v1')
+        self.current = mock.Mock(mtime=0)      # the file has changed since it was loaded
+        self.registry._versions['v1'] = self.current
+
+    def refresh(self):
+        self.registry._maybe_refresh()
+        self.registry._refresh_thread.join(timeout=5)
+
+    def test_failed_reload_keeps_the_current_version(self):
+        with mock.patch('screenings.registry.ModelVersion', side_effect=ValueError('truncated model')), \
+                self.assertLogs('screenings.registry', 'ERROR'):
+            self.refresh()
+        self.assertIs(self.registry._versions['v1'], self.current)
+        self.current.retire.assert_not_called()
+
+    def test_changed_file_is_reloaded_off_the_request_thread(self):
+        fresh = mock.Mock(label='v1@fresh')
+        with mock.patch('screenings.registry.ModelVersion', return_value=fresh):
+            self.refresh()
+        self.assertIs(self.registry._versions['v1'], fresh)
+        fresh.engine.warm_up.assert_called_once()
+        self.current.retire.assert_called_once()
+
+
+class ModelRegistryPublishTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        model = tempfile.NamedTemporaryFile(suffix='.tflite')
+        self.addCleanup(model.close)
+        self.paths = {'v1': model.name, 'v2': model.name}
+        self.registry = ModelRegistry(self.paths, 'v1')
+        self.current = mock.Mock(label='v1@current')
+        self.registry._versions['v1'] = self.current
+
+    def test_failed_reload_is_not_published(self):
+        with mock.patch('screenings.registry.ModelVersion', side_effect=OSError('No such file')), \
+                self.assertRaises(ModelLoadError):
+            self.registry.publish(reload='v1', traffic={'v1': 50, 'v2': 50})
+        self.assertIs(self.registry._versions['v1'], self.current)
+        self.assertEqual(self.registry.traffic, {})
+        self.assertIsNone(cache.get(GENERATION_CACHE_KEY))
+
+    def test_failed_reload_answers_service_unavailable(self):
+        admin = CustomUser.objects.create_user(
+            username='ministry', email='ministry@example.org', password='password', is_staff=True,
+        )
+        self.client.force_authenticate(admin)
+        with mock.patch('screenings.views.get_registry', return_value=self.registry), \
+                mock.patch('screenings.registry.ModelVersion', side_effect=OSError('No such file')), \
+                self.assertLogs('screenings.views', 'ERROR'):
+            response = self.client.post('/api/screenings/models/', {'reload': 'v1'}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Could not load model v1', response.data['error'])
+
+    def test_concurrent_changes_all_reach_other_processes(self):
+        # Two processes publish without seeing each other's change
+        for traffic in ({'v1': 90, 'v2': 10}, {'v1': 50, 'v2': 50}):
+            other = ModelRegistry(self.paths, 'v1')
+            with mock.patch('screenings.registry.ModelVersion', return_value=mock.Mock(label='v2@fresh')):
+                other.publish(reload='v2', traffic=traffic)
+        self.assertEqual(cache.get(GENERATION_CACHE_KEY), 2)
+
+        fresh = mock.Mock(label='v1@fresh', mtime=os.path.getmtime(self.paths['v1']))
+        self.current.mtime = fresh.mtime
+        with override_settings(INFERENCE_MODEL_WATCH_INTERVAL=0), \
+                mock.patch('screenings.registry.ModelVersion', return_value=fresh) as load:
+            self.registry._maybe_refresh()
+            self.registry._refresh_thread.join(timeout=5)
+        load.assert_called_once_with('v2', self.paths['v2'])
+        self.assertEqual(self.registry.traffic, {'v1': 50, 'v2': 50})
+        self.assertEqual(self.registry.generation, 2)
+
+
+class FakeEngine:
+    """
+    Stands in for an InferenceEngine: each image's output is its first
+    value, and run() can be held until `gate` is set.
+    """
+    pool_size = 1
+
+    def __init__(self, hold=False):
+        self.batches = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        if not hold:
+            self.gate.set()
+
+    def run(self, inputs):
+        self.entered.set()
+        self.gate.wait(timeout=5)
+        self.batches.append(len(inputs))
+        return inputs.reshape(len(inputs), -1)[:, 0]
+
+
+class BatchSchedulerTests(SimpleTestCase):
+    def make_scheduler(self, engine, **options):
+        scheduler = BatchScheduler(engine, **options)
+        # Cleanups run last-in first-out: let a held engine go before closing
+        self.addCleanup(scheduler.close)
+        self.addCleanup(engine.gate.set)
+        return scheduler
+
+    def test_each_caller_gets_its_own_result(self):
+        scheduler = self.make_scheduler(FakeEngine(), max_batch_size=8, max_wait_ms=20)
+        futures = [scheduler.submit(np.full((2, 2, 3), i, dtype=np.float32)) for i in range(20)]
+        self.assertEqual([future.result(timeout=5) for future in futures], list(range(20)))
+
+    def test_batches_queued_images_up_to_the_batch_size(self):
+        engine = FakeEngine(hold=True)
+        scheduler = self.make_scheduler(engine, max_batch_size=4, max_wait_ms=20)
+        futures = [scheduler.submit(np.zeros((2, 2, 3)))]
+        engine.entered.wait(timeout=5)
+        futures += [scheduler.submit(np.zeros((2, 2, 3))) for _ in range(10)]
+        engine.gate.set()
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(engine.batches, [1, 4, 4, 2])
+
+    def test_flushes_a_partial_batch_after_the_max_wait(self):
+        engine = FakeEngine()
+        scheduler = self.make_scheduler(engine, max_batch_size=16, max_wait_ms=50)
+        started = time.monotonic()
+        scheduler.predict(np.zeros((2, 2, 3)), timeout=5)
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+        self.assertEqual(engine.batches, [1])
+
+    def test_full_queue_raises_busy(self):
+        engine = FakeEngine(hold=True)
+        scheduler = self.make_scheduler(engine, max_batch_size=1, max_queue=2)
+        scheduler.submit(np.zeros((2, 2, 3)))
+        engine.entered.wait(timeout=5)
+        scheduler.submit(np.zeros((2, 2, 3)))
+        scheduler.submit(np.zeros((2, 2, 3)))
+        with self.assertRaises(InferenceBusy):
+            scheduler.submit(np.zeros((2, 2, 3)))
+
+    def test_close_does_not_wait_for_a_full_queue(self):
+        engine = FakeEngine(hold=True)
+        scheduler = self.make_scheduler(engine, max_batch_size=1, max_queue=2)
+        futures = [scheduler.submit(np.full((2, 2, 3), 0))]
+        engine.entered.wait(timeout=5)
+        futures += [scheduler.submit(np.full((2, 2, 3), i)) for i in (1, 2)]
+        closer = threading.Thread(target=scheduler.close)
+        closer.start()
+        closer.join(timeout=1)
+        self.assertFalse(closer.is_alive())
+        engine.gate.set()
+        self.assertEqual([future.result(timeout=5) for future in futures], [0, 1, 2])
+        for thread in scheduler._threads:
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+
+    def test_closed_scheduler_finishes_queued_images_and_refuses_new_ones(self):
+        engine = FakeEngine(hold=True)
+        scheduler = self.make_scheduler(engine, max_batch_size=1)
+        futures = [scheduler.submit(np.full((2, 2, 3), i)) for i in range(3)]
+        scheduler.close()
+        with self.assertRaises(InferenceBusy):
+            scheduler.submit(np.zeros((2, 2, 3)))
+        engine.gate.set()
+        self.assertEqual([future.result(timeout=5) for future in futures], [0, 1, 2])
+
+
+class FakeInterpreter:
+    """
+    The slice of the TFLite Interpreter API InferenceEngine uses; outputs
+    each image's first value.
+    """
+
+    def __init__(self, model_path, num_threads):
+        self.shape = np.array([1, 4, 4, 3])
+
+    def allocate_tensors(self):
+        pass
+
+    def get_input_details(self):
+        return [{'index': 0, 'shape': self.shape, 'dtype': np.float32}]
+
+    def get_output_details(self):
+        return [{'index': 1, 'dtype': np.float32}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = np.array(shape)
+
+    def set_tensor(self, index, value):
+        self.value = value
+
+    def invoke(self):
+        pass
+
+    def get_tensor(self, index):
+        return self.value.reshape(len(self.value), -1)[:, :1]
+
+
+class InferenceEngineTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('screenings.inference.load_runtime', return_value=('fake', FakeInterpreter, None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.engine = InferenceEngine('model.tflite', pool_size=1, num_threads=1)
+
+    def test_busy_pool_makes_callers_wait_then_raises_busy(self):
+        with self.engine.checkout():
+            # Reading the input shape does not need an interpreter
+            self.assertEqual(self.engine.input_shape, (1, 4, 4, 3))
+            started = time.monotonic()
+            with self.assertRaises(InferenceBusy):
+                self.engine.run(np.zeros((1, 4, 4, 3)), timeout=0.05)
+            self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+    def test_waiting_caller_gets_the_interpreter_once_it_is_returned(self):
+        results = []
+        with self.engine.checkout():
+            waiter = threading.Thread(
+                target=lambda: results.append(self.engine.run(np.full((2, 4, 4, 3), 7.0), timeout=5))
+            )
+            waiter.start()
+            time.sleep(0.05)
+            self.assertEqual(results, [])
+        waiter.join(timeout=5)
+        self.assertEqual(results[0].tolist(), [7.0, 7.0])
+        self.engine.warm_up()
+
+
+class LRUBackendTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        backend = LRUBackend(max_entries=2, ttl=0)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        self.assertEqual(backend.get('a'), 1)
+        backend.set('c', 3)
+        self.assertEqual((backend.get('a'), backend.get('b'), backend.get('c')), (1, None, 3))
+        self.assertEqual(len(backend), 2)
+
+    def test_entries_expire_after_the_ttl(self):
+        backend = LRUBackend(ttl=60)
+        with mock.patch('malaria_api.caching.time.monotonic', return_value=1000.0) as monotonic:
+            backend.set('a', 1)
+            monotonic.return_value = 1059.0
+            self.assertEqual(backend.get('a'), 1)
+            monotonic.return_value = 1060.0
+            self.assertIsNone(backend.get('a'))
+        self.assertEqual(len(backend), 0)
+
+
+class ScreeningResultCacheTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.user = CustomUser.objects.create_user(
+            username='ministry', email='ministry@example.org', password='password', is_staff=True,
+        )
+        self.patient = Patient.objects.create(
+            created_by=self.user, first_name='Abebe', last_name='Kebede', gender='M',
+            birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+        )
+        self.client.force_authenticate(self.user)
+
+        self.result_cache = InferenceResultCache(LRUBackend())
+        self.version = mock.Mock(digest='a' * 64, label='mobilenetv2-v1@aaaaaaaa')
+        self.version.scheduler.predict.return_value = 0.9
+        for target, value in [
+            ('screenings.views.get_result_cache', self.result_cache),
+            ('screenings.views.get_registry', mock.Mock(**{'route.return_value': self.version})),
+        ]:
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def upload(self, photo):
+        return self.client.post('/api/screenings/upload/', {
+            'patient': self.patient.pk, 'image': ContentFile(photo, name='smear.jpg'),
+        })
+
+    def test_repeated_upload_skips_the_model(self):
+        photo = phone_photo(size=(300, 200)).read()
+        first = self.upload(photo)
+        self.assertEqual(first.status_code, 201, first.data)
+        second = self.upload(photo)
+        self.assertEqual(second.status_code, 201, second.data)
+        self.assertEqual(self.version.scheduler.predict.call_count, 1)
+        for field in ('result', 'confidence', 'parasite_count', 'model_version'):
+            self.assertEqual(second.data[field], first.data[field])
+
+        # A different photo is a miss
+        self.upload(phone_photo(size=(200, 300)).read())
+        self.assertEqual(self.version.scheduler.predict.call_count, 2)
+
+        stats = self.client.get('/api/screenings/inference/stats/').data['result_cache']
+        self.assertEqual(stats, {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3})
@@ -2,7 +2,14 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ScreeningUploadView, ScreeningViewSet
+from .views import (
+    InferenceStatsView,
+    ModelRegistryView,
+    ScreeningExportView,
+    ScreeningBatchUploadView,
+    ScreeningUploadView,
+    ScreeningViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'screenings', ScreeningViewSet)
@@ -10,4 +17,8 @@ router.register(r'screenings', ScreeningViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('upload/', ScreeningUploadView.as_view(), name='screening-upload'),
+    path('upload/batch/', ScreeningBatchUploadView.as_view(), name='screening-batch-upload'),
+    path('models/', ModelRegistryView.as_view(), name='model-registry'),
+    path('export/', ScreeningExportView.as_view(), name='screening-export'),
+    path('inference/stats/', InferenceStatsView.as_view(), name='inference-stats'),
 ]
\ No newline at end of file
@@ -5,72 +5,349 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from .models import Screening
-from .serializers import ScreeningGetSerializer, ScreeningSerializer
+from .serializers import ExportQuerySerializer, ScreeningGetSerializer, ScreeningSerializer
+from .signals import screenings_bulk_created
 from rest_framework.views import APIView
 from rest_framework import viewsets, permissions
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from patients.models import Patient
+from malaria_api.pagination import CreatedAtCursorPagination
+from malaria_api.serializers import field_requested
+from monitoring.metrics import span
+
+import logging
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from .batch import BatchError, items_from_archive, items_from_multipart, predict_images
+from .cache import file_digest, get_result_cache
+from .export import FORMATS, export_filename, export_queryset, export_stream, load_pyarrow
+from .jobs import enqueue_screening
+from .inference import InferenceBusy, summarize_prediction
+from .preprocessing import decode_image, to_tensor
+from .registry import ModelLoadError, get_registry
+from .renditions import rendition_longest_side, renditions_for
+
+logger = logging.getLogger(__name__)
+
 
-import tensorflow as tf
-from PIL import Image
-import numpy as np
 class ScreeningViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint to list all screenings or retrieve a single screening.
     """
-    queryset = Screening.objects.select_related('patient').all().order_by('-created_at')
+    queryset = Screening.objects.all().order_by('-created_at')
     serializer_class = ScreeningGetSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Only join the patient when it is going to be serialized
+        if field_requested(self.request, 'patient'):
+            queryset = queryset.select_related('patient')
+        return queryset
 
     @action(detail=False, methods=['get'], url_path='patient/(?P<patient_id>[^/.]+)')
     def screenings_by_patient(self, request, patient_id=None):
-        screenings = Screening.objects.filter(patient_id=patient_id).order_by('-created_at')
-        serializer = self.get_serializer(screenings, many=True)
-        return Response(serializer.data)
+        screenings = self.get_queryset().filter(patient_id=patient_id)
+        page = self.paginate_queryset(screenings)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='status', url_name='status')
+    def job_status(self, request, pk=None):
+        """
+        Report an async screening's progress. With `?wait=<seconds>` the
+        request is held (long-poll) until the job finishes or the wait ends.
+        """
+        screening = self.get_object()
+        try:
+            wait = min(float(request.query_params.get('wait', 0)), settings.SCREENING_STATUS_MAX_WAIT)
+        except ValueError:
+            return Response({"error": "wait must be a number of seconds"}, status=status.HTTP_400_BAD_REQUEST)
 
+        deadline = time.monotonic() + wait
+        finished = (Screening.STATUS_COMPLETED, Screening.STATUS_FAILED)
+        while screening.status not in finished and time.monotonic() < deadline:
+            time.sleep(settings.SCREENING_STATUS_POLL_INTERVAL)
+            screening.refresh_from_db(fields=['status', 'result', 'confidence', 'parasite_count'])
 
+        return Response({
+            'id': screening.id,
+            'status': screening.status,
+            'result': screening.result or None,
+            'confidence': screening.confidence,
+            'parasite_count': screening.parasite_count,
+        })
 
 
-# Load the TFLite model
-MODEL_PATH = '../model_training/models/malaria_mobilenetv2_model.tflite'
-interpreter = tf.lite.Interpreter(model_path=MODEL_PATH)
-interpreter.allocate_tensors()
 
-# Get input and output details once
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
 
 class ScreeningUploadView(APIView):
+    """
+    Upload one smear image and screen it.
+
+    By default the result is computed before responding. With `?async=true`
+    (or SCREENING_ASYNC_UPLOADS) the screening is saved as pending, a 202 is
+    returned at once, and the result can be polled from its status endpoint.
+    """
     parser_classes = [MultiPartParser, FormParser]
 
+    def is_async(self, request):
+        value = request.query_params.get('async')
+        if value is None:
+            return settings.SCREENING_ASYNC_UPLOADS
+        return value.lower() in ('1', 'true', 'yes')
+
     def preprocess_image(self, image_file):
-        img = Image.open(image_file).convert('RGB')
-        img = img.resize((128, 128))
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0).astype(np.float32)
-        return img_array
+        """
+        Decode once, large enough for the renditions too. Returns (decoded
+        image, model input).
+        """
+        img = decode_image(image_file, longest_side=rendition_longest_side())
+        image_file.seek(0)
+        return img, to_tensor(img)
 
     def post(self, request):
         serializer = ScreeningSerializer(data=request.data)
         if serializer.is_valid():
+            if self.is_async(request):
+                # The worker records the full version label once it has run
+                with span('db_save'):
+                    screening = serializer.save(
+                        status=Screening.STATUS_PENDING,
+                        model_version=get_registry().route_name(),
+                    )
+                enqueue_screening(screening)
+                data = ScreeningSerializer(screening).data
+                data['status_url'] = request.build_absolute_uri(
+                    reverse('screening-status', args=[screening.pk])
+                )
+                return Response(data, status=status.HTTP_202_ACCEPTED)
+
             image_file = request.FILES['image']
-            img_array = self.preprocess_image(image_file)
+            version = get_registry().route()
+
+            # Re-uploads of the same photo reuse the stored prediction
+            result_cache = get_result_cache()
+            cached = cache_key = None
+            if result_cache is not None:
+                cache_key = result_cache.make_key(file_digest(image_file), version.digest)
+                cached = result_cache.get(cache_key)
+
+            img = None
+            if cached is not None:
+                result, confidence, parasite_count = cached
+            else:
+                img, img_array = self.preprocess_image(image_file)
+
+                # Run inference through the shared batching scheduler. The
+                # span includes the wait for a batch; `invoke` is timed on
+                # the scheduler's thread and only reaches the histogram.
+                try:
+                    with span('inference'):
+                        prediction = version.scheduler.predict(img_array, timeout=settings.INFERENCE_TIMEOUT)
+                except (InferenceBusy, FutureTimeoutError):
+                    return Response(
+                        {"error": "The screening model is busy. Please retry shortly."},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    )
+                result, confidence, parasite_count = summarize_prediction(prediction)
+                if result_cache is not None:
+                    result_cache.set(cache_key, (result, confidence, parasite_count))
 
-            # Run inference with TFLite
-            interpreter.set_tensor(input_details[0]['index'], img_array)
-            interpreter.invoke()
-            output_data = interpreter.get_tensor(output_details[0]['index'])[0][0]
+            renditions = renditions_for(image_file, img)
+
+            # Save record, with the image and its renditions
+            with span('db_save'):
+                screening = serializer.save(
+                    result=result,
+                    parasite_count=parasite_count,
+                    confidence=confidence,
+                    model_version=version.label,
+                    **renditions,
+                )
+
+            return Response(ScreeningSerializer(screening).data, status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ScreeningBatchUploadView(APIView):
+    """
+    Upload many screenings in one request, e.g. when a field device syncs.
+
+    Send either multipart `images` with a matching `patients` list (and
+    optional `notes`), or one zip/tar `archive` plus a JSON `manifest` of
+    {"file", "patient", "notes"} objects. Items are inferred together and
+    saved in a single transaction; each gets its own result or errors.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        try:
+            if 'archive' in request.FILES:
+                items = items_from_archive(request.FILES['archive'], request.data.get('manifest'))
+            else:
+                items = items_from_multipart(request.data, request.FILES)
+        except BatchError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not items:
+            return Response({"error": "No images were uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.SCREENING_BATCH_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {settings.SCREENING_BATCH_MAX_ITEMS} images per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            prediction = output_data
-            result = 'N' if prediction > 0.5 else 'P'
-            confidence = float(prediction if prediction > 0.5 else 1 - prediction)
-            parasite_count = int(confidence * 100)  # Example scaling logic
+        # Validate every patient reference with one query
+        patient_ids = {
+            int(item['patient']) for item in items
+            if str(item['patient']).isdigit()
+        }
+        known_patients = Patient.objects.in_bulk(patient_ids)
 
-            # Save record
-            screening = serializer.save(
+        results = [{'index': i, 'file': item['file']} for i, item in enumerate(items)]
+        valid = []
+        for i, item in enumerate(items):
+            errors = {}
+            if item['image'] is None:
+                errors['image'] = ["File not found in archive."]
+            if not str(item['patient']).isdigit() or int(item['patient']) not in known_patients:
+                errors['patient'] = [f"Invalid pk \"{item['patient']}\" - object does not exist."]
+            if errors:
+                results[i].update(status='error', errors=errors)
+            else:
+                valid.append(i)
+
+        version = get_registry().route()
+        image_files = [items[i]['image'] for i in valid]
+        renditions = {}
+
+        def keep_renditions(j, img):
+            renditions[j] = renditions_for(image_files[j], img)
+
+        try:
+            predictions = predict_images(image_files, version, on_decode=keep_renditions)
+        except (InferenceBusy, FutureTimeoutError):
+            return Response(
+                {"error": "The screening model is busy. Please retry shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        screenings = []
+        for j, (i, prediction) in enumerate(zip(valid, predictions)):
+            if isinstance(prediction, Exception):
+                results[i].update(status='error', errors={'image': ["Upload a valid image."]})
+                continue
+            result, confidence, parasite_count = prediction
+            screening = Screening(
+                patient=known_patients[int(items[i]['patient'])],
+                image=items[i]['image'],
+                notes=items[i]['notes'] or '',
                 result=result,
+                confidence=confidence,
                 parasite_count=parasite_count,
-                confidence=confidence
+                model_version=version.label,
+                # Cached results were not decoded, so their renditions are made here
+                **(renditions[j] if j in renditions else renditions_for(image_files[j])),
             )
+            screenings.append((i, screening))
 
-            return Response(ScreeningSerializer(screening).data, status=status.HTTP_201_CREATED)
+        with span('db_save'), transaction.atomic():
+            created = Screening.objects.bulk_create([screening for _, screening in screenings])
+            screenings_bulk_created.send(sender=Screening, screenings=created)
+
+        for i, screening in screenings:
+            results[i].update(status='created', screening=ScreeningSerializer(screening).data)
+
+        if not screenings:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(screenings) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'created': len(screenings),
+            'failed': len(items) - len(screenings),
+            'results': results,
+        }, status=response_status)
+
+
+class ModelRegistryView(APIView):
+    """
+    List servable model versions, or (POST) reload them and change the
+    traffic split without a restart:
+
+        {"reload": "cnn-v1" | "*", "traffic": {"mobilenetv2-v1": 90, "cnn-v1": 10}}
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        registry = get_registry()
+        return Response({'default': registry.default, 'models': registry.describe()})
+
+    def post(self, request):
+        registry = get_registry()
+        reload = request.data.get('reload')
+        traffic = request.data.get('traffic')
+        if reload and reload != '*' and reload not in registry.paths:
+            return Response({"error": f"Unknown model version {reload!r}"}, status=status.HTTP_400_BAD_REQUEST)
+        if traffic is not None and not isinstance(traffic, dict):
+            return Response({"error": "traffic must map version names to weights"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            registry.publish(reload=reload, traffic=traffic)
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ModelLoadError as e:
+            logger.exception("Model reload requested by %s failed", request.user)
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({'default': registry.default, 'models': registry.describe()})
+
+
+class InferenceStatsView(APIView):
+    """
+    Counters for the inference result cache, for operators.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        result_cache = get_result_cache()
+        return Response({
+            'result_cache': result_cache.stats() if result_cache is not None else None,
+        })
+
+
+class ScreeningExportView(APIView):
+    """
+    Every screening joined with its patient's demographics, for reporting,
+    streamed as it is read so memory stays flat whatever the size.
+
+    Query parameters: `start` and `end` (YYYY-MM-DD, inclusive), `result`
+    (comma-separated P, N, I) and `output` (csv, csv.gz or parquet).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        params = ExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start, end = params.validated_data.get('start'), params.validated_data.get('end')
+        fmt = params.validated_data['output']
+        if fmt == 'parquet':
+            # Checked up front: once streaming starts, errors cannot change the status
+            try:
+                load_pyarrow()
+            except ImportError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        rows = export_queryset(start, end, params.validated_data.get('result'))
+        response = StreamingHttpResponse(
+            export_stream(fmt, rows, settings.SCREENING_EXPORT_CHUNK_SIZE, settings.SCREENING_EXPORT_ROW_GROUP_SIZE),
+            content_type=FORMATS[fmt][0],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, start, end)}"'
+        return response
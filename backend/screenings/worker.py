@@ -0,0 +1,45 @@
+#  backend/screenings/worker.py
+#
+#  Entry points run inside the spawned processes of LocalJobQueue. A spawned
+#  process imports this module before Django is set up, so nothing here may
+#  import models (or anything that does) at module level.
+
+
+def init_worker():
+    import django
+
+    django.setup()
+
+
+def infer_stored_image(image_name, model_name=None):
+    """
+    Run a model version on an image already saved to default storage, and
+    store its renditions next to it from the same decode. Each worker
+    process keeps its own model registry and result cache.
+
+    Returns (prediction, version label, {field: rendition name}).
+    """
+    import posixpath
+
+    from django.core.files.storage import default_storage
+
+    from .batch import predict_images
+    from .registry import get_registry
+    from .renditions import renditions_for
+
+    version = get_registry().get(model_name)
+    renditions = {}
+    with default_storage.open(image_name, 'rb') as image_file:
+        prediction = predict_images(
+            [image_file], version, on_decode=lambda i, img: renditions.update(renditions_for(image_file, img))
+        )[0]
+        if isinstance(prediction, Exception):
+            raise prediction
+        if not renditions:
+            # A cached result: nothing was decoded for inference
+            renditions = renditions_for(image_file)
+    names = {
+        field: default_storage.save(posixpath.join(posixpath.dirname(image_name), content.name), content)
+        for field, content in renditions.items()
+    }
+    return prediction, version.label, names
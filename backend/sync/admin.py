@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import Change
+
+
+@admin.register(Change)
+class ChangeAdmin(admin.ModelAdmin):
+    """
+    The sync change log, read-only: rows are written by the signal handlers.
+    """
+    list_display = ('kind', 'object_id', 'owner_id', 'deleted', 'txid', 'changed_at')
+    list_filter = ('kind', 'deleted')
+    search_fields = ('=object_id', '=owner_id')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,76 @@
+#  backend/sync/changes.py
+
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from .models import Change, CurrentTransactionId
+
+
+def record_changes(kind, objects, deleted=False):
+    """
+    Log a change to each of `objects`, (object id, owner id) pairs,
+    replacing whatever was logged for them before.
+    """
+    if not objects:
+        return
+    with transaction.atomic():
+        Change.objects.filter(kind=kind, object_id__in=[object_id for object_id, _ in objects]).delete()
+        Change.objects.bulk_create(
+            Change(kind=kind, object_id=object_id, owner_id=owner_id, deleted=deleted, txid=CurrentTransactionId())
+            for object_id, owner_id in objects
+        )
+
+
+def encode_token(change):
+    return f"{change.txid}.{change.id}"
+
+
+def decode_token(token):
+    """
+    (txid, id) from a sync token; ValueError when it is not one.
+    """
+    txid, change_id = token.split('.')
+    return int(txid), int(change_id)
+
+
+def settled_txid():
+    """
+    Every transaction with a smaller id has finished, so no change below it
+    can still appear. Ids are taken in start order but committed in any
+    order; reading only settled changes means a token never skips one that
+    commits late. None when all visible changes are settled (databases
+    other than PostgreSQL run one writer at a time).
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint,"
+            " pg_current_xact_id_if_assigned()::text::bigint"
+        )
+        xmin, own = cursor.fetchone()
+    # When this transaction has written and nothing older is still running,
+    # its own changes are settled too
+    return xmin + 1 if own == xmin else xmin
+
+
+def changes_since(owner_id, since=None, limit=500):
+    """
+    Up to `limit` of one owner's changes after the (txid, id) `since`,
+    oldest first, and whether more are ready. Without `since`, everything
+    that still exists.
+    """
+    changes = Change.objects.filter(owner_id=owner_id)
+    if since is None:
+        changes = changes.filter(deleted=False)
+    else:
+        # A row comparison is an index condition; the equivalent OR of two
+        # conditions makes every page scan past all the changes before it
+        changes = changes.filter(RawSQL('("sync_change"."txid", "sync_change"."id") > (%s, %s)', since,
+                                        output_field=BooleanField()))
+    bound = settled_txid()
+    if bound is not None:
+        changes = changes.filter(txid__lt=bound)
+    page = list(changes.order_by('txid', 'id')[:limit + 1])
+    return page[:limit], len(page) > limit
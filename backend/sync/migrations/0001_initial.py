@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("patient", "Patient"), ("screening", "Screening")],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("owner_id", models.BigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+                ("txid", models.BigIntegerField(default=0)),
+                ("changed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["owner_id", "txid", "id"], name="change_owner_token_idx"
+                    ),
+                    models.Index(
+                        fields=["kind", "object_id"], name="change_object_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+# Every existing patient and screening becomes one change at txid 0, so
+# a first sync returns them. One INSERT ... SELECT per table.
+BACKFILL = [
+    """
+    INSERT INTO sync_change (kind, object_id, owner_id, deleted, txid, changed_at)
+    SELECT 'patient', id, created_by_id, FALSE, 0, updated_at FROM patients_patient
+    """,
+    """
+    INSERT INTO sync_change (kind, object_id, owner_id, deleted, txid, changed_at)
+    SELECT 'screening', s.id, p.created_by_id, FALSE, 0, s.updated_at
+    FROM screenings_screening s JOIN patients_patient p ON p.id = s.patient_id
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sync", "0001_initial"),
+        ("patients", "0004_patient_updated_at"),
+        ("screenings", "0006_screening_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
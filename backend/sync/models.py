@@ -0,0 +1,49 @@
+#  backend/sync/models.py
+
+from django.db import models
+
+
+class CurrentTransactionId(models.Func):
+    """
+    Id of the transaction writing the row on PostgreSQL (64-bit, so it
+    never wraps). Other databases run one writer at a time and get 0.
+    """
+    output_field = models.BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return '0', []
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return 'pg_current_xact_id()::text::bigint', []
+
+
+class Change(models.Model):
+    """
+    The latest change to a patient or screening, for the mobile delta sync.
+
+    Each object keeps a single row: a newer change replaces it, and a
+    deletion leaves a tombstone. Rows are read in (txid, id) order, which
+    the sync token encodes.
+    """
+    PATIENT = 'patient'
+    SCREENING = 'screening'
+    KIND_CHOICES = [(PATIENT, 'Patient'), (SCREENING, 'Screening')]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # The clinician who registered the patient; whose device the row syncs to
+    owner_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    txid = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # A device's changes since its token
+            models.Index(fields=['owner_id', 'txid', 'id'], name='change_owner_token_idx'),
+            # Replacing an object's previous change
+            models.Index(fields=['kind', 'object_id'], name='change_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} {'deleted' if self.deleted else 'changed'}"
@@ -0,0 +1,45 @@
+#  backend/sync/serializers.py
+
+from django.conf import settings
+from rest_framework import serializers
+
+from patients.models import Patient
+from screenings.models import Screening
+from .changes import decode_token
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=settings.SYNC_MAX_PAGE_SIZE, default=settings.SYNC_PAGE_SIZE)
+
+    def validate_since(self, value):
+        try:
+            return decode_token(value)
+        except ValueError:
+            raise serializers.ValidationError("Not a sync token; start over without `since`.")
+
+
+class SyncPatientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Patient
+        exclude = ['created_by']
+
+
+class SyncScreeningSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Screening
+        fields = [
+            'id',
+            'patient',
+            'image',
+            'thumbnail',
+            'medium',
+            'result',
+            'parasite_count',
+            'confidence',
+            'notes',
+            'status',
+            'model_version',
+            'created_at',
+            'updated_at',
+        ]
@@ -0,0 +1,35 @@
+#  backend/sync/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from patients.models import Patient
+from screenings.models import Screening
+from screenings.signals import screenings_bulk_created
+from .changes import record_changes
+from .models import Change
+
+
+@receiver(post_save, sender=Patient)
+def log_patient_saved(sender, instance, **kwargs):
+    record_changes(Change.PATIENT, [(instance.pk, instance.created_by_id)])
+
+
+@receiver(post_delete, sender=Patient)
+def log_patient_deleted(sender, instance, **kwargs):
+    record_changes(Change.PATIENT, [(instance.pk, instance.created_by_id)], deleted=True)
+
+
+@receiver(post_save, sender=Screening)
+def log_screening_saved(sender, instance, **kwargs):
+    record_changes(Change.SCREENING, [(instance.pk, instance.patient.created_by_id)])
+
+
+@receiver(post_delete, sender=Screening)
+def log_screening_deleted(sender, instance, **kwargs):
+    record_changes(Change.SCREENING, [(instance.pk, instance.patient.created_by_id)], deleted=True)
+
+
+@receiver(screenings_bulk_created)
+def log_screenings_bulk_created(sender, screenings, **kwargs):
+    record_changes(Change.SCREENING, [(s.pk, s.patient.created_by_id) for s in screenings])
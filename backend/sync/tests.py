@@ -0,0 +1,110 @@
+import threading
+from datetime import date
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+
+from accounts.models import CustomUser
+from patients.models import Patient
+from screenings.models import Screening
+from screenings.signals import screenings_bulk_created
+from tests.utils import postgres_only
+
+
+def make_user(name):
+    return CustomUser.objects.create_user(username=name, email=f'{name}@example.org', password='password')
+
+
+def make_patient(user, first_name='Abebe'):
+    return Patient.objects.create(
+        created_by=user, first_name=first_name, last_name='Kebede', gender='M',
+        birth_date=date(1990, 6, 15), address='Bahir Dar', phone='0911223344',
+    )
+
+
+class SyncTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('clinician')
+        cls.patient = make_patient(cls.user)
+        cls.screening = Screening.objects.create(patient=cls.patient, image='screenings/seed.jpg', result='N')
+        make_patient(make_user('other'), first_name='Other')
+
+    def sync(self, **params):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_first_sync_then_only_changes(self):
+        data = self.sync()
+        self.assertEqual([p['id'] for p in data['patients']], [self.patient.id])
+        self.assertEqual([s['id'] for s in data['screenings']], [self.screening.id])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.sync(since=data['next'])['patients'], [])
+
+        self.patient.address = 'Gondar'
+        self.patient.save()
+        screening_id = self.screening.id
+        self.screening.delete()
+        with CaptureQueriesContext(connection) as queries:
+            changes = self.sync(since=data['next'])
+        self.assertLessEqual(len(queries), 3 + (connection.vendor == 'postgresql'))
+        self.assertEqual([p['address'] for p in changes['patients']], ['Gondar'])
+        self.assertEqual(changes['screenings'], [])
+        self.assertEqual(changes['deleted'], {'patients': [], 'screenings': [screening_id]})
+
+    def test_pages_follow_the_token(self):
+        patients = [make_patient(self.user, first_name=f'P{i}') for i in range(4)]
+        created = Screening.objects.bulk_create(
+            Screening(patient=patient, image='screenings/seed.jpg', result='P') for patient in patients
+        )
+        screenings_bulk_created.send(sender=Screening, screenings=created)
+
+        seen, since = [], None
+        while True:
+            data = self.sync(limit=3, **({'since': since} if since else {}))
+            seen += [('patient', p['id']) for p in data['patients']]
+            seen += [('screening', s['id']) for s in data['screenings']]
+            since = data['next']
+            if not data['has_more']:
+                break
+        self.assertEqual(len(seen), 10)
+        self.assertEqual(len(set(seen)), 10)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'latest'}).status_code, 400)
+
+
+@postgres_only
+class SyncConcurrencyTests(TransactionTestCase):
+    def test_token_does_not_skip_a_late_commit(self):
+        user = make_user('clinician')
+        started, finish = threading.Event(), threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    make_patient(user, first_name='Slow')
+                    started.set()
+                    finish.wait(10)
+            finally:
+                connection.close()
+
+        writer = threading.Thread(target=slow_writer)
+        writer.start()
+        started.wait(10)
+        make_patient(user, first_name='Fast')
+
+        client = APIClient()
+        client.force_authenticate(user)
+        # "Fast" committed first but was assigned its transaction id later
+        data = client.get('/api/sync/').data
+        self.assertEqual(data['patients'], [])
+
+        finish.set()
+        writer.join()
+        data = client.get('/api/sync/', {'since': data['next']}).data
+        self.assertEqual(sorted(p['first_name'] for p in data['patients']), ['Fast', 'Slow'])
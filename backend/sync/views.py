@@ -0,0 +1,59 @@
+#  backend/sync/views.py
+
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from patients.models import Patient
+from screenings.models import Screening
+from .changes import changes_since, encode_token
+from .models import Change
+from .serializers import SyncPatientSerializer, SyncQuerySerializer, SyncScreeningSerializer
+
+
+class SyncView(APIView):
+    """
+    The user's patients and screenings that changed since a sync token, for
+    devices that keep a local copy.
+
+    Query parameters: `since` (the `next` token of the previous response;
+    omit it for a first sync) and `limit` (changes per response). Returns
+
+        {"patients": [...], "screenings": [...],
+         "deleted": {"patients": [ids], "screenings": [ids]},
+         "next": "<token>", "has_more": true}
+
+    Apply a response, store `next`, and repeat while `has_more`. A screening
+    may reference a patient that arrives later in the same sync.
+    """
+
+    def get(self, request):
+        params = SyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        since = params.validated_data.get('since')
+        changes, has_more = changes_since(request.user.pk, since, params.validated_data['limit'])
+
+        changed = {Change.PATIENT: [], Change.SCREENING: []}
+        deleted = {Change.PATIENT: [], Change.SCREENING: []}
+        for change in changes:
+            (deleted if change.deleted else changed)[change.kind].append(change.object_id)
+
+        patients = screenings = []
+        if changed[Change.PATIENT]:
+            patients = Patient.objects.filter(id__in=changed[Change.PATIENT], created_by=request.user)
+        if changed[Change.SCREENING]:
+            screenings = Screening.objects.filter(
+                id__in=changed[Change.SCREENING], patient__created_by=request.user
+            )
+
+        if changes:
+            next_token = encode_token(changes[-1])
+        else:
+            next_token = request.query_params.get('since') or '0.0'
+        context = {'request': request}
+        return Response({
+            'patients': SyncPatientSerializer(patients, many=True, context=context).data,
+            'screenings': SyncScreeningSerializer(screenings, many=True, context=context).data,
+            'deleted': {'patients': deleted[Change.PATIENT], 'screenings': deleted[Change.SCREENING]},
+            'next': next_token,
+            'has_more': has_more,
+        })
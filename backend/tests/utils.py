@@ -0,0 +1,71 @@
+#  backend/tests/utils.py
+
+import json
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from benchmarks.seed import seed_data, seeded_clinicians
+
+postgres_only = unittest.skipUnless(connection.vendor == 'postgresql', "EXPLAIN checks need PostgreSQL")
+
+
+def seed_clinic(clinicians=50, patients=2000, screenings=10000, messages=5000, days=90):
+    """
+    Load a clinic's worth of data spread over the last `days` days with the
+    benchmark seeder (every patient gets the same number of screenings and
+    every clinician the same number of chat messages) and return the
+    clinicians in id order.
+    """
+    seed_data(clinicians=clinicians, patients=patients, screenings=screenings, messages=messages, days=days)
+    return list(seeded_clinicians())
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+class QueryPlanTestCase(APITestCase):
+    """
+    Base class for endpoint tests that pin query counts and query plans.
+    """
+
+    def capture(self, url, user):
+        """
+        GET `url` as `user`; return the response and the SQL it ran.
+        """
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']
+
+    def assertIndexScans(self, queries, table, index=None):
+        """
+        Assert that every SELECT reading `table` reaches it through an index
+        (the one named `index`, if given) rather than a sequential scan.
+        """
+        selects = [sql for sql in queries if sql.lstrip().upper().startswith('SELECT') and f'"{table}"' in sql]
+        self.assertTrue(selects, f"No query read {table}")
+        for sql in selects:
+            plan = self.explain(sql)
+            scans = [node for node in plan_nodes(plan) if node.get('Relation Name') == table]
+            details = f"\n{sql}\n{json.dumps(plan, indent=2)}"
+            for node in scans:
+                self.assertNotEqual(node['Node Type'], 'Seq Scan', f"Sequential scan on {table}:{details}")
+            if index is not None:
+                # Bitmap scans name the index on a child node
+                used = {node.get('Index Name') for node in plan_nodes(plan)}
+                self.assertIn(index, used, f"{index} not used:{details}")
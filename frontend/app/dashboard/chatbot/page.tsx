@@ -1,7 +1,9 @@
 'use client'
 import { useState } from 'react'
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useMutation, useQueryClient } from '@tanstack/react-query'
 import api from '@/lib/api'
+import { streamChat } from '@/lib/chatStream'
+import { useCursorList } from '@/lib/pagination'
 import {
   Box,
   Typography,
@@ -26,25 +28,39 @@ import ProtectedRoute from '@/components/ProtectedRoute'
 export default function ChatbotPage() {
   const queryClient = useQueryClient()
   const [query, setQuery] = useState('')
+  // The question being answered, with the answer text streamed so far
+  const [pending, setPending] = useState(null)
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'success' })
 
-  // Fetch chat history
-  const { data: messages, isLoading } = useQuery({
-    queryKey: ['chatMessages'],
-    queryFn: () => api.get('/chatbot/messages/').then(res => res.data),
-  })
+  // Fetch chat history, newest first, a page at a time
+  const {
+    rows: messages, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage,
+  } = useCursorList(['chatMessages'], '/chatbot/messages/')
+  // The conversation reads oldest first, with the pending question last
+  const conversation = [
+    ...messages.slice().reverse(),
+    ...(pending ? [{ ...pending, id: 'pending' }] : []),
+  ]
 
-  // Send query mutation
+  // Send query mutation; the answer is shown as it streams in
   const sendQueryMutation = useMutation({
-    mutationFn: (query) => api.post('/chatbot/messages/', { query }),
+    mutationFn: (query) => {
+      setPending({ query, response: '', search_urls: [] })
+      setQuery('')
+      return streamChat(query, {
+        onMeta: ({ search_urls }) => setPending(p => ({ ...p, search_urls })),
+        onToken: (text) => setPending(p => ({ ...p, response: p.response + text })),
+      })
+    },
     onSuccess: () => {
       queryClient.invalidateQueries(['chatMessages'])
-      setQuery('')
       setSnackbar({ open: true, message: 'Message sent successfully!', severity: 'success' })
     },
     onError: (error) => {
+      queryClient.invalidateQueries(['chatMessages'])
       setSnackbar({ open: true, message: `Error: ${error.message}`, severity: 'error' })
     },
+    onSettled: () => setPending(null),
   })
 
   // Delete message mutation
@@ -167,8 +183,8 @@ export default function ChatbotPage() {
                 className="shadow-md"
               >
                 <Box sx={{ mb: 2 }}>
-                  {messages?.length > 0 ? (
-                    messages.slice().reverse().map((msg) => (
+                  {conversation.length > 0 ? (
+                    conversation.map((msg) => (
                       <Box key={msg.id} sx={{ mb: 2 }}>
                         {/* User Message */}
                         <Box sx={{ display: 'flex', justifyContent: 'flex-end', mb: 1 }}>
@@ -193,7 +209,7 @@ export default function ChatbotPage() {
                           </Avatar>
                           <Box>
                             <Chip
-                              label={msg.response}
+                              label={msg.response || '…'}
                               sx={{
                                 bgcolor: '#e6f0fa',
                                 color: '#4b5e5a',
@@ -260,7 +276,7 @@ export default function ChatbotPage() {
                   <Button
                     variant="contained"
                     onClick={handleSend}
-                    disabled={sendQueryMutation.isLoading || !query.trim()}
+                    disabled={sendQueryMutation.isPending || !query.trim()}
                     sx={{
                       bgcolor: '#00695c',
                       color: '#e6f0fa',
@@ -299,7 +315,7 @@ export default function ChatbotPage() {
                 className="shadow-md"
               >
                 <DataGrid
-                  rows={messages || []}
+                  rows={messages}
                   columns={columns}
                   loading={isLoading}
                   pageSizeOptions={[10, 25, 50]}
@@ -337,6 +353,19 @@ export default function ChatbotPage() {
                   aria-label="Malaria chat history data grid"
                 />
               </Paper>
+              {hasNextPage && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                  <Button
+                    variant="outlined"
+                    onClick={() => fetchNextPage()}
+                    disabled={isFetchingNextPage}
+                    sx={{ color: '#00695c', borderColor: '#00695c' }}
+                    className="font-sans"
+                  >
+                    {isFetchingNextPage ? 'Loading...' : 'Load older messages'}
+                  </Button>
+                </Box>
+              )}
             </Grid>
           </Grid>
         </motion.div>
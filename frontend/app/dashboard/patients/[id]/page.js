@@ -2,6 +2,7 @@
 'use client'
 import { useQuery } from '@tanstack/react-query'
 import api from '@/lib/api'
+import { useCursorList } from '@/lib/pagination'
 import { useParams } from 'next/navigation'
 import {
   Box,
@@ -12,6 +13,7 @@ import {
   CardContent,
   CardMedia,
   Chip,
+  Button,
 } from '@mui/material'
 import { motion } from 'framer-motion'
 import ProtectedRoute from '@/components/ProtectedRoute'
@@ -24,10 +26,13 @@ export default function PatientDetailPage() {
     queryFn: () => api.get(`/patients/${id}/`).then(res => res.data),
   })
 
-  const { data: screeningsData, isLoading: screeningsLoading } = useQuery({
-    queryKey: ['screenings', id],
-    queryFn: () => api.get(`/screenings/screenings/patient/${id}/`).then(res => res.data),
-  })
+  const {
+    rows: screeningsData,
+    isLoading: screeningsLoading,
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useCursorList(['screenings', id], `/screenings/screenings/patient/${id}/`)
 
   // Animation variants
   const cardVariants = {
@@ -185,7 +190,7 @@ export default function PatientDetailPage() {
                         <CardMedia
                           component="img"
                           height="180"
-                          image={screening.image || '/placeholder-image.png'}
+                          image={screening.thumbnail || screening.image || '/placeholder-image.png'}
                           alt="Screening image"
                           sx={{ objectFit: 'cover', borderTopLeftRadius: '12px', borderTopRightRadius: '12px' }}
                         />
@@ -247,6 +252,19 @@ export default function PatientDetailPage() {
                 </Typography>
               )}
             </Grid>
+            {hasNextPage && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 3 }}>
+                <Button
+                  variant="outlined"
+                  onClick={() => fetchNextPage()}
+                  disabled={isFetchingNextPage}
+                  sx={{ color: '#00695c', borderColor: '#00695c' }}
+                  className="font-sans"
+                >
+                  {isFetchingNextPage ? 'Loading...' : 'Load more'}
+                </Button>
+              </Box>
+            )}
           </Grid>
         </Grid>
       </Box>
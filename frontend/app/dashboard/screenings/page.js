@@ -1,8 +1,9 @@
 // app/dashboard/screenings/page.js
 'use client'
 import { useState } from 'react'
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useMutation, useQueryClient } from '@tanstack/react-query'
 import api from '@/lib/api'
+import { useCursorList } from '@/lib/pagination'
 import {
   Paper,
   Chip,
@@ -31,10 +32,11 @@ export default function ScreeningTablePage() {
   const [screeningToDelete, setScreeningToDelete] = useState(null)
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'success' })
 
-  const { data, isLoading } = useQuery({
-    queryKey: ['screenings'],
-    queryFn: () => api.get('/screenings/screenings/').then(res => res.data),
-  })
+  const { rows, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useCursorList(
+    ['screenings'],
+    '/screenings/screenings/',
+    { fields: 'id,patient,parasite_count,result,confidence,created_at' },
+  )
 
   const deleteMutation = useMutation({
     mutationFn: (id) => api.delete(`/screenings/screenings/${id}/`),
@@ -207,7 +209,7 @@ export default function ScreeningTablePage() {
           className="shadow-md"
         >
           <DataGrid
-            rows={data || []}
+            rows={rows}
             columns={columns}
             loading={isLoading}
             pageSizeOptions={[10, 25, 50]}
@@ -251,6 +253,19 @@ export default function ScreeningTablePage() {
             aria-label="Screening records data grid"
           />
         </Paper>
+      {hasNextPage && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+            sx={{ color: '#00695c', borderColor: '#00695c' }}
+            className="font-sans"
+          >
+            {isFetchingNextPage ? 'Loading...' : 'Load more'}
+          </Button>
+        </Box>
+      )}
       </motion.div>
 
       {/* Delete Confirmation Dialog */}
@@ -2,8 +2,9 @@
 // components/MalariaChatbotDialog.tsx
 'use client'
 import { useState, useEffect, useRef } from 'react'
-import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query'
+import { useMutation, useQueryClient } from '@tanstack/react-query'
 import api from '@/lib/api'
+import { useCursorList } from '@/lib/pagination'
 import {
   Box, Typography, TextField, Button, Paper, CircularProgress,
   IconButton, Tooltip, Skeleton, Avatar, Dialog, DialogTitle,
@@ -33,37 +34,42 @@ const MalariaChatbotDialog: React.FC<MalariaChatbotDialogProps> = ({ open, onClo
   const [isListening, setIsListening] = useState(false)
   const chatEndRef = useRef<HTMLDivElement | null>(null)
   const queryClient = useQueryClient()
+  // Bubbles not yet in the saved history: the question being sent, or an error reply
+  const [pending, setPending] = useState<ChatMessage[]>([])
 
-  const { data: messages, isLoading: loadingHistory, error: queryError } = useQuery({
-    queryKey: ['chatMessages'],
-    queryFn: () => api.get('/chatbot/messages/').then(res =>
-      res.data.map((msg: any) => [
-        {
-          id: msg.id,
-          role: 'user',
-          query: msg.query,
-          timestamp: new Date(msg.created_at).toLocaleString(),
-        },
-        {
-          id: msg.id,
-          role: 'bot',
-          response: msg.response,
-          search_urls: msg.search_urls || [],
-          timestamp: new Date(msg.created_at).toLocaleString(),
-        }
-      ]).flat()
-    ),
-  })
+  // History pages come newest first; the conversation reads oldest first
+  const {
+    rows, isLoading: loadingHistory, error: queryError, hasNextPage, fetchNextPage, isFetchingNextPage,
+  } = useCursorList(['chatMessages'], '/chatbot/messages/')
+  const messages: ChatMessage[] = [
+    ...rows.slice().reverse().flatMap((msg: any) => [
+      {
+        id: msg.id,
+        role: 'user',
+        query: msg.query,
+        timestamp: new Date(msg.created_at).toLocaleString(),
+      },
+      {
+        id: msg.id,
+        role: 'bot',
+        response: msg.response,
+        search_urls: msg.search_urls || [],
+        timestamp: new Date(msg.created_at).toLocaleString(),
+      }
+    ]),
+    ...pending,
+  ]
 
   const sendQueryMutation = useMutation({
     mutationFn: (query: string) => api.post('/chatbot/messages/', { query }),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['chatMessages'] })
+    onSuccess: async () => {
+      await queryClient.invalidateQueries({ queryKey: ['chatMessages'] })
+      setPending([])
       setQuestion('')
     },
     onError: (error: any) => {
-      queryClient.setQueryData(['chatMessages'], (old: ChatMessage[] | undefined) => [
-        ...(old || []),
+      setPending(old => [
+        ...old,
         {
           id: Date.now(),
           role: 'bot',
@@ -86,10 +92,7 @@ const MalariaChatbotDialog: React.FC<MalariaChatbotDialogProps> = ({ open, onClo
   const handleAskQuestion = () => {
     if (!question.trim()) return
     const timestamp = new Date().toLocaleString()
-    queryClient.setQueryData(['chatMessages'], (old: ChatMessage[] | undefined) => [
-      ...(old || []),
-      { id: Date.now(), role: 'user', query: question, timestamp }
-    ])
+    setPending(old => [...old, { id: Date.now(), role: 'user', query: question, timestamp }])
     sendQueryMutation.mutate(question)
   }
 
@@ -169,12 +172,20 @@ const MalariaChatbotDialog: React.FC<MalariaChatbotDialogProps> = ({ open, onClo
 
       <DialogContent sx={{ p: 0, display: 'flex', flexDirection: 'column', overflow: 'hidden' }}>
         <Box flex={1} overflow="auto" p={2} bgcolor="#f5f5f5">
+          {hasNextPage && (
+            <Box display="flex" justifyContent="center" mb={2}>
+              <Button size="small" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}
+                sx={{ color: '#00695c' }}>
+                {isFetchingNextPage ? 'Loading...' : 'Load earlier messages'}
+              </Button>
+            </Box>
+          )}
           {loadingHistory ? (
             Array.from({ length: 5 }).map((_, i) => (
               <Skeleton key={i} variant="rectangular" width="70%" height={60} sx={{ mb: 2, borderRadius: 2 }} />
             ))
           ) : (
-            messages?.map((msg: ChatMessage) => (
+            messages.map((msg: ChatMessage) => (
               <motion.div key={msg.id + msg.role} initial={{ opacity: 0, y: 10 }} animate={{ opacity: 1, y: 0 }} transition={{ duration: 0.3 }}>
                 <Box display="flex" flexDirection="column" alignItems={msg.role === 'user' ? 'flex-end' : 'flex-start'} mb={2}>
                   <Paper sx={{
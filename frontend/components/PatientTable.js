@@ -1,6 +1,7 @@
 'use client'
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useMutation, useQueryClient } from '@tanstack/react-query'
 import api from '@/lib/api'
+import { useCursorList } from '@/lib/pagination'
 import {
   Paper,
   Box,
@@ -30,10 +31,10 @@ export default function PatientTable() {
   const [patientToDelete, setPatientToDelete] = useState(null)
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'success' })
 
-  const { data, isLoading } = useQuery({
-    queryKey: ['patients'],
-    queryFn: () => api.get('/patients/').then(res => res.data),
-  })
+  const { rows, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useCursorList(
+    ['patients'],
+    '/patients/',
+  )
 
   const deleteMutation = useMutation({
     mutationFn: (id) => api.delete(`/patients/${id}/`),
@@ -181,7 +182,7 @@ export default function PatientTable() {
           className="shadow-md"
         >
           <DataGrid
-            rows={data || []}
+            rows={rows}
             columns={columns}
             loading={isLoading}
             pageSizeOptions={[10, 25, 50]}
@@ -226,6 +227,19 @@ export default function PatientTable() {
             aria-label="Patient records data grid"
           />
         </Paper>
+      {hasNextPage && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+            sx={{ color: '#00695c', borderColor: '#00695c' }}
+            className="font-sans"
+          >
+            {isFetchingNextPage ? 'Loading...' : 'Load more'}
+          </Button>
+        </Box>
+      )}
       </motion.div>
 
       {/* Delete Confirmation Dialog */}
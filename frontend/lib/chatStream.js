@@ -0,0 +1,45 @@
+import api from '@/lib/api'
+
+// POST a question to /chatbot/stream/ and read the server-sent events as
+// they arrive (EventSource cannot POST or send the Authorization header).
+// Calls onMeta({ search_urls, cache_hit }) and onToken(text) along the way
+// and resolves with the saved message from the final `done` event.
+export async function streamChat(query, { onMeta, onToken, signal } = {}) {
+  const token = localStorage.getItem('access_token')
+  const response = await fetch(`${api.defaults.baseURL}/chatbot/stream/`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify({ query }),
+    signal,
+  })
+  if (!response.ok) {
+    throw new Error(`Chat request failed (${response.status})`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let message = null
+  let error = null
+  for (;;) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let end
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, end)
+      buffer = buffer.slice(end + 2)
+      const event = block.match(/^event: (.*)$/m)?.[1]
+      const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] ?? 'null')
+      if (event === 'meta') onMeta?.(data)
+      else if (event === 'token') onToken?.(data.text)
+      else if (event === 'error') error = data.error
+      else if (event === 'done') message = data
+    }
+  }
+  if (error) throw new Error(error)
+  return message
+}
@@ -0,0 +1,15 @@
+import { useInfiniteQuery } from '@tanstack/react-query'
+import api from '@/lib/api'
+
+// Lists served with cursor pagination ({ next, previous, results }).
+// Pages are fetched on demand and flattened into `rows`.
+export function useCursorList(queryKey, path, params = {}) {
+  const query = useInfiniteQuery({
+    queryKey,
+    queryFn: ({ pageParam }) =>
+      (pageParam ? api.get(pageParam) : api.get(path, { params })).then(res => res.data),
+    initialPageParam: null,
+    getNextPageParam: (lastPage) => lastPage.next,
+  })
+  return { ...query, rows: query.data?.pages.flatMap(page => page.results) ?? [] }
+}
@@ -0,0 +1,167 @@
+"""
+Benchmark TFLite model variants on CPU over the held-out image set.
+
+For each .tflite file it reports model size, single-image p50/p95 latency,
+batched throughput, peak memory and accuracy/ROC AUC. Every variant runs in
+its own process so peak RSS is not polluted by the others.
+
+Usage (from model_training/):
+
+    python scripts/benchmark_variants.py --data-dir dataset/cell_images
+    python scripts/benchmark_variants.py models/malaria_model*.tflite --output results.json
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from data import list_split, load_arrays
+
+
+def load_interpreter_class():
+    # Same preference order as the backend (screenings.inference)
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def roc_auc(labels, scores):
+    """
+    Area under the ROC curve via the rank-sum statistic (ties averaged).
+    """
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    positives = labels == 1
+    n_pos, n_neg = positives.sum(), (~positives).sum()
+    if n_pos == 0 or n_neg == 0:
+        return float('nan')
+    return float((ranks[positives].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+class Runner:
+    def __init__(self, model_path, num_threads):
+        self.interpreter = load_interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = 1
+
+    def __call__(self, images):
+        if images.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input['index'], images.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = images.shape[0]
+        scale, zero_point = self.input['quantization']
+        if np.issubdtype(self.input['dtype'], np.integer) and scale:
+            info = np.iinfo(self.input['dtype'])
+            images = np.clip(np.round(images / scale + zero_point), info.min, info.max)
+        self.interpreter.set_tensor(self.input['index'], images.astype(self.input['dtype']))
+        self.interpreter.invoke()
+        outputs = self.interpreter.get_tensor(self.output['index']).reshape(images.shape[0], -1)[:, 0]
+        scale, zero_point = self.output['quantization']
+        if np.issubdtype(self.output['dtype'], np.integer) and scale:
+            outputs = (outputs.astype(np.float32) - zero_point) * scale
+        return outputs.astype(np.float32)
+
+
+def benchmark(model_path, images_path, labels_path, args):
+    images = np.load(images_path, mmap_mode='r')
+    labels = np.load(labels_path)
+    rss_before = peak_rss_mb()
+
+    runner = Runner(model_path, args.num_threads)
+    for i in range(args.warmup):
+        runner(np.ascontiguousarray(images[i % len(images)][None]))
+
+    latencies = []
+    for i in range(min(args.latency_samples, len(images))):
+        image = np.ascontiguousarray(images[i][None])
+        start = time.perf_counter()
+        runner(image)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    scores = np.empty(len(images), dtype=np.float32)
+    start = time.perf_counter()
+    for offset in range(0, len(images), args.batch_size):
+        batch = np.ascontiguousarray(images[offset:offset + args.batch_size])
+        scores[offset:offset + len(batch)] = runner(batch)
+    elapsed = time.perf_counter() - start
+
+    rss_after = peak_rss_mb()
+    return {
+        'model': os.path.basename(model_path),
+        'size_kb': round(os.path.getsize(model_path) / 1024, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'throughput_ips': round(len(images) / elapsed, 1),
+        'peak_rss_mb': round(rss_after, 1) if rss_after else None,
+        'model_rss_mb': round(rss_after - rss_before, 1) if rss_after else None,
+        'accuracy': round(float(((scores > 0.5).astype(np.int64) == labels).mean()), 4),
+        'auc': round(roc_auc(labels, scores), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('models', nargs='*', help="TFLite files (default: models/*.tflite)")
+    parser.add_argument('--data-dir', default='dataset/cell_images')
+    parser.add_argument('--limit', type=int, default=2000, help="Held-out images to evaluate on.")
+    parser.add_argument('--batch-size', type=int, default=32, help="Batch size for the throughput run.")
+    parser.add_argument('--latency-samples', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--num-threads', type=int, default=os.cpu_count())
+    parser.add_argument('--output', help="Also write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    model_paths = args.models or sorted(glob.glob(os.path.join('models', '*.tflite')))
+    images, labels = load_arrays(list_split(args.data_dir, 'validation'), limit=args.limit)
+    print(f"Evaluating {len(model_paths)} model(s) on {len(images)} held-out images, "
+          f"{args.num_threads} thread(s)\n")
+
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        images_path = os.path.join(tmp, 'images.npy')
+        labels_path = os.path.join(tmp, 'labels.npy')
+        np.save(images_path, images)
+        np.save(labels_path, labels)
+        del images
+
+        header = f"{'model':<42} {'size KB':>8} {'p50 ms':>8} {'p95 ms':>8} {'img/s':>8} {'RSS MB':>8} {'acc':>7} {'AUC':>7}"
+        print(header)
+        print('-' * len(header))
+        for model_path in model_paths:
+            with ctx.Pool(1) as pool:
+                row = pool.apply(benchmark, (model_path, images_path, labels_path, args))
+            results.append(row)
+            print(f"{row['model']:<42} {row['size_kb']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} "
+                  f"{row['throughput_ips']:>8} {row['model_rss_mb'] or '-':>8} {row['accuracy']:>7} {row['auc']:>7}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Convert the trained Keras models into quantized TFLite variants.
+
+For every model found in --models-dir this writes, next to the existing
+`malaria_model.tflite` / `malaria_mobilenetv2_model.tflite`:
+
+    <stem>_dynamic.tflite   dynamic-range: int8 weights, float activations
+    <stem>_float16.tflite   float16 weights
+    <stem>_int8.tflite      full integer, int8 input and output, calibrated
+                            on a representative sample of training images
+
+Usage (from model_training/):
+
+    python scripts/convert_quantized.py --data-dir dataset/cell_images
+"""
+
+import argparse
+import os
+
+import tensorflow as tf
+
+from data import list_split, load_arrays
+
+# Keras checkpoint saved by each notebook -> stem of the served TFLite file
+MODELS = {
+    'malaria_cnn_model.h5': 'malaria_model',                        # training.ipynb
+    'malaria_mobilenetv2_model.h5': 'malaria_mobilenetv2_model',    # fine_tuning.ipynb
+}
+VARIANTS = ('dynamic', 'float16', 'int8')
+
+
+def representative_dataset(images):
+    def generator():
+        for image in images:
+            yield [image[None, ...]]
+    return generator
+
+
+def convert(model, variant, calibration_images=None):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'int8':
+        converter.representative_dataset = representative_dataset(calibration_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--data-dir', default='dataset/cell_images',
+                        help="Class-per-directory image folder used for int8 calibration.")
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--calibration-samples', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    calibration_images = None
+    if 'int8' in args.variants:
+        calibration_images, _ = load_arrays(
+            list_split(args.data_dir, 'training'), limit=args.calibration_samples, seed=args.seed
+        )
+        print(f"Calibrating int8 variants on {len(calibration_images)} training images")
+
+    for checkpoint, stem in MODELS.items():
+        path = os.path.join(args.models_dir, checkpoint)
+        if not os.path.exists(path):
+            print(f"Skipping {checkpoint}: not found in {args.models_dir}")
+            continue
+        model = tf.keras.models.load_model(path)
+        for variant in args.variants:
+            tflite_model = convert(model, variant, calibration_images)
+            out_path = os.path.join(args.models_dir, f"{stem}_{variant}.tflite")
+            with open(out_path, 'wb') as f:
+                f.write(tflite_model)
+            print(f"Wrote {out_path} ({len(tflite_model) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Dataset helpers shared by the conversion and benchmark scripts.
+
+The split mirrors the notebooks' ImageDataGenerator(validation_split=0.2):
+for each class directory the first 20% of files (sorted by name) are the
+held-out set and the rest are training data. Class indices follow
+flow_from_directory, i.e. alphabetical: Parasitized = 0, Uninfected = 1.
+Images are prepared the way the backend serves them (RGB, 128x128 bicubic,
+scaled to [0, 1]), so accuracy here matches accuracy in production.
+"""
+
+import os
+import random
+
+import numpy as np
+from PIL import Image
+
+IMG_SIZE = (128, 128)
+VALIDATION_SPLIT = 0.2
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+
+def list_split(data_dir, subset):
+    """
+    Return [(path, label)] for the 'training' or 'validation' subset.
+    """
+    classes = sorted(
+        d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d))
+    )
+    items = []
+    for label, class_name in enumerate(classes):
+        class_dir = os.path.join(data_dir, class_name)
+        files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+        split_at = int(len(files) * VALIDATION_SPLIT)
+        chosen = files[:split_at] if subset == 'validation' else files[split_at:]
+        items.extend((os.path.join(class_dir, f), label) for f in chosen)
+    return items
+
+
+def load_image(path):
+    img = Image.open(path).convert('RGB').resize(IMG_SIZE, Image.BICUBIC)
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def load_arrays(items, limit=None, seed=0):
+    """
+    Load (images, labels) for up to `limit` randomly sampled items.
+    """
+    if limit and len(items) > limit:
+        items = random.Random(seed).sample(items, limit)
+    images = np.stack([load_image(path) for path, _ in items])
+    labels = np.array([label for _, label in items], dtype=np.int64)
+    return images, labels